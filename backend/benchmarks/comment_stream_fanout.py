@@ -0,0 +1,117 @@
+"""
+Canlı yorum akışı yük testi: tek bir etkinliğin /events/<id>/comments/stream kanalına N izleyici
+bağlanır, ardından API üzerinden K yorum gönderilir. Her yorumun her izleyiciye ulaşma süresi
+(POST başlangıcından SSE mesajının okunmasına kadar) ölçülür.
+
+Çalıştırma (backend klasöründen, sunucu aynı SECRET_KEY ile ayaktayken; kullanıcı ve etkinlik var olmalı):
+    sanic src.server:app --port 8000 --single-process &
+    python -m benchmarks.comment_stream_fanout --event-id 1 --user-id 1 --watchers 1000 --comments 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+import aiohttp
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+load_dotenv(".env.test")
+
+from src.security import create_access_token  # noqa: E402
+
+
+async def watch(session, url: str, event_id: int, sent: dict, latencies: list, status: Counter,
+                connected: list, done: asyncio.Event):
+    try:
+        async with session.get(f"{url}/events/{event_id}/comments/stream") as resp:
+            if resp.status != 200:
+                status[resp.status] += 1
+                connected.append(False)
+                return
+            connected.append(True)
+            event = None
+            while not done.is_set():
+                line = (await resp.content.readline()).decode("utf-8").rstrip("\n")
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: ") and event == "comment":
+                    started = sent.get(json.loads(line[6:])["content"])
+                    if started:
+                        latencies.append(time.perf_counter() - started)
+                elif line.startswith("data: ") and event == "close":
+                    status[f"closed:{json.loads(line[6:])['reason']}"] += 1
+                    return
+                elif not line and resp.content.at_eof():
+                    return
+    except Exception as e:
+        status[type(e).__name__] += 1
+
+
+def percentile(values, p):
+    return sorted(values)[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--event-id", type=int, required=True)
+    parser.add_argument("--user-id", type=int, required=True, help="yorumları gönderen (var olan) kullanıcı")
+    parser.add_argument("--watchers", type=int, default=1000)
+    parser.add_argument("--comments", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.25, help="yorumlar arası bekleme (sn)")
+    args = parser.parse_args()
+
+    sent, latencies, status, connected = {}, [], Counter(), []
+    done = asyncio.Event()
+    headers = {"Authorization": f"Bearer {create_access_token(args.user_id, 'student')}"}
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [asyncio.create_task(watch(session, args.url, args.event_id, sent, latencies, status, connected, done))
+                 for _ in range(args.watchers)]
+        started = time.perf_counter()
+        while len(connected) < args.watchers and time.perf_counter() - started < 60:
+            await asyncio.sleep(0.1)
+        watching = connected.count(True)
+        print(f"watchers connected: {watching}/{args.watchers} in {time.perf_counter() - started:.1f}s")
+        await asyncio.sleep(1)  # SUBSCRIBE'ın yerleşmesi için
+
+        post_times = []
+        for i in range(args.comments):
+            content = f"bench-{i}-{time.time_ns()}"
+            sent[content] = time.perf_counter()
+            async with session.post(f"{args.url}/events/{args.event_id}/comments",
+                                    json={"content": content}, headers=headers) as resp:
+                await resp.read()
+                post_times.append(time.perf_counter() - sent[content])
+                if resp.status != 201:
+                    status[f"post:{resp.status}"] += 1
+            await asyncio.sleep(args.interval)
+
+        expected = watching * args.comments
+        deadline = time.perf_counter() + 10
+        while len(latencies) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        done.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"delivered: {len(latencies)}/{expected} comment messages")
+    if latencies:
+        ms = [v * 1000 for v in latencies]
+        print(f"delivery latency ms: p50={statistics.median(ms):.1f} p95={percentile(ms, 95):.1f} "
+              f"p99={percentile(ms, 99):.1f} max={max(ms):.1f}")
+    print(f"POST latency ms: p50={statistics.median(post_times) * 1000:.1f} max={max(post_times) * 1000:.1f}")
+    if status:
+        print(f"other outcomes: {dict(status)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Mail gönderim hızı benchmark'ı (mesaj/saniye), yerel SMTP stand-in'ine karşı:
+  - "per-message": eski davranış, her mesaj için yeni SMTP oturumu (aiosmtplib.send)
+  - "queue":       MailQueue, worker başına kalıcı bağlantı
+
+Çalıştırma (backend klasöründen):
+    python -m benchmarks.mail_throughput --messages 500 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+load_dotenv(".env.test")
+
+import aiosmtplib  # noqa: E402
+from src.dev_smtp import DevSMTPServer  # noqa: E402
+from src.services.mail_service import MailQueue  # noqa: E402
+
+
+async def bench_per_message(server: DevSMTPServer, count: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i):
+        async with semaphore:
+            message = MailQueue._build({"to": f"user{i}@campus.hub", "subject": "Bench", "body": "Hello"})
+            await aiosmtplib.send(message, hostname=server.host, port=server.port, start_tls=False)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(count)))
+    return time.perf_counter() - started
+
+
+async def bench_queue(server: DevSMTPServer, count: int, workers: int):
+    queue = MailQueue(workers=workers, max_retries=0)
+    await queue.start()
+    started = time.perf_counter()
+    for i in range(count):
+        await queue.enqueue(f"user{i}@campus.hub", "Bench", "Hello")
+    while queue.sent < count:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    await queue.stop()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server = await DevSMTPServer(port=0).start()
+    os.environ.update({"SMTP_HOST": server.host, "SMTP_PORT": str(server.port),
+                       "SMTP_USER": "", "SMTP_START_TLS": "false"})
+
+    before = server.connections
+    elapsed = await bench_per_message(server, args.messages, args.workers)
+    print(f"per-message | {args.messages / elapsed:8.1f} msg/s  connections={server.connections - before}")
+
+    before = server.connections
+    elapsed = await bench_queue(server, args.messages, args.workers)
+    print(f"queue       | {args.messages / elapsed:8.1f} msg/s  connections={server.connections - before}")
+
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
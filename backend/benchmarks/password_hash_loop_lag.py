@@ -0,0 +1,71 @@
+"""
+Event loop gecikmesi benchmark'ı: bcrypt senkron vs. havuzlu (hash_password_async).
+
+Çalıştırma (backend klasöründen):
+    python -m benchmarks.password_hash_loop_lag --logins 40 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+load_dotenv(".env.test")
+
+from src.security import hash_password, verify_password, PasswordHashPool  # noqa: E402
+
+TICK = 0.005  # 5 ms'lik "heartbeat" ile loop gecikmesi ölçülür
+
+
+async def _measure_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append((time.perf_counter() - start - TICK) * 1000)
+
+
+async def _run(mode: str, hashed: str, logins: int, pool: PasswordHashPool):
+    samples, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(_measure_lag(stop, samples))
+    await asyncio.sleep(0)
+
+    async def login():
+        if mode == "sync":
+            verify_password("campus_123", hashed)
+        else:
+            await pool.run(verify_password, "campus_123", hashed)
+        await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+    print(f"{mode:>5} | logins={logins} total={elapsed:.2f}s "
+          f"lag mean={statistics.mean(samples or [0]):.1f}ms p99={p99:.1f}ms max={max(samples or [0]):.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    args = parser.parse_args()
+
+    hashed = hash_password("campus_123")
+    pool = PasswordHashPool(args.executor, max_workers=args.workers, max_pending=args.logins)
+    await _run("sync", hashed, args.logins, pool)
+    await _run("pool", hashed, args.logins, pool)
+    print("pool stats:", pool.stats())
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+SSE yük testi: çalışan backend'e N adet boşta bekleyen /notifications/stream bağlantısı açar,
+sunucu process'inin RSS artışından bağlantı başına bellek maliyetini hesaplar.
+
+Çalıştırma (backend klasöründen, sunucu aynı SECRET_KEY ile ayaktayken):
+    sanic src.server:app --port 8000 --single-process &
+    python -m benchmarks.realtime_idle_connections --connections 1000 --server-pid $!
+
+Not: --workers=4 ile çalışıyorsa her worker'ın PID'i ayrı ölçülmelidir.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+load_dotenv(".env.test")
+
+from src.security import create_access_token  # noqa: E402
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def open_stream(session, url: str, user_id: int, ready: asyncio.Event, opened: list):
+    token = create_access_token(100000 + user_id, "student")
+    try:
+        async with session.get(f"{url}/notifications/stream", params={"token": token}) as resp:
+            if resp.status != 200:
+                opened.append(resp.status)
+                return
+            await resp.content.readline()  # "retry: ..." ilk satırı
+            opened.append(200)
+            await ready.wait()
+    except Exception as e:
+        opened.append(type(e).__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--server-pid", type=int, required=True)
+    parser.add_argument("--hold", type=float, default=5, help="bağlantılar açıkken bekleme süresi (sn)")
+    args = parser.parse_args()
+
+    before = rss_kb(args.server_pid)
+    ready, opened = asyncio.Event(), []
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(open_stream(session, args.url, i, ready, opened))
+                 for i in range(args.connections)]
+        while len(opened) < args.connections and time.perf_counter() - started < 60:
+            await asyncio.sleep(0.1)
+        ok = opened.count(200)
+        await asyncio.sleep(args.hold)
+        after = rss_kb(args.server_pid)
+        ready.set()
+        await asyncio.gather(*tasks)
+
+    print(f"connections open: {ok}/{args.connections} (errors: {[o for o in opened if o != 200][:5]})")
+    print(f"server RSS: {before / 1024:.1f} MB -> {after / 1024:.1f} MB")
+    if ok:
+        print(f"≈ {(after - before) / ok:.1f} KB per idle connection")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,193 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+from src.config import logger, EVENTS_LIST_CACHE_TTL, CLUBS_LIST_CACHE_TTL, EVENT_DETAIL_CACHE_TTL
+
+
+class CacheNamespace:
+    """
+    Generation (nesil) sayaçlı Redis cache.
+      cache:{name}:gen                 -> namespace'in güncel nesli
+      cache:{name}:g{gen}:{suffix}     -> o nesildeki cache'lenmiş sayfa
+    Yazma işlemleri sadece nesli artırır (tek INCR); eski nesildeki tüm anahtarlara
+    artık ulaşılamaz ve TTL ile kendiliğinden silinir. KEYS/SCAN ile silme gerekmez.
+
+    Sıralama önemli: okuyucu nesli veritabanı sorgusundan ÖNCE okur, yazıcı nesli
+    commit'ten SONRA artırır. Böylece eski veri en fazla eski nesle yazılabilir.
+    """
+
+    # Nesil okuma + sayfa okuma tek round-trip (tek Redis instance varsayılır)
+    _GET = """
+    local gen = redis.call('GET', KEYS[1]) or '0'
+    return {gen, redis.call('GET', ARGV[1] .. ':g' .. gen .. ':' .. ARGV[2])}
+    """
+
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+        self.prefix = f"cache:{name}"
+        self.gen_key = f"{self.prefix}:gen"
+
+    async def get(self, redis, suffix: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        (veri, anahtar) döner. Veri yoksa dönen anahtar set() için kullanılmalıdır;
+        Redis yoksa/erişilemiyorsa (None, None) döner ve cache atlanır.
+        """
+        if not redis:
+            return None, None
+        try:
+            gen, data = await redis.eval(self._GET, 1, self.gen_key, self.prefix, suffix)
+            return (json.loads(data) if data else None), f"{self.prefix}:g{gen}:{suffix}"
+        except Exception as e:
+            logger.error(f"Cache read failed ({self.name}): {str(e)}")
+            return None, None
+
+    async def set(self, redis, key: Optional[str], value: Any):
+        if not redis or not key:
+            return
+        try:
+            await redis.set(key, json.dumps(value), ex=self.ttl)
+        except Exception as e:
+            logger.error(f"Cache write failed ({self.name}): {str(e)}")
+
+    async def count(self, redis, suffix: str, query) -> int:
+        """Sorgunun COUNT(*) sonucunu namespace nesliyle birlikte cache'ler (nesil artınca yenilenir)."""
+        cached, key = await self.get(redis, f"count:{suffix}")
+        if cached is not None:
+            return cached
+        total = await query.count()
+        await self.set(redis, key, total)
+        return total
+
+    async def invalidate(self, redis):
+        """Namespace'deki tüm sayfaları O(1) geçersiz kılar."""
+        if not redis:
+            return
+        try:
+            await redis.incr(self.gen_key)
+        except Exception as e:
+            logger.error(f"Cache invalidation failed ({self.name}): {str(e)}")
+
+
+class ItemCache:
+    """
+    Kayıt bazlı (ör. tek etkinlik detayı) paylaşılan cache: cache:{name}:{id}.
+    Herkese aynı olan kısım tek kopya tutulur; kullanıcıya özel bit (ör. "katıldım mı")
+    bir Redis kümesinden aynı round-trip'te okunur (overlay).
+
+    cache:{name}:{id}:v kaydın yazma neslidir (CacheNamespace ile aynı sıralama): okuyucu nesli
+    veritabanı okumasından ÖNCE get ile alır, set sadece nesil değişmemişse yazar; yazma
+    işlemleri commit'ten SONRA nesli artırıp anahtarı siler. Böylece katılımdan önce okunmuş
+    bir detay (eski participant_count) invalidate'ten sonra cache'e geri yazılamaz.
+    """
+
+    # {veri, üyelik, nesil}: üyelik 1/0, küme yoksa ya da üye sorulmadıysa -1
+    _GET = """
+    local data = redis.call('GET', KEYS[1]) or false
+    local version = redis.call('GET', KEYS[2]) or '0'
+    if ARGV[1] == '' or redis.call('EXISTS', KEYS[3]) == 0 then
+        return {data, -1, version}
+    end
+    return {data, redis.call('SISMEMBER', KEYS[3], ARGV[1]), version}
+    """
+
+    # KEYS: (veri, nesil) çiftleri; ARGV: ttl, ardından (okunan nesil, değer) çiftleri
+    _SET_IF_CURRENT = """
+    local written = 0
+    for i = 1, #KEYS, 2 do
+        local version = ARGV[i + 1]
+        if (redis.call('GET', KEYS[i + 1]) or '0') == version then
+            redis.call('SET', KEYS[i], ARGV[i + 2], 'EX', ARGV[1])
+            written = written + 1
+        end
+    end
+    return written
+    """
+
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+
+    def key(self, item_id) -> str:
+        return f"cache:{self.name}:{item_id}"
+
+    def version_key(self, item_id) -> str:
+        return f"cache:{self.name}:{item_id}:v"
+
+    async def get(self, redis, item_id, member_set: str = None,
+                  member=None) -> Tuple[Optional[Any], Optional[bool], Optional[str]]:
+        """
+        (veri, üyelik, nesil) döner. member_set/member verilirse üyelik True/False olur; küme
+        Redis'te yoksa None döner (çağıran kaynaktan doldurmalı). Veri yoksa nesil set()'e
+        verilmelidir. Hata durumunda (None, None, None) döner ve cache atlanır.
+        """
+        if not redis:
+            return None, None, None
+        try:
+            data, is_member, version = await redis.eval(
+                self._GET, 3, self.key(item_id), self.version_key(item_id), member_set or self.key(item_id),
+                "" if member is None or not member_set else member
+            )
+            return (json.loads(data) if data else None), (None if is_member == -1 else bool(is_member)), version
+        except Exception as e:
+            logger.error(f"Cache read failed ({self.name}): {str(e)}")
+            return None, None, None
+
+    async def set(self, redis, item_id, value: Any, version: Optional[str]):
+        """Kaydı sadece get'te okunan nesil hâlâ güncelse yazar."""
+        await self.set_many(redis, {item_id: value}, {item_id: version})
+
+    async def get_many(self, redis, item_ids) -> Tuple[Dict[Any, Any], Dict[Any, str]]:
+        """
+        Birden çok kaydı ve nesillerini tek MGET ile okur: ({id: veri}, {id: nesil}).
+        Cache'te olmayanlar ilk sözlükte dönmez; nesilleri set_many'ye verilmelidir.
+        """
+        if not redis or not item_ids:
+            return {}, {}
+        try:
+            values = await redis.mget(
+                [self.key(i) for i in item_ids] + [self.version_key(i) for i in item_ids]
+            )
+            data, versions = values[:len(item_ids)], values[len(item_ids):]
+            found = {i: json.loads(v) for i, v in zip(item_ids, data) if v}
+            return found, {i: v or "0" for i, v in zip(item_ids, versions)}
+        except Exception as e:
+            logger.error(f"Cache read failed ({self.name}): {str(e)}")
+            return {}, {}
+
+    async def set_many(self, redis, items: Dict[Any, Any], versions: Dict[Any, str]):
+        """Kayıtları tek script ile yazar; nesli okunamamış ya da o arada değişmiş olanlar atlanır."""
+        items = {i: v for i, v in items.items() if versions.get(i) is not None}
+        if not redis or not items:
+            return
+        keys, args = [], [self.ttl]
+        for item_id, value in items.items():
+            keys += [self.key(item_id), self.version_key(item_id)]
+            args += [versions[item_id], json.dumps(value)]
+        try:
+            await redis.eval(self._SET_IF_CURRENT, len(keys), *keys, *args)
+        except Exception as e:
+            logger.error(f"Cache write failed ({self.name}): {str(e)}")
+
+    async def invalidate(self, redis, item_id):
+        await self.invalidate_many(redis, [item_id])
+
+    async def invalidate_many(self, redis, item_ids, chunk_size: int = 500):
+        """Kayıtların neslini artırıp anahtarlarını siler (ör. kulüp adı değişince tüm etkinlikleri)."""
+        item_ids = list(item_ids)
+        if not redis or not item_ids:
+            return
+        try:
+            for i in range(0, len(item_ids), chunk_size):
+                pipe = redis.pipeline(transaction=False)
+                for item_id in item_ids[i:i + chunk_size]:
+                    pipe.incr(self.version_key(item_id))
+                    pipe.expire(self.version_key(item_id), self.ttl)
+                    pipe.delete(self.key(item_id))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Cache invalidation failed ({self.name}): {str(e)}")
+
+
+events_cache = CacheNamespace("events", EVENTS_LIST_CACHE_TTL)
+clubs_cache = CacheNamespace("clubs", CLUBS_LIST_CACHE_TTL)
+event_detail_cache = ItemCache("event_detail", EVENT_DETAIL_CACHE_TTL)
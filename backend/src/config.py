@@ -22,10 +22,84 @@ if not DB_URL:
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379") # Redis localde şifresiz olabilir, bu kalabilir.
 
+# --- LİSTE CACHE'LERİ ---
+# Yazma işlemleri namespace neslini artırdığı için TTL sadece bellek sınırı görevi görür
+EVENTS_LIST_CACHE_TTL = int(os.getenv("EVENTS_LIST_CACHE_TTL", 600))  # saniye
+CLUBS_LIST_CACHE_TTL = int(os.getenv("CLUBS_LIST_CACHE_TTL", 3600))  # saniye
+# Etkinlik detayı tek anahtar silinerek geçersiz kılınır; TTL okuma/yazma yarışında kalabilecek
+# eski kopyanın en fazla ne kadar yaşayacağını belirler
+EVENT_DETAIL_CACHE_TTL = int(os.getenv("EVENT_DETAIL_CACHE_TTL", 300))  # saniye
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise ValueError("KRİTİK HATA: SECRET_KEY ayarlanmamış! Güvenlik için zorunludur.")
 
+# --- PAROLA HASH HAVUZU ---
+# bcrypt CPU-yoğun olduğu için event loop dışında, sınırlı bir havuzda çalıştırılır.
+# PASSWORD_HASH_EXECUTOR: "thread" (varsayılan, bcrypt GIL'i bırakır) veya "process"
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# Aynı anda havuza gönderilebilecek iş sayısı (worker başına)
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", PASSWORD_HASH_WORKERS))
+# Sırada bekleyebilecek en fazla iş; aşılırsa istek reddedilir (503)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+# --- JWT ÖNBELLEĞİ ---
+# Doğrulanmış token payload'ları worker başına LRU'da exp zamanına kadar tutulur
+JWT_CACHE_ENABLED = os.getenv("JWT_CACHE_ENABLED", "true").lower() == "true"
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+
+# --- GİDEN MAIL KUYRUĞU ---
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", 2))  # Sanic worker başına SMTP bağlantısı
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", 5))
+MAIL_RETRY_BASE_DELAY = float(os.getenv("MAIL_RETRY_BASE_DELAY", 2))  # saniye, üstel artar
+
+# --- BİLDİRİM FAN-OUT ---
+NOTIFY_FANOUT_CHUNK_SIZE = int(os.getenv("NOTIFY_FANOUT_CHUNK_SIZE", 500))
+# Aynı kulübün bu süre içindeki etkinlikleri tek bildirimde birleştirilir (0 = kapalı)
+NOTIFY_DIGEST_WINDOW = float(os.getenv("NOTIFY_DIGEST_WINDOW", 60))  # saniye
+
+# --- ETKİNLİK HATIRLATMALARI ---
+# Worker'lardan sadece Redis kilidini tutan (lider) tarar; kilit tick süresinin birkaç katı yaşar
+REMINDER_ENABLED = os.getenv("REMINDER_ENABLED", "true").lower() == "true"
+REMINDER_LEAD_MINUTES = int(os.getenv("REMINDER_LEAD_MINUTES", 120))  # başlangıçtan ne kadar önce
+REMINDER_TICK = float(os.getenv("REMINDER_TICK", 60))  # saniye, tarama aralığı
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", 200))  # tarama başına etkinlik
+
+# --- ANA SAYFA AKIŞI (TIMELINE) ---
+TIMELINE_MAX_ITEMS = int(os.getenv("TIMELINE_MAX_ITEMS", 500))  # kullanıcı başına tutulan yaklaşan etkinlik
+# Takipçisi bu sayıyı aşan kulüplerin etkinlikleri yazma anında dağıtılmaz, okuma anında birleştirilir
+TIMELINE_FANOUT_LIMIT = int(os.getenv("TIMELINE_FANOUT_LIMIT", 5000))
+TIMELINE_TTL = int(os.getenv("TIMELINE_TTL", 7 * 24 * 3600))  # saniye, okunmayan akışlar düşer
+
+# --- GERÇEK ZAMANLI BİLDİRİM (SSE) ---
+REALTIME_MAX_CONNECTIONS = int(os.getenv("REALTIME_MAX_CONNECTIONS", 2000))  # worker başına
+REALTIME_MAX_PER_USER = int(os.getenv("REALTIME_MAX_PER_USER", 5))  # worker başına açık sekme
+REALTIME_MAX_PER_EVENT = int(os.getenv("REALTIME_MAX_PER_EVENT", 1500))  # worker başına canlı yorum izleyicisi
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", 100))  # bağlantı başına bekleyen mesaj
+REALTIME_HEARTBEAT_INTERVAL = float(os.getenv("REALTIME_HEARTBEAT_INTERVAL", 15))  # saniye
+REALTIME_RETRY_AFTER = int(os.getenv("REALTIME_RETRY_AFTER", 3))  # saniye, 503 sonrası yeniden bağlanma
+# EventSource header gönderemez; JWT yerine URL'de kısa ömürlü, tek kullanımlık bilet taşınır
+REALTIME_TICKET_TTL = int(os.getenv("REALTIME_TICKET_TTL", 30))  # saniye
+
+# --- BİLDİRİM SAKLAMA (RETENTION) ---
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 90))  # okunmuş bildirimler
+NOTIFICATION_RETENTION_BATCH = int(os.getenv("NOTIFICATION_RETENTION_BATCH", 1000))
+NOTIFICATION_RETENTION_ARCHIVE = os.getenv("NOTIFICATION_RETENTION_ARCHIVE", "false").lower() == "true"
+
+# --- ETKİNLİK YORUMLARI ---
+COMMENTS_PAGE_SIZE = int(os.getenv("COMMENTS_PAGE_SIZE", 20))  # varsayılan sayfa boyutu
+COMMENTS_MAX_PAGE_SIZE = int(os.getenv("COMMENTS_MAX_PAGE_SIZE", 100))
+COMMENT_COUNT_TTL = int(os.getenv("COMMENT_COUNT_TTL", 86400))  # saniye, sapmayı sınırlar
+# İlk sayfa yorum listesi Redis'te write-through tutulur (en fazla COMMENTS_MAX_PAGE_SIZE + 1 yorum)
+COMMENT_THREAD_CACHE_TTL = int(os.getenv("COMMENT_THREAD_CACHE_TTL", 3600))  # saniye
+
+# --- TAKVİM AKIŞI ---
+# Abonelik adresinin kökü (ör. https://api.campushub.edu); boşsa isteğin scheme/host'undan türetilir
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", "").rstrip("/")
+# Token'ın güncel sürümü/kullanıcının aktifliği Redis'te bu kadar tutulur (ban en geç bu sürede etkili olur)
+CALENDAR_TOKEN_CACHE_TTL = int(os.getenv("CALENDAR_TOKEN_CACHE_TTL", 60))  # saniye
+
 TORTOISE_ORM = {
     "connections": {"default": DB_URL},
     "apps": {
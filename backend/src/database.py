@@ -1,5 +1,6 @@
 from tortoise import Tortoise
 from src.config import DB_URL
+from src.migrations import run_migrations
 
 async def init_db():
     await Tortoise.init(
@@ -8,6 +9,8 @@ async def init_db():
     )
     # This will create missing tables/columns
     await Tortoise.generate_schemas(safe=True)  # safe=True prevents data loss
+    # generate_schemas var olan tablolara yeni index/kolon eklemez
+    await run_migrations()
 
 async def close_db():
     await Tortoise.close_connections()
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Geliştirme ve benchmark için yerel SMTP stand-in'i.
+Gelen her mesajı kabul eder, sayar ve (istenirse) loglar; hiçbir yere iletmez.
+
+Çalıştırma:
+    python -m src.dev_smtp --port 1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_START_TLS=false ile backend'i başlatın.
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+
+class DevSMTPServer:
+    """EHLO/AUTH/MAIL/RCPT/DATA destekleyen minimal SMTP sunucusu (STARTTLS yok)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, verbose: bool = False):
+        self.host = host
+        self.port = port
+        self.verbose = verbose
+        self.received = 0
+        self.connections = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"📬 Dev SMTP listening on {self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 campushub-dev-smtp ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb == "EHLO":
+                    writer.write(b"250-campushub-dev-smtp\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                    await writer.drain()
+                elif verb == "HELO":
+                    await reply("250 campushub-dev-smtp")
+                elif verb == "AUTH":
+                    parts = command.split(" ")
+                    if parts[1].upper() == "LOGIN" and len(parts) == 2:
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    elif parts[1].upper() == "LOGIN":
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    await reply("235 2.7.0 Authentication successful")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while True:
+                        data_line = await reader.readline()
+                        if not data_line or data_line in (b".\r\n", b".\n"):
+                            break
+                    self.received += 1
+                    if self.verbose:
+                        print(f"✉️  message #{self.received} received")
+                    await reply("250 OK: queued")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    asyncio.run(DevSMTPServer(args.host, args.port, verbose=True).serve_forever())
@@ -0,0 +1,70 @@
+"""
+iCalendar (RFC 5545) üretimi için küçük yardımcılar. Takvim akışı VEVENT'leri tek tek
+ürettiği için belge bellekte bir bütün olarak kurulmaz (bkz. CalendarService.iter_feed).
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+CRLF = "\r\n"
+PRODID = "-//CampusHub//Events//TR"
+UID_DOMAIN = "campushub"
+
+
+def escape_text(value: Optional[str]) -> str:
+    """TEXT değerlerinde \\ ; , ve satır sonları kaçırılır."""
+    if not value:
+        return ""
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n"))
+
+
+def fold(line: str, limit: int = 75) -> str:
+    """Satırı 75 oktetlik parçalara böler (devam satırları tek boşlukla başlar, UTF-8 karakter bölünmez)."""
+    if len(line.encode("utf-8")) <= limit:
+        return line + CRLF
+    parts, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > limit:
+            parts.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    parts.append(current)
+    return CRLF.join(parts) + CRLF
+
+
+def format_datetime(value: datetime) -> str:
+    """UTC biçimi: 20300107T180000Z (naive değerler UTC kabul edilir)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def calendar_header(name: str) -> str:
+    return "".join(fold(line) for line in (
+        "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}", "REFRESH-INTERVAL;VALUE=DURATION:PT15M",
+    ))
+
+
+CALENDAR_FOOTER = "END:VCALENDAR" + CRLF
+
+
+def vevent(event_id: int, title: str, start: datetime, stamp: datetime, end: datetime = None,
+           location: str = None, description: str = None) -> str:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:event-{event_id}@{UID_DOMAIN}",
+        f"DTSTAMP:{format_datetime(stamp)}",
+        f"DTSTART:{format_datetime(start)}",
+    ]
+    if end:
+        lines.append(f"DTEND:{format_datetime(end)}")
+    lines.append(f"SUMMARY:{escape_text(title)}")
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
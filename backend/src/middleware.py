@@ -1,15 +1,84 @@
+import hashlib
+import time
+from collections import OrderedDict
 from functools import wraps
+from typing import Optional, Dict, Any
 from sanic.response import json
 from src.security import decode_access_token
 from src.models import UserRole
-from src.config import logger
+from src.config import logger, JWT_CACHE_ENABLED, JWT_CACHE_SIZE
+
+# --- DOĞRULANMIŞ TOKEN ÖNBELLEĞİ ---
+class TokenCache:
+    """
+    Worker başına sınırlı boyutlu LRU. Anahtar token'ın SHA-256 özeti,
+    değer ise çözülmüş payload'dur; kayıt token'ın exp zamanında düşer.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        payload = self._entries.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        if payload.get("exp", 0) <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(payload)
+
+    def set(self, token: str, payload: Dict[str, Any]):
+        if self.max_size <= 0 or "exp" not in payload:
+            return
+        key = self._key(token)
+        self._entries[key] = dict(payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+token_cache = TokenCache(JWT_CACHE_SIZE)
 
 # --- YARDIMCI FONKSİYON ---
-def _extract_user_payload(request):
+def _extract_user_payload(request, use_cache: bool = True):
     """Token'ı çözen ve 'sub' alanını (ID) integer'a çeviren yardımcı fonksiyon."""
     token = request.token
     if not token:
         return None
+
+    use_cache = use_cache and JWT_CACHE_ENABLED
+    if use_cache:
+        cached = token_cache.get(token)
+        if cached:
+            return cached
     
     payload = decode_access_token(token)
     if payload:
@@ -19,17 +88,22 @@ def _extract_user_payload(request):
                 payload["sub"] = int(payload["sub"])
             except ValueError:
                 pass
+        if use_cache:
+            token_cache.set(token, payload)
         return payload
     return None
 
 # --- DEKORATÖRLER ---
 
-def authorized():
-    """ZORUNLU Yetkilendirme: Geçerli bir token yoksa 401 hatası döndürür."""
+def authorized(use_cache: bool = True):
+    """
+    ZORUNLU Yetkilendirme: Geçerli bir token yoksa 401 hatası döndürür.
+    use_cache=False ile token her istekte yeniden doğrulanır (admin rotaları).
+    """
     def decorator(f):
         @wraps(f)
         async def decorated_function(request, *args, **kwargs):
-            payload = _extract_user_payload(request)
+            payload = _extract_user_payload(request, use_cache)
             
             if not payload:
                 logger.warning(f"Unauthorized access attempt to {request.path}: Missing or invalid token")
@@ -40,13 +114,13 @@ def authorized():
         return decorated_function
     return decorator
 
-def inject_user():
+def inject_user(use_cache: bool = True):
     """OPSİYONEL Yetkilendirme: Token varsa kullanıcıyı yükler, yoksa devam eder."""
     def decorator(f):
         @wraps(f)
         async def decorated_function(request, *args, **kwargs):
             # Token varsa payload'u al, yoksa None ata
-            request.ctx.user = _extract_user_payload(request)
+            request.ctx.user = _extract_user_payload(request, use_cache)
             return await f(request, *args, **kwargs)
         return decorated_function
     return decorator
@@ -0,0 +1,191 @@
+"""
+Var olan veritabanları için idempotent şema yamaları.
+
+generate_schemas(safe=True) sadece eksik tabloları oluşturur; mevcut tablolara sonradan
+eklenen index ve kolonlar burada tanımlanır. Her açılışta (init_db) kontrol edilir,
+eksik olanlar uygulanır. Kolon backfill'lerinin tamamlandığı schema_migrations tablosuna
+ayrıca işaretlenir; yarıda kalan backfill sonraki açılışta yeniden çalıştırılır. Elle çalıştırmak için:
+    python -m src.migrations
+"""
+import asyncio
+from typing import Awaitable, Callable, Sequence, Tuple
+from tortoise import Tortoise
+from src.config import logger
+from src.search import backfill_search_documents
+from src.reconcile import backfill_participant_counts, backfill_follower_counts
+
+
+MARKER_TABLE = "schema_migrations"
+
+
+async def _ensure_marker_table(conn):
+    if conn.capabilities.dialect == "mysql":
+        await conn.execute_script(
+            f"CREATE TABLE IF NOT EXISTS `{MARKER_TABLE}` "
+            "(`name` VARCHAR(191) NOT NULL PRIMARY KEY, `applied_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6))"
+        )
+    else:
+        await conn.execute_script(
+            f'CREATE TABLE IF NOT EXISTS "{MARKER_TABLE}" '
+            '("name" VARCHAR(191) NOT NULL PRIMARY KEY, "applied_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+        )
+
+
+async def _is_marked(conn, name: str) -> bool:
+    placeholder = "%s" if conn.capabilities.dialect == "mysql" else "?"
+    rows = await conn.execute_query_dict(f"SELECT 1 FROM {MARKER_TABLE} WHERE name = {placeholder}", [name])
+    return bool(rows)
+
+
+async def _mark(conn, name: str):
+    if conn.capabilities.dialect == "mysql":
+        await conn.execute_query(f"INSERT IGNORE INTO `{MARKER_TABLE}` (`name`) VALUES (%s)", [name])
+    else:
+        await conn.execute_query(f'INSERT OR IGNORE INTO "{MARKER_TABLE}" ("name") VALUES (?)', [name])
+
+
+class AddIndex:
+    def __init__(self, table: str, name: str, columns: Tuple[str, ...], unique: bool = False):
+        self.table = table
+        self.name = name
+        self.columns = columns
+        self.unique = unique
+
+    def __str__(self):
+        return f"index {self.name} on {self.table}({', '.join(self.columns)})"
+
+    async def is_applied(self, conn) -> bool:
+        if conn.capabilities.dialect == "mysql":
+            rows = await conn.execute_query_dict(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+                [self.table, self.name]
+            )
+        else:
+            rows = await conn.execute_query_dict(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", [self.name]
+            )
+        return bool(rows)
+
+    async def apply(self, conn):
+        columns = ", ".join(f"`{c}`" if conn.capabilities.dialect == "mysql" else f'"{c}"' for c in self.columns)
+        kind = "UNIQUE INDEX" if self.unique else "INDEX"
+        if conn.capabilities.dialect == "mysql":
+            # InnoDB online DDL: tablo kilitlenmeden oluşturulur
+            await conn.execute_script(
+                f"ALTER TABLE `{self.table}` ADD {kind} `{self.name}` ({columns}), ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            await conn.execute_script(f'CREATE {kind} "{self.name}" ON "{self.table}" ({columns})')
+
+
+class AddFulltextIndex(AddIndex):
+    """MySQL FULLTEXT index. SQLite'ta karşılığı yok; orada uygulanmış sayılır."""
+
+    async def is_applied(self, conn) -> bool:
+        if conn.capabilities.dialect != "mysql":
+            return True
+        return await super().is_applied(conn)
+
+    async def apply(self, conn):
+        columns = ", ".join(f"`{c}`" for c in self.columns)
+        # FULLTEXT için LOCK=NONE desteklenmez; yazmalar index oluşurken kısa süre bekler
+        await conn.execute_script(f"ALTER TABLE `{self.table}` ADD FULLTEXT INDEX `{self.name}` ({columns})")
+
+
+class AddColumn:
+    """
+    Kolon ekler; backfill verilirse kolon eklendikten sonra mevcut satırları doldurur.
+    Backfill'ler idempotent olmalıdır: tamamlandığı ayrıca işaretlenir, başarısız olursa
+    kolon var olsa bile sonraki açılışta tekrar çalışır.
+    """
+
+    def __init__(self, table: str, column: str, definition: str, backfill: Callable[[], Awaitable] = None):
+        self.table = table
+        self.column = column
+        self.definition = definition
+        self.backfill = backfill
+
+    def __str__(self):
+        return f"column {self.table}.{self.column}"
+
+    @property
+    def marker(self) -> str:
+        return f"backfill:{self.table}.{self.column}"
+
+    async def is_applied(self, conn) -> bool:
+        if not await self._has_column(conn):
+            return False
+        return not self.backfill or await _is_marked(conn, self.marker)
+
+    async def _has_column(self, conn) -> bool:
+        if conn.capabilities.dialect == "mysql":
+            rows = await conn.execute_query_dict(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1",
+                [self.table, self.column]
+            )
+            return bool(rows)
+        rows = await conn.execute_query_dict(f'PRAGMA table_info("{self.table}")')
+        return any(row["name"] == self.column for row in rows)
+
+    async def apply(self, conn):
+        if not await self._has_column(conn):
+            try:
+                if conn.capabilities.dialect == "mysql":
+                    await conn.execute_script(f"ALTER TABLE `{self.table}` ADD COLUMN `{self.column}` {self.definition}")
+                else:
+                    await conn.execute_script(f'ALTER TABLE "{self.table}" ADD COLUMN "{self.column}" {self.definition}')
+            except Exception:
+                # Başka bir worker aynı anda eklemiş olabilir; backfill yine de çalışmalı
+                if not await self._has_column(conn):
+                    raise
+        if self.backfill:
+            await self.backfill()
+            await _mark(conn, self.marker)
+
+
+MIGRATIONS = [
+    AddIndex("notifications", "idx_notif_user_read_created", ("user_id", "is_read", "created_at")),
+    AddColumn("events", "search_document", "LONGTEXT NULL", backfill=backfill_search_documents),
+    AddFulltextIndex("events", "ft_events_search_document", ("search_document",)),
+    AddColumn("events", "participant_count", "INT NOT NULL DEFAULT 0", backfill=backfill_participant_counts),
+    AddColumn("clubs", "follower_count", "INT NOT NULL DEFAULT 0", backfill=backfill_follower_counts),
+    AddColumn("events", "reminder_sent_at", "DATETIME(6) NULL"),
+    AddIndex("events", "idx_events_event_date", ("event_date",)),
+    AddColumn("events", "recurrence", "JSON NULL"),
+    AddColumn("events", "recurrence_until", "DATETIME(6) NULL"),
+    AddColumn("events", "series_id", "INT NULL"),
+    AddIndex("events", "uid_events_series_date", ("series_id", "event_date"), unique=True),
+    AddColumn("users", "calendar_token_version", "INT NOT NULL DEFAULT 0"),
+]
+
+
+async def run_migrations(connection_name: str = "default", migrations: Sequence = None) -> int:
+    """Eksik yamaları uygular, uygulanan yama sayısını döner."""
+    conn = Tortoise.get_connection(connection_name)
+    await _ensure_marker_table(conn)
+    applied = 0
+    for migration in MIGRATIONS if migrations is None else migrations:
+        if await migration.is_applied(conn):
+            continue
+        try:
+            await migration.apply(conn)
+            applied += 1
+            logger.info(f"Migration applied: {migration}")
+        except Exception as e:
+            # Birden fazla worker aynı anda başlarsa biri uygulamış olabilir
+            if not await migration.is_applied(conn):
+                logger.error(f"Migration failed: {migration}: {str(e)}")
+                raise
+    return applied
+
+
+async def main():
+    from src.database import init_db, close_db
+    await init_db()
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
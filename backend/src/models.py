@@ -1,5 +1,24 @@
 from tortoise import fields, models
+from tortoise.indexes import Index
 from enum import Enum
+from src.search import build_search_document
+
+class ManagedFieldsMixin:
+    """
+    Denormalize sayaçlar ve job'ların işaret kolonları sadece hedefli update() ile yazılır.
+    Var olan bir kaydın tam save()'i (ör. etkinlik düzenleme) bellekteki eski değeri geri
+    yazıp eşzamanlı katılımları/işaretleri ezmesin diye bu alanlar güncellemeden çıkarılır.
+    """
+
+    MANAGED_FIELDS = ()
+
+    async def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None and self._saved_in_db:
+            update_fields = [
+                name for name in self._meta.fields_db_projection
+                if name not in self.MANAGED_FIELDS and name != self._meta.pk_attr
+            ]
+        await super().save(*args, update_fields=update_fields, **kwargs)
 
 class UserRole(str, Enum):
     STUDENT = "student"
@@ -36,11 +55,13 @@ class Users(BaseModel):
     interests = fields.TextField(null=True)
     
     role = fields.CharEnumField(UserRole, default=UserRole.STUDENT)
+    # Takvim aboneliği token'ının sürümü; artırılınca eski abonelik adresleri geçersizleşir
+    calendar_token_version = fields.IntField(default=0)
 
     class Meta:
         table = "users"
 
-class Clubs(BaseModel):
+class Clubs(ManagedFieldsMixin, BaseModel):
     club_id = fields.IntField(pk=True)
     club_name = fields.CharField(max_length=150, unique=True)
     description = fields.TextField(null=True)
@@ -50,6 +71,10 @@ class Clubs(BaseModel):
     # Kulüp Başkanı ve Oluşturan Kişi
     president = fields.ForeignKeyField('models.Users', related_name='led_clubs', on_delete=fields.SET_NULL, null=True)
     created_by = fields.ForeignKeyField('models.Users', related_name='created_clubs', on_delete=fields.SET_NULL, null=True)
+    # Denormalize sayaç: follow/leave ile aynı transaction'da güncellenir (src/reconcile.py ile eşitlenir)
+    follower_count = fields.IntField(default=0)
+
+    MANAGED_FIELDS = ("follower_count",)
 
     class Meta:
         table = "clubs"
@@ -63,7 +88,7 @@ class ClubFollowers(BaseModel):
         table = "club_followers"
         unique_together = ("user", "club")
 
-class Events(BaseModel):
+class Events(ManagedFieldsMixin, BaseModel):
     event_id = fields.IntField(pk=True)
     club = fields.ForeignKeyField('models.Clubs', related_name='events')
     title = fields.CharField(max_length=150)
@@ -73,11 +98,33 @@ class Events(BaseModel):
     end_time = fields.DatetimeField(null=True)
     location = fields.CharField(max_length=255, null=True)
     quota = fields.IntField(default=0)
+    # Denormalize sayaç: GOING katılımcılar, join/leave ile aynı transaction'da güncellenir
+    participant_count = fields.IntField(default=0)
     
     created_by = fields.ForeignKeyField('models.Users', related_name='created_events', on_delete=fields.SET_NULL, null=True)
+    # Katlanmış başlık + açıklama; MySQL'de FULLTEXT index bu kolondadır (src/search.py)
+    search_document = fields.TextField(null=True)
+    # Hatırlatma bildirimi gönderilince reminder scheduler tarafından işaretlenir (src/services/reminder_service.py)
+    reminder_sent_at = fields.DatetimeField(null=True)
+    # Tekrarlayan seri: normalize kural (src/recurrence.py) ve son tekrarın zamanı (sonsuz seride NULL)
+    recurrence = fields.JSONField(null=True)
+    recurrence_until = fields.DatetimeField(null=True)
+    # Katılım alan tek bir tekrarın somutlaştırılmış satırı; (series_id, event_date) benzersiz
+    # index'i src/migrations.py oluşturur
+    series = fields.ForeignKeyField('models.Events', related_name='occurrences', null=True)
 
     class Meta:
         table = "events"
+        # Reminder scheduler'ın zaman penceresi taraması; src/migrations.py ile de oluşturulur
+        indexes = [Index(fields=("event_date",), name="idx_events_event_date")]
+
+    async def save(self, *args, update_fields=None, **kwargs):
+        self.search_document = build_search_document(self.title, self.description)
+        if update_fields is not None and ({"title", "description"} & set(update_fields)):
+            update_fields = [*update_fields, "search_document"]
+        await super().save(*args, update_fields=update_fields, **kwargs)
+
+    MANAGED_FIELDS = ("participant_count", "reminder_sent_at")
 
 class EventParticipation(BaseModel):
     participation_id = fields.IntField(pk=True)
@@ -108,4 +155,37 @@ class Notifications(BaseModel):
 
     class Meta:
         table = "notifications"
+        # Feed ve okunmamış sorguları: user_id filtresi + is_read + created_at sıralaması
+        # Var olan veritabanlarında src/migrations.py ile oluşturulur
+        indexes = [Index(fields=("user_id", "is_read", "created_at"), name="idx_notif_user_read_created")]
+
+class NotificationArchive(models.Model):
+    """Saklama süresi dolan okunmuş bildirimlerin arşivi (retention job yazar)."""
+    notification_id = fields.IntField(pk=True, generated=False)
+    user_id = fields.BigIntField()
+    club_id = fields.IntField(null=True)
+    event_id = fields.IntField(null=True)
+    message = fields.CharField(max_length=255)
+    created_at = fields.DatetimeField()
+    archived_at = fields.DatetimeField(auto_now_add=True)
 
+    class Meta:
+        table = "notifications_archive"
+
+class Broadcasts(BaseModel):
+    """Tüm kullanıcılara giden duyurular: tek satır yazılır, okuma anında feed'e eklenir."""
+    broadcast_id = fields.IntField(pk=True)
+    message = fields.TextField()
+    created_by = fields.ForeignKeyField('models.Users', related_name='broadcasts', on_delete=fields.SET_NULL, null=True)
+
+    class Meta:
+        table = "broadcasts"
+
+class BroadcastReadCursors(BaseModel):
+    """Kullanıcı başına okuma imleci: broadcast_id <= last_read_broadcast_id olanlar okunmuştur."""
+    id = fields.IntField(pk=True)
+    user = fields.OneToOneField('models.Users', related_name='broadcast_cursor')
+    last_read_broadcast_id = fields.IntField(default=0)
+
+    class Meta:
+        table = "broadcast_read_cursors"
@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from tortoise.expressions import Q, RawSQL
+
+
+class InvalidCursor(ValueError):
+    """İstemciden gelen cursor çözülemediğinde fırlatılır (400 dönülmeli)."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """Sıralama anahtarını opak, URL-güvenli bir cursor string'ine çevirir."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *types: type) -> Optional[List[Any]]:
+    """
+    encode_cursor çıktısını çözer; types verilirse her değer o tipe çevrilir
+    (datetime için isoformat parse edilir). Boş cursor için None döner.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or (types and len(values) != len(types)):
+            raise InvalidCursor("Invalid cursor")
+        return [
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        ] if types else values
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def parse_limit(value, default: int = 20, maximum: int = 100) -> int:
+    """Sorgu parametresindeki limit değerini [1, maximum] aralığına sıkıştırır."""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def cursor_arg(request) -> Optional[str]:
+    """
+    ?cursor parametresini okur. Parametre hiç yoksa None (eski page/offset modu),
+    boş verilmişse ("?cursor=") ilk sayfa için "" döner.
+    """
+    values = request.get_args(keep_blank_values=True).get("cursor")
+    return values[0] if values else None
+
+
+def wants_total(request) -> bool:
+    """Cursor modunda toplam sayı istenirse (?total=true); varsayılan olarak hesaplanmaz."""
+    return request.args.get("total", "").lower() in ("1", "true", "yes")
+
+
+def keyset_filter(order: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    order (ör. ["-created_at", "-user_id"]) sıralamasında values'tan SONRA gelen kayıtlar:
+    (a > x) OR (a = x AND b > y) ... Son alan benzersiz olmalıdır (genelde pk).
+    """
+    condition = None
+    for i, field in enumerate(order):
+        name = field.lstrip("-")
+        lookup = f"{name}__lt" if field.startswith("-") else f"{name}__gt"
+        step = Q(**{f.lstrip("-"): v for f, v in zip(order[:i], values[:i])}, **{lookup: values[i]})
+        condition = step if condition is None else condition | step
+    return condition
+
+
+async def paginate_by_cursor(query, order: Sequence[Tuple[str, type]], cursor: Optional[str],
+                             limit: int) -> Tuple[list, Dict[str, Any]]:
+    """
+    Keyset sayfalama: derin sayfalarda da OFFSET taraması yapmadan sıradaki limit kaydı getirir.
+    order: (alan, tip) çiftleri, ör. [("event_date", datetime), ("event_id", int)].
+    Geçersiz cursor'da InvalidCursor fırlatır.
+    """
+    fields = [field for field, _ in order]
+    position = decode_cursor(cursor, *(t for _, t in order))
+    if position:
+        query = query.filter(keyset_filter(fields, position))
+    rows = await query.order_by(*fields).limit(limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(*(getattr(rows[-1], f.lstrip("-")) for f in fields)) if has_more else None
+    return rows, {"limit": limit, "has_more": has_more, "next_cursor": next_cursor}
+
+
+async def paginate_by_offset(query, order: Sequence[str], page: int, limit: int) -> Tuple[list, int]:
+    """
+    Eski page/limit sözleşmesi; toplam, ayrı bir COUNT(*) yerine aynı sorguda
+    COUNT(*) OVER() penceresiyle alınır (MySQL 8+ / SQLite 3.25+). Sayfa boşsa
+    (son sayfanın ötesi) toplam için COUNT'a düşülür.
+    """
+    rows = await query.annotate(_total=RawSQL("COUNT(*) OVER()")) \
+        .order_by(*order).offset((page - 1) * limit).limit(limit)
+    total = rows[0]._total if rows else await query.count()
+    return rows, total
+
+
+class InvalidIds(ValueError):
+    """?ids parametresi çözülemediğinde veya üst sınırı aştığında fırlatılır (400 dönülmeli)."""
+
+
+def ids_arg(request, maximum: int = 100) -> Optional[List[int]]:
+    """
+    ?ids=1,2,3 parametresini tekrarsız (ilk görülme sırası korunur) id listesine çevirir.
+    Parametre yoksa None döner; sayı olmayan değerde veya maximum aşılırsa InvalidIds.
+    """
+    values = request.get_args(keep_blank_values=True).get("ids")
+    if values is None:
+        return None
+    try:
+        ids = [int(part) for value in values for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise InvalidIds("ids must be a comma separated list of integers")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise InvalidIds("ids must not be empty")
+    if len(ids) > maximum:
+        raise InvalidIds(f"At most {maximum} ids can be requested at once")
+    return ids
+
+
+def ordered_batch(ids: Sequence[int], found: Dict[int, Any]) -> Dict[str, list]:
+    """Toplu getirme cevabı: istek sırasındaki kayıtlar + bulunamayan id'ler."""
+    return {
+        "items": [found[i] for i in ids if i in found],
+        "missing": [i for i in ids if i not in found],
+    }
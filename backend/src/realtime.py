@@ -0,0 +1,262 @@
+import asyncio
+import json
+from typing import Dict, Set, Optional, Iterable, Any
+from sanic.response import json as json_response
+from src.config import (
+    logger, REALTIME_MAX_CONNECTIONS, REALTIME_QUEUE_SIZE, REALTIME_HEARTBEAT_INTERVAL, REALTIME_RETRY_AFTER
+)
+
+
+class HubFull(Exception):
+    """Worker veya kanal bağlantı limiti dolduğunda fırlatılır (503 dönülmeli)."""
+
+
+class HubUnavailable(HubFull):
+    """Redis pub/sub'a ulaşılamadığında fırlatılır; geçicidir, istemci yeniden denemeli."""
+
+
+def unavailable(error: HubFull):
+    """Stream rotaları için 503: Retry-After ile istemcinin ne zaman yeniden bağlanacağı bildirilir."""
+    return json_response(
+        {"error": str(error), "retry": REALTIME_RETRY_AFTER * 1000}, 503,
+        headers={"Retry-After": str(REALTIME_RETRY_AFTER)}
+    )
+
+
+class Subscription:
+    """Tek bir istemci bağlantısı: hazır SSE çerçevelerinden sınırlı boyutlu kuyruk + abone olunan kanallar."""
+
+    __slots__ = ("channels", "queue", "closed", "close_reason", "dropped")
+
+    def __init__(self, channels: Iterable[str], queue_size: int):
+        self.channels = tuple(channels)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self.dropped = 0
+
+    def push(self, message: Dict[str, Any]) -> bool:
+        """
+        Mesajı kuyruğa koyar. Kuyruk doluysa istemci yavaş demektir: beklemek diğer
+        abonelere de gecikme yansıtacağından bağlantı "slow_consumer" ile kapatılır,
+        istemci yeniden bağlanıp son durumu REST üzerinden çeker.
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self.close("slow_consumer")
+            return False
+
+    def close(self, reason: str):
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = reason
+        # Bekleyen okuyucuyu uyandırmak için yer aç ve sentinel bırak
+        while True:
+            try:
+                self.queue.put_nowait(None)
+                break
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+
+
+class RealtimeHub:
+    """
+    Worker başına tek bir Redis pub/sub bağlantısı üzerinden yerel SSE abonelerine dağıtım.
+    Bir kanala ilk yerel abone geldiğinde SUBSCRIBE, son abone gidince UNSUBSCRIBE yapılır;
+    böylece her worker sadece kendi istemcilerinin kanallarını dinler ve mesajlar
+    tüm worker'lara/node'lara Redis üzerinden ulaşır.
+    """
+
+    def __init__(self, max_connections: int = 1000, queue_size: int = 100, heartbeat_interval: float = 15):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+
+        self.redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._connections = 0
+        self._running = False
+
+        # Metrikler
+        self.delivered = 0
+        self.rejected = 0
+        self.slow_consumers = 0
+
+    async def start(self, redis):
+        self.redis = redis
+        self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        self._lock = asyncio.Lock()
+        self._running = True
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        # redis-py okuma zaman aşımı iptali yutabildiği için döngü bayrakla da durdurulur
+        self._running = False
+        for subscribers in list(self._channels.values()):
+            for sub in list(subscribers):
+                sub.close("shutdown")
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        if self._pubsub:
+            await self._pubsub.aclose()
+
+    @staticmethod
+    async def publish(redis, channel: str, event: str, data: Dict[str, Any]):
+        """Mesajı tüm worker'lara yayınlar. Hata bildirimi/yorumu engellememeli, sadece loglanır."""
+        if not redis:
+            return
+        try:
+            await redis.publish(channel, json.dumps({"event": event, "data": data}, default=str))
+        except Exception as e:
+            logger.error(f"Realtime publish failed on {channel}: {str(e)}")
+
+    @staticmethod
+    async def publish_many(redis, messages: Iterable[tuple]):
+        """(channel, event, data) üçlülerini tek pipeline ile yayınlar (toplu fan-out için)."""
+        if not redis:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for channel, event, data in messages:
+                pipe.publish(channel, json.dumps({"event": event, "data": data}, default=str))
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Realtime bulk publish failed: {str(e)}")
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
+
+    async def subscribe(self, channels: Iterable[str], limits: Optional[Dict[str, int]] = None) -> Subscription:
+        """
+        Kanallara abone olur. limits ile kanal bazında en fazla yerel abone sayısı
+        verilebilir (ör. kullanıcı başına sekme sayısı, etkinlik başına izleyici).
+        """
+        if self._pubsub is None:
+            raise HubUnavailable("Realtime hub is not running")
+        channels = list(channels)
+        async with self._lock:
+            # Sınır kontrolü ve kayıt aynı kilit altında: eşzamanlı bağlantılar sınırı aşamaz
+            if self._connections >= self.max_connections:
+                self.rejected += 1
+                raise HubFull("Too many realtime connections on this worker")
+            if limits and any(self.subscriber_count(c) >= cap for c, cap in limits.items()):
+                self.rejected += 1
+                raise HubFull("Too many subscribers for this channel")
+
+            sub = Subscription(channels, self.queue_size)
+            new_channels = [channel for channel in channels if channel not in self._channels]
+            if new_channels:
+                # Redis aboneliği başarısız olursa hiçbir şey kaydedilmemiş olur (sızıntı yok)
+                try:
+                    await self._pubsub.subscribe(*new_channels)
+                except Exception as e:
+                    logger.error(f"Realtime subscribe failed: {str(e)}")
+                    raise HubUnavailable("Realtime service is temporarily unavailable") from e
+            for channel in channels:
+                self._channels.setdefault(channel, set()).add(sub)
+            self._connections += 1
+        return sub
+
+    async def unsubscribe(self, sub: Subscription):
+        sub.close(sub.close_reason or "disconnected")
+        self._connections -= 1
+        async with self._lock:
+            empty = []
+            for channel in sub.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self._channels[channel]
+                    empty.append(channel)
+            if empty:
+                try:
+                    await self._pubsub.unsubscribe(*empty)
+                except Exception as e:
+                    logger.error(f"Realtime unsubscribe failed: {str(e)}")
+
+    async def _listen(self):
+        while self._running:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.2)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if not message or message.get("type") != "message":
+                    continue
+                subscribers = list(self._channels.get(message["channel"], ()))
+                if not subscribers:
+                    continue
+                # SSE çerçevesi mesaj başına bir kez üretilir; kalabalık kanallarda (ör. canlı
+                # yorumları izleyen yüzlerce istemci) abone başına JSON serileştirmesi yapılmaz
+                payload = json.loads(message["data"])
+                frame = self.frame(payload["event"], payload["data"])
+                for sub in subscribers:
+                    was_closed = sub.closed
+                    if sub.push(frame):
+                        self.delivered += 1
+                    elif not was_closed and sub.close_reason == "slow_consumer":
+                        self.slow_consumers += 1
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Realtime listener error: {str(e)}")
+                await asyncio.sleep(1)
+
+    @staticmethod
+    def frame(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def stream(self, request, sub: Subscription):
+        """Aboneliği Server-Sent Events olarak istemciye akıtır (heartbeat dahil)."""
+        response = await request.respond(
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        try:
+            await response.send(f"retry: {REALTIME_RETRY_AFTER * 1000}\nevent: ready\ndata: {{}}\n\n")
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), timeout=self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    # Proxy'lerin bağlantıyı kapatmaması ve ölü bağlantıların fark edilmesi için
+                    await response.send(": ping\n\n")
+                    continue
+                if message is None:
+                    await response.send(self.frame("close", {"reason": sub.close_reason}))
+                    break
+                await response.send(message)
+        finally:
+            await self.unsubscribe(sub)
+            try:
+                await response.eof()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self._connections,
+            "max_connections": self.max_connections,
+            "channels": len(self._channels),
+            "delivered": self.delivered,
+            "rejected": self.rejected,
+            "slow_consumers": self.slow_consumers,
+        }
+
+
+realtime_hub = RealtimeHub(
+    max_connections=REALTIME_MAX_CONNECTIONS,
+    queue_size=REALTIME_QUEUE_SIZE,
+    heartbeat_interval=REALTIME_HEARTBEAT_INTERVAL,
+)
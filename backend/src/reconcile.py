@@ -0,0 +1,111 @@
+"""
+Denormalize sayaçların (events.participant_count, clubs.follower_count) toplu uzlaştırma job'ı.
+
+Sayaçlar katılım/takip yazma yollarında aynı transaction içinde F() ile artırılıp azaltılır;
+elle yapılan veritabanı müdahaleleri veya eski sürümden kalan veriler sapmaya yol açabilir.
+Bu job sayaçları kaynak tablolardan (event_participants / club_followers) yeniden hesaplar.
+
+Her parti birincil anahtar aralığıyla (keyset) tek bir UPDATE ... SET = (SELECT COUNT(*) ...)
+olarak çalışır ve sadece değeri farklı olan satırları yazar. Redis erişilebilirse koltuk
+rezervasyon kümeleri de (events:seats:*) veritabanıyla eşitlenir.
+
+Çalıştırma (cron / tek seferlik, ayrıca kolon ilk eklendiğinde migration tarafından):
+    python -m src.reconcile --batch 5000 [--skip-redis]
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, Iterable
+from tortoise import Tortoise
+from src.config import logger, REDIS_URL
+
+# (tablo, pk, sayaç kolonu, kaynak tablo, kaynak fk, ek koşul)
+COUNTERS = (
+    ("events", "event_id", "participant_count", "event_participants", "event_id", "AND src.status = 'going'"),
+    ("clubs", "club_id", "follower_count", "club_followers", "club_id", ""),
+)
+
+
+async def _reconcile_counter(conn, table, pk, column, source, fk, condition, batch_size: int) -> int:
+    placeholder = "%s" if conn.capabilities.dialect == "mysql" else "?"
+    actual = f"(SELECT COUNT(*) FROM {source} src WHERE src.{fk} = {table}.{pk} {condition})"
+    sql = (
+        f"UPDATE {table} SET {column} = {actual} "
+        f"WHERE {pk} >= {placeholder} AND {pk} < {placeholder} AND {column} <> {actual}"
+    )
+    bounds = await conn.execute_query_dict(f"SELECT MIN({pk}) AS low, MAX({pk}) AS high FROM {table}")
+    low, high = bounds[0]["low"], bounds[0]["high"]
+    if low is None:
+        return 0
+
+    corrected = 0
+    for start in range(low, high + 1, batch_size):
+        affected, _ = await conn.execute_query(sql, [start, start + batch_size])
+        corrected += affected
+    return corrected
+
+
+async def reconcile_counters(batch_size: int = 5000, redis=None, tables: Iterable[str] = None) -> Dict[str, Any]:
+    """Sayaçları yeniden hesaplar; {tablo.kolon: düzeltilen satır sayısı} içeren bir rapor döner."""
+    started = time.perf_counter()
+    conn = Tortoise.get_connection("default")
+    report: Dict[str, Any] = {}
+    for table, pk, column, source, fk, condition in COUNTERS:
+        if tables is not None and table not in tables:
+            continue
+        report[f"{table}.{column}"] = await _reconcile_counter(
+            conn, table, pk, column, source, fk, condition, batch_size
+        )
+
+    if redis:
+        from src.services.reservation_service import SeatReservations
+        try:
+            report["seat_sets_reloaded"] = len(await SeatReservations.reconcile(redis))
+        except Exception as e:
+            logger.error(f"Seat set reconciliation failed: {str(e)}")
+
+    report["duration_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Counter reconciliation: {report}")
+    return report
+
+
+async def backfill_participant_counts():
+    """Migration backfill'i: events.participant_count kolonu yeni eklendiğinde."""
+    await reconcile_counters(tables=("events",))
+
+
+async def backfill_follower_counts():
+    """Migration backfill'i: clubs.follower_count kolonu yeni eklendiğinde."""
+    await reconcile_counters(tables=("clubs",))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Katılımcı/takipçi sayaçlarını yeniden hesaplar")
+    parser.add_argument("--batch", type=int, default=5000, help="parti başına birincil anahtar aralığı")
+    parser.add_argument("--skip-redis", action="store_true", help="koltuk kümelerini uzlaştırma")
+    args = parser.parse_args()
+
+    from src.database import init_db, close_db
+    await init_db()
+    redis = None
+    if not args.skip_redis:
+        from redis import asyncio as aioredis
+        redis = aioredis.from_url(REDIS_URL, decode_responses=True)
+        try:
+            await redis.ping()
+        except Exception as e:
+            logger.warning(f"Redis unreachable, skipping seat sets: {str(e)}")
+            await redis.aclose()
+            redis = None
+    try:
+        report = await reconcile_counters(batch_size=args.batch, redis=redis)
+        print(f"🔢 {report['events.participant_count']} etkinlik, {report['clubs.follower_count']} kulüp "
+              f"sayacı düzeltildi ({report['duration_seconds']} sn)")
+    finally:
+        if redis:
+            await redis.aclose()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
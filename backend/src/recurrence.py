@@ -0,0 +1,148 @@
+"""
+Tekrarlayan etkinlik kuralları (RRULE'un küçük bir alt kümesi).
+
+Seri tek bir Events satırıdır: event_date ilk tekrarın zamanı, recurrence normalize edilmiş
+kuraldır. Tekrarlar saklanmaz; istenen tarih penceresi için burada hesaplanır. Sadece
+katılım alan tekrarlar ayrı satır olarak somutlaştırılır (EventService._materialize_occurrence).
+
+Kabul edilen biçimler:
+    "FREQ=WEEKLY;INTERVAL=2;UNTIL=20300601T000000Z"
+    {"freq": "weekly", "interval": 2, "until": "2030-06-01", "count": 10, "exdates": ["2030-01-15"]}
+exdates (istisnalar) gün olarak eşleşir; o günkü tekrar atlanır.
+"""
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+FREQUENCIES = {"DAILY": timedelta(days=1), "WEEKLY": timedelta(weeks=1)}
+MAX_INTERVAL = 52
+MAX_COUNT = 1000
+MAX_EXDATES = 366
+_RRULE_DATE = re.compile(r"(\d{8})(?:T(\d{6})(Z)?)?")
+
+
+class InvalidRecurrence(ValueError):
+    """Kural çözülemediğinde fırlatılır (400 dönülmeli)."""
+
+
+def _parse_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    try:
+        match = _RRULE_DATE.fullmatch(text)
+        if match:  # RRULE biçimi: 20300601 / 20300601T100000 / 20300601T100000Z
+            parsed = datetime.strptime(match.group(1) + (match.group(2) or "000000"), "%Y%m%d%H%M%S")
+            return parsed.replace(tzinfo=timezone.utc) if match.group(3) else parsed
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise InvalidRecurrence(f"Invalid date in recurrence: {value}")
+
+
+def _align(value: datetime, like: datetime) -> datetime:
+    """value'yu like ile aynı saat dilimi biçimine getirir (naive değerler UTC kabul edilir)."""
+    if like.tzinfo is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    if like.tzinfo is None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_rule(value: Any) -> Optional[Dict[str, Any]]:
+    """Kuralı doğrulayıp normalize eder; boş değer için None (tekrarsız etkinlik) döner."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        parts = {}
+        for part in value.upper().removeprefix("RRULE:").split(";"):
+            if part.strip():
+                key, _, val = part.partition("=")
+                parts[key.strip().lower()] = val.strip()
+        value = parts
+    if not isinstance(value, dict):
+        raise InvalidRecurrence("Recurrence must be an RRULE string or an object")
+
+    freq = str(value.get("freq", "")).upper()
+    if freq not in FREQUENCIES:
+        raise InvalidRecurrence(f"Unsupported frequency, use one of: {', '.join(FREQUENCIES)}")
+    try:
+        interval = int(value.get("interval") or 1)
+        count = int(value["count"]) if value.get("count") else None
+    except (TypeError, ValueError):
+        raise InvalidRecurrence("interval and count must be integers")
+    if not 1 <= interval <= MAX_INTERVAL or (count is not None and not 1 <= count <= MAX_COUNT):
+        raise InvalidRecurrence("interval or count out of range")
+
+    until = _parse_datetime(value["until"]) if value.get("until") else None
+    exdates = value.get("exdates") or []
+    if isinstance(exdates, str):
+        exdates = exdates.split(",")
+    if len(exdates) > MAX_EXDATES:
+        raise InvalidRecurrence("Too many exception dates")
+    return {
+        "freq": freq,
+        "interval": interval,
+        "until": until.isoformat() if until else None,
+        "count": count,
+        "exdates": sorted({_parse_datetime(d).date().isoformat() for d in exdates}),
+    }
+
+
+def _step(rule: Dict[str, Any]) -> timedelta:
+    return FREQUENCIES[rule["freq"]] * rule["interval"]
+
+
+def series_end(start: datetime, rule: Dict[str, Any]) -> Optional[datetime]:
+    """Serinin son tekrarının en geç zamanı (pencere sorguları için); sonsuz seride None."""
+    ends = []
+    if rule.get("until"):
+        ends.append(_align(_parse_datetime(rule["until"]), start))
+    if rule.get("count"):
+        ends.append(start + _step(rule) * (rule["count"] - 1))
+    return min(ends) if ends else None
+
+
+def occurrences(start: datetime, rule: Dict[str, Any], window_start: datetime, window_end: datetime) -> List[datetime]:
+    """[window_start, window_end) aralığındaki tekrarlar; maliyet serinin değil pencerenin uzunluğuyla orantılı."""
+    step = _step(rule)
+    window_start, window_end = _align(window_start, start), _align(window_end, start)
+    last = series_end(start, rule)
+    exdates = set(rule.get("exdates") or ())
+
+    index = max(0, -(-(window_start - start) // step))  # ceil
+    result = []
+    while True:
+        current = start + step * index
+        if current >= window_end or (last is not None and current > last):
+            break
+        if current.date().isoformat() not in exdates:
+            result.append(current)
+        index += 1
+    return result
+
+
+def next_occurrence(start: datetime, rule: Dict[str, Any], after: datetime) -> Optional[datetime]:
+    """after anından itibaren ilk tekrar; seri bittiyse None. İstisnalar sınırlı olduğundan tarama da sınırlıdır."""
+    window = _step(rule) * 8
+    cursor = max(_align(after, start), start)
+    last = series_end(start, rule)
+    for _ in range(MAX_EXDATES // 8 + 2):
+        if last is not None and cursor > last:
+            return None
+        found = occurrences(start, rule, cursor, cursor + window)
+        if found:
+            return found[0]
+        cursor += window
+    return None
+
+
+def is_occurrence(start: datetime, rule: Dict[str, Any], when: datetime) -> bool:
+    when = _align(when, start)
+    return when in occurrences(start, rule, when, when + timedelta(seconds=1))
+
+
+def parse_occurrence(value: Any, start: datetime) -> datetime:
+    """İstemciden gelen tekrar zamanını serinin saat dilimi biçimine çevirir."""
+    return _align(_parse_datetime(value), start)
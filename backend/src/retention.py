@@ -0,0 +1,110 @@
+"""
+Bildirim saklama (retention) job'ı: süresi dolan OKUNMUŞ bildirimleri küçük partiler
+halinde siler (istenirse önce notifications_archive tablosuna taşır).
+
+Her parti notification_id sırasıyla (keyset) seçilir ve id listesiyle silinir; böylece
+uzun süren tek bir DELETE ile tablo/replica kilitlenmez. Partiler arasında en az partinin
+sürdüğü kadar beklenir (replication lag'e zaman tanımak için).
+
+Çalıştırma (cron / tek seferlik):
+    python -m src.retention --days 90 --batch 1000 [--archive] [--dry-run]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from tortoise.transactions import in_transaction
+from src.config import (
+    logger, NOTIFICATION_RETENTION_DAYS, NOTIFICATION_RETENTION_BATCH, NOTIFICATION_RETENTION_ARCHIVE
+)
+from src.models import Notifications, NotificationArchive
+
+
+async def purge_read_notifications(
+    days: int = NOTIFICATION_RETENTION_DAYS,
+    batch_size: int = NOTIFICATION_RETENTION_BATCH,
+    archive: bool = NOTIFICATION_RETENTION_ARCHIVE,
+    throttle: float = 1.0,
+    min_pause: float = 0.05,
+    max_batches: int = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    days günden eski okunmuş bildirimleri partiler halinde temizler ve özet döner.
+    throttle: parti süresinin katı kadar bekleme (0 = beklemeden çalış).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    started = time.perf_counter()
+    purged = archived = batches = 0
+    last_id = 0
+
+    while max_batches is None or batches < max_batches:
+        batch_started = time.perf_counter()
+        rows = await Notifications.filter(
+            is_read=True, created_at__lt=cutoff, notification_id__gt=last_id
+        ).order_by("notification_id").limit(batch_size).values(
+            "notification_id", "user_id", "club_id", "event_id", "message", "created_at"
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["notification_id"]
+        ids = [r["notification_id"] for r in rows]
+        batches += 1
+
+        if dry_run:
+            purged += len(ids)
+            continue
+
+        async with in_transaction():
+            if archive:
+                # Önceki yarım kalmış bir çalışma aynı satırları arşivlemiş olabilir
+                existing = set(await NotificationArchive.filter(notification_id__in=ids)
+                               .values_list("notification_id", flat=True))
+                await NotificationArchive.bulk_create([
+                    NotificationArchive(**r) for r in rows if r["notification_id"] not in existing
+                ])
+                archived += len(rows) - len(existing)
+            # Seçimden sonra okunmamışa dönen olmaz ama koşul yine de tekrarlanır
+            purged += await Notifications.filter(notification_id__in=ids, is_read=True).delete()
+
+        elapsed = time.perf_counter() - batch_started
+        if throttle > 0 and len(rows) == batch_size:
+            await asyncio.sleep(max(min_pause, elapsed * throttle))
+
+    report = {
+        "cutoff": cutoff.isoformat(),
+        "purged": purged,
+        "archived": archived,
+        "batches": batches,
+        "dry_run": dry_run,
+        "duration_seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Notification retention: {report}")
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Eski okunmuş bildirimleri temizler")
+    parser.add_argument("--days", type=int, default=NOTIFICATION_RETENTION_DAYS)
+    parser.add_argument("--batch", type=int, default=NOTIFICATION_RETENTION_BATCH)
+    parser.add_argument("--archive", action="store_true", default=NOTIFICATION_RETENTION_ARCHIVE)
+    parser.add_argument("--throttle", type=float, default=1.0, help="parti süresinin katı kadar bekleme")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    from src.database import init_db, close_db
+    await init_db()
+    try:
+        report = await purge_read_notifications(
+            days=args.days, batch_size=args.batch, archive=args.archive,
+            throttle=args.throttle, dry_run=args.dry_run
+        )
+        print(f"🧹 {report['purged']} bildirim temizlendi ({report['archived']} arşivlendi, "
+              f"{report['batches']} parti, {report['duration_seconds']} sn)")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
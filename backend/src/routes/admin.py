@@ -2,6 +2,7 @@ from sanic import Blueprint
 from sanic.response import json
 from src.services.admin_service import AdminService
 from src.middleware import authorized, admin_only
+from src.pagination import cursor_arg, wants_total
 
 # Blueprint tanımı
 admin_bp = Blueprint("admin", url_prefix="/admin")
@@ -9,7 +10,7 @@ admin_bp = Blueprint("admin", url_prefix="/admin")
 # --- KULLANICI YÖNETİMİ ---
 
 @admin_bp.get("/users")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def list_users(request):
     """Sistemdeki tüm kullanıcıları sayfalama ve arama ile listeler."""
@@ -20,11 +21,13 @@ async def list_users(request):
     except ValueError:
         page, limit, search = 1, 20, None
 
-    result, status = await AdminService.get_all_users(page, limit, search)
+    result, status = await AdminService.get_all_users(
+        page, limit, search, cursor_arg(request), wants_total(request)
+    )
     return json(result, status=status)
 
 @admin_bp.get("/users/<user_id:int>")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def get_user_detail(request, user_id: int):
     """Adminin belirli bir kullanıcının profil detaylarını görmesini sağlar."""
@@ -32,15 +35,15 @@ async def get_user_detail(request, user_id: int):
     return json(result, status=status)
 
 @admin_bp.post("/users/<user_id:int>/ban")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def ban_user(request, user_id: int):
     """Kullanıcıyı engeller veya engelini kaldırır."""
-    result, status = await AdminService.toggle_user_ban(user_id)
+    result, status = await AdminService.toggle_user_ban(user_id, request.app.ctx.redis)
     return json(result, status=status)
 
 @admin_bp.put("/users/<user_id:int>/role")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def update_role(request, user_id: int):
     new_role = request.json.get("role")
@@ -56,15 +59,23 @@ async def update_role(request, user_id: int):
 # --- İSTATİSTİKLER VE DUYURULAR ---
 
 @admin_bp.get("/stats")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def get_stats(request):
     """Dashboard için genel sistem istatistiklerini döner."""
     result, status = await AdminService.get_dashboard_stats()
     return json(result, status=status)
 
+@admin_bp.get("/metrics")
+@authorized(use_cache=False)
+@admin_only()
+async def get_metrics(request):
+    """İsteği karşılayan worker'ın çalışma zamanı metriklerini döner."""
+    result, status = await AdminService.get_runtime_metrics()
+    return json(result, status=status)
+
 @admin_bp.post("/announce")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def make_announcement(request):
     """Tüm sisteme veya aktif kullanıcılara duyuru gönderir."""
@@ -72,33 +83,33 @@ async def make_announcement(request):
     if not message:
         return json({"error": "Announcement message cannot be empty"}, 400)
         
-    result, status = await AdminService.send_global_announcement(message)
+    result, status = await AdminService.send_global_announcement(message, request.ctx.user["sub"], request.app.ctx.redis)
     return json(result, status=status)
 
 # --- İÇERİK VE KULÜP DENETİMİ ---
 
 @admin_bp.delete("/comments/<comment_id:int>")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def delete_comment(request, comment_id: int):
     """Uygunsuz bir yorumu kalıcı olarak siler."""
-    result, status = await AdminService.delete_comment(comment_id)
+    result, status = await AdminService.delete_comment(comment_id, request.app.ctx.redis)
     return json(result, status=status)
 
 @admin_bp.put("/clubs/<club_id:int>")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def update_club(request, club_id: int):
     """Bir kulübün bilgilerini admin yetkisiyle günceller."""
     if not request.json:
         return json({"error": "Update data is required"}, 400)
         
-    result, status = await AdminService.update_club_details(club_id, request.json)
+    result, status = await AdminService.update_club_details(club_id, request.json, request.app.ctx.redis)
     return json(result, status=status)
 # src/routes/admin.py içine eklenecek
 @admin_bp.put("/users/<user_id:int>/profile")
-@authorized()
+@authorized(use_cache=False)
 @admin_only()
 async def admin_update_user_profile(request, user_id: int):
-    result, status = await AdminService.update_user_profile_as_admin(user_id, request.json)
+    result, status = await AdminService.update_user_profile_as_admin(user_id, request.json, request.app.ctx.redis)
     return json(result, status=status)
\ No newline at end of file
@@ -34,7 +34,7 @@ async def forgot_password(request):
     if not email:
         return json({"error": "E-posta adresi gerekli"}, status=400)
     
-    result, status = await AuthService.request_password_reset(email)
+    result, status = await AuthService.request_password_reset(email, request.app.ctx.redis)
     return json(result, status=status)
 
 @auth_bp.post("/reset-password")
@@ -48,5 +48,5 @@ async def reset_password(request):
     if not token or not new_password:
         return json({"error": "Token ve yeni şifre gerekli"}, status=400)
     
-    result, status = await AuthService.complete_password_reset(token, new_password)
+    result, status = await AuthService.complete_password_reset(token, new_password, request.app.ctx.redis)
     return json(result, status=status)
\ No newline at end of file
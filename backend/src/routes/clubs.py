@@ -2,6 +2,7 @@ from sanic import Blueprint
 from sanic.response import json
 from src.services.club_service import ClubService
 from src.middleware import authorized, inject_user
+from src.pagination import cursor_arg, wants_total, ids_arg, InvalidIds
 from src.models import UserRole, Clubs
 
 clubs_bp = Blueprint("clubs", url_prefix="/clubs")
@@ -10,6 +11,15 @@ clubs_bp = Blueprint("clubs", url_prefix="/clubs")
 @inject_user()
 async def list_clubs(request):
     """Tüm aktif kulüpleri sayfalama ile listeler."""
+    # ?ids=1,2,3 -> tek sorguda toplu getirme (istek sırası korunur, bulunamayanlar "missing")
+    try:
+        ids = ids_arg(request)
+    except InvalidIds as e:
+        return json({"error": str(e)}, status=400)
+    if ids is not None:
+        result, status = await ClubService.get_clubs_by_ids(ids)
+        return json(result, status=status)
+
     try:
         page = int(request.args.get("page", 1))
         limit = int(request.args.get("limit", 12)) 
@@ -21,7 +31,10 @@ async def list_clubs(request):
     if hasattr(request.ctx, "user") and request.ctx.user:
         user_id = request.ctx.user.get("sub")
         
-    result, status = await ClubService.get_all_clubs(user_id=user_id, redis=redis, page=page, limit=limit)
+    result, status = await ClubService.get_all_clubs(
+        user_id=user_id, redis=redis, page=page, limit=limit,
+        cursor=cursor_arg(request), with_total=wants_total(request)
+    )
     return json(result, status=status)
 
 @clubs_bp.get("/pending-requests")
@@ -60,7 +73,9 @@ async def get_club_posts(request, club_id: int):
     except ValueError:
         page, limit = 1, 5
         
-    result, status = await ClubService.get_club_events_paginated(club_id, page, limit)
+    result, status = await ClubService.get_club_events_paginated(
+        club_id, page, limit, cursor_arg(request), wants_total(request), request.app.ctx.redis
+    )
     return json(result, status=status)
 
 @clubs_bp.post("/")
@@ -99,19 +114,19 @@ async def get_club_members(request, club_id: int):
 @clubs_bp.delete("/<club_id:int>/members/<target_user_id:int>")
 @authorized()
 async def remove_member_alt(request, club_id: int, target_user_id: int):
-    result, status = await ClubService.remove_follower(request.ctx.user, club_id, target_user_id)
+    result, status = await ClubService.remove_follower(request.ctx.user, club_id, target_user_id, request.app.ctx.redis)
     return json(result, status=status)
 
 @clubs_bp.post("/<club_id:int>/follow")
 @authorized()
 async def follow_club(request, club_id: int):
-    result, status = await ClubService.follow_club(request.ctx.user, club_id)
+    result, status = await ClubService.follow_club(request.ctx.user, club_id, request.app.ctx.redis)
     return json(result, status=status)
 
 @clubs_bp.post("/<club_id:int>/leave")
 @authorized()
 async def leave_club(request, club_id: int):
-    result, status = await ClubService.leave_club(request.ctx.user, club_id)
+    result, status = await ClubService.leave_club(request.ctx.user, club_id, request.app.ctx.redis)
     return json(result, status=status)
 
 @clubs_bp.post("/<club_id:int>/remove-member")
@@ -121,5 +136,5 @@ async def remove_member(request, club_id: int):
     if not target_user_id:
         return json({"error": "User ID is required"}, 400)
     
-    result, status = await ClubService.remove_follower(request.ctx.user, club_id, target_user_id)
+    result, status = await ClubService.remove_follower(request.ctx.user, club_id, target_user_id, request.app.ctx.redis)
     return json(result, status=status)
\ No newline at end of file
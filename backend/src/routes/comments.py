@@ -2,6 +2,9 @@ from sanic import Blueprint
 from sanic.response import json
 from src.services.comment_service import CommentService
 from src.middleware import authorized
+from src.pagination import parse_limit
+from src.config import COMMENTS_PAGE_SIZE, COMMENTS_MAX_PAGE_SIZE, REALTIME_MAX_PER_EVENT
+from src.realtime import realtime_hub, HubFull, unavailable
 
 # URL yapısı: /events/<id>/comments şeklinde olacak
 comments_bp = Blueprint("comments", url_prefix="/events")
@@ -13,10 +16,37 @@ async def add_comment(request, event_id):
     if not content:
         return json({"error": "Content is required"}, 400)
         
-    result, status = await CommentService.add_comment(request.ctx.user, event_id, content)
+    result, status = await CommentService.add_comment(request.ctx.user, event_id, content, request.app.ctx.redis)
     return json(result, status=status)
 
 @comments_bp.get("/<event_id:int>/comments")
 async def get_comments(request, event_id):
-    result, status = await CommentService.get_comments(event_id)
-    return json(result, status=status)
\ No newline at end of file
+    """?limit=20&before=<next_cursor> ile sayfalar; ?since=<latest_id> sadece yeni yorumları döner."""
+    limit = parse_limit(request.args.get("limit"), default=COMMENTS_PAGE_SIZE, maximum=COMMENTS_MAX_PAGE_SIZE)
+    since = request.args.get("since")
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return json({"error": "since must be a comment id"}, 400)
+    result, status = await CommentService.get_comments(
+        event_id, limit, request.args.get("before"), since, request.app.ctx.redis
+    )
+    return json(result, status=status)
+
+@comments_bp.get("/<event_id:int>/comments/stream")
+async def stream_comments(request, event_id):
+    """
+    Etkinlik sayfasındaki yeni/silinen yorumları Server-Sent Events ile iletir (sadece değişiklikler).
+    Yavaş istemcinin kuyruğu dolarsa bağlantı "slow_consumer" ile kapanır; istemci yeniden bağlanınca
+    ("ready") ilk sayfayı yeniden çeker: kopukluk sırasında silinen yorumlar since= ile gelmeyeceği için
+    EventDetail sayfası ?since=<latest_id> yerine bunu kullanır (ilk sayfa sıcak listeden SQL'siz döner).
+    """
+    if not await CommentService.is_watchable(event_id):
+        return json({"error": "Event not found"}, 404)
+    channel = CommentService.event_channel(event_id)
+    try:
+        sub = await realtime_hub.subscribe([channel], limits={channel: REALTIME_MAX_PER_EVENT})
+    except HubFull as e:
+        return unavailable(e)
+    await realtime_hub.stream(request, sub)
@@ -1,7 +1,9 @@
 from sanic import Blueprint
 from sanic.response import json
 from src.services.event_service import EventService
+from src.services.timeline_service import TimelineService
 from src.middleware import authorized, inject_user
+from src.pagination import cursor_arg, wants_total, ids_arg, parse_limit, InvalidIds
 
 events_bp = Blueprint("events", url_prefix="/events")
 
@@ -14,6 +16,15 @@ async def list_events(request):
     Etkinlikleri sayfalama, arama ve tarih filtresi ile listeler.
     Redis cache mekanizması service katmanında yönetilir.
     """
+    # ?ids=1,2,3 -> tek sorguda toplu getirme (istek sırası korunur, bulunamayanlar "missing")
+    try:
+        ids = ids_arg(request)
+    except InvalidIds as e:
+        return json({"error": str(e)}, status=400)
+    if ids is not None:
+        result, status = await EventService.get_events_by_ids(ids, request.app.ctx.redis)
+        return json(result, status=status)
+
     try:
         page = int(request.args.get("page", 1))
         limit = int(request.args.get("limit", 20))
@@ -23,8 +34,27 @@ async def list_events(request):
     search = request.args.get("search")
     date_filter = request.args.get("date")
     redis = request.app.ctx.redis
+
+    # ?from=2030-01-01&to=2030-02-01 -> tekrarlayan seriler genişletilmiş takvim görünümü
+    if request.args.get("from"):
+        result, status = await EventService.get_events_in_window(
+            redis, request.args.get("from"), request.args.get("to"), page, limit
+        )
+        return json(result, status=status)
     
-    result, status = await EventService.get_events(redis, page, limit, search, date_filter)
+    # ?cursor= verilirse keyset sayfalama (page yok sayılır), ?total=true ile toplam da döner
+    result, status = await EventService.get_events(
+        redis, page, limit, search, date_filter, cursor_arg(request), wants_total(request)
+    )
+    return json(result, status=status)
+
+@events_bp.get("/feed")
+@authorized()
+async def get_feed(request):
+    """Takip edilen kulüplerin yaklaşan etkinlikleri: ?limit=20&cursor=<next_cursor>."""
+    result, status = await TimelineService.get_feed(
+        request.ctx.user, request.app.ctx.redis, parse_limit(request.args.get("limit")), cursor_arg(request)
+    )
     return json(result, status=status)
 
 @events_bp.get("/<event_id:int>")
@@ -35,7 +65,7 @@ async def get_event_detail(request, event_id: int):
     @inject_user sayesinde giriş yapmış kullanıcının ID'si (sub) servise iletilir.
     """
     user_ctx = getattr(request.ctx, "user", None)
-    result, status = await EventService.get_event_detail(event_id, user_ctx)
+    result, status = await EventService.get_event_detail(event_id, user_ctx, request.app.ctx.redis)
     return json(result, status=status)
 
 # --- ETKİNLİK YÖNETİMİ (KULÜP BAŞKANI / ADMIN) ---
@@ -44,7 +74,7 @@ async def get_event_detail(request, event_id: int):
 @authorized()
 async def create_event(request):
     """Yeni bir etkinlik oluşturur (Yetki kontrolü service içindedir)."""
-    result, status = await EventService.create_event(request.ctx.user, request.json)
+    result, status = await EventService.create_event(request.ctx.user, request.json, request.app.ctx.redis)
     return json(result, status=status)
 
 @events_bp.put("/<event_id:int>")
@@ -54,14 +84,24 @@ async def update_event(request, event_id: int):
     if not request.json:
         return json({"error": "No data provided for update"}, 400)
         
-    result, status = await EventService.update_event(request.ctx.user, event_id, request.json)
+    result, status = await EventService.update_event(request.ctx.user, event_id, request.json, request.app.ctx.redis)
     return json(result, status=status)
 
 @events_bp.delete("/<event_id:int>")
 @authorized()
 async def delete_event(request, event_id: int):
     """Etkinliği siler (Soft-delete)."""
-    result, status = await EventService.delete_event(request.ctx.user, event_id)
+    result, status = await EventService.delete_event(request.ctx.user, event_id, request.app.ctx.redis)
+    return json(result, status=status)
+
+@events_bp.post("/<event_id:int>/occurrences/cancel")
+@authorized()
+async def cancel_occurrence(request, event_id: int):
+    """Tekrarlayan serinin tek bir tekrarını iptal eder: {"occurrence": tarih}."""
+    occurrence = (request.json or {}).get("occurrence")
+    if not occurrence:
+        return json({"error": "occurrence is required"}, 400)
+    result, status = await EventService.cancel_occurrence(request.ctx.user, event_id, occurrence, request.app.ctx.redis)
     return json(result, status=status)
 
 # --- KATILIM İŞLEMLERİ (ÖĞRENCİLER) ---
@@ -69,15 +109,16 @@ async def delete_event(request, event_id: int):
 @events_bp.post("/<event_id:int>/join")
 @authorized()
 async def join_event(request, event_id: int):
-    """Kullanıcının etkinliğe katılmasına izin verir (Kota kontrolü dahil)."""
-    result, status = await EventService.join_event(request.ctx.user, event_id)
+    """Kullanıcının etkinliğe katılmasına izin verir (Kota kontrolü dahil). Seride {"occurrence": tarih}, yoksa sıradaki tekrar."""
+    occurrence = (request.json or {}).get("occurrence")
+    result, status = await EventService.join_event(request.ctx.user, event_id, request.app.ctx.redis, occurrence)
     return json(result, status=status)
 
 @events_bp.post("/<event_id:int>/leave")
 @authorized()
 async def leave_event(request, event_id: int):
     """Kullanıcının etkinlikten ayrılmasını sağlar."""
-    result, status = await EventService.leave_event(request.ctx.user, event_id)
+    result, status = await EventService.leave_event(request.ctx.user, event_id, request.app.ctx.redis)
     return json(result, status=status)
 
 @events_bp.post("/<event_id:int>/remove-participant")
@@ -88,5 +129,5 @@ async def remove_participant(request, event_id: int):
     if not target_user_id:
         return json({"error": "target user_id is required"}, 400)
         
-    result, status = await EventService.remove_participant(request.ctx.user, event_id, target_user_id)
+    result, status = await EventService.remove_participant(request.ctx.user, event_id, target_user_id, request.app.ctx.redis)
     return json(result, status=status)
\ No newline at end of file
@@ -2,19 +2,91 @@ from sanic import Blueprint
 from sanic.response import json
 from src.services.notification_service import NotificationService
 from src.middleware import authorized
+from src.pagination import parse_limit
+from src.realtime import realtime_hub, HubFull, unavailable
+from src.config import REALTIME_MAX_PER_USER
 
 notif_bp = Blueprint("notifications", url_prefix="/notifications")
 
 @notif_bp.get("/")
 @authorized()
 async def get_notifications(request):
+    """Bildirim feed'i: ?limit=20&cursor=<next_cursor> ile sayfalanır."""
     user_id = request.ctx.user["sub"]
-    result, status = await NotificationService.get_my_notifications(user_id)
+    limit = parse_limit(request.args.get("limit"), default=20, maximum=100)
+    cursor = request.args.get("cursor")
+    result, status = await NotificationService.get_my_notifications(user_id, limit, cursor)
     return json(result, status=status)
 
+@notif_bp.get("/unread-count")
+@authorized()
+async def get_unread_count(request):
+    """Navbar için hafif sayaç (Redis'ten okunur)."""
+    user_id = request.ctx.user["sub"]
+    result, status = await NotificationService.get_unread_count(user_id, request.app.ctx.redis)
+    return json(result, status=status)
+
+@notif_bp.post("/stream-ticket")
+@authorized()
+async def get_stream_ticket(request):
+    """EventSource header gönderemediği için stream'e JWT yerine bu tek kullanımlık bilet verilir."""
+    result, status = await NotificationService.issue_stream_ticket(request.ctx.user["sub"], request.app.ctx.redis)
+    return json(result, status=status)
+
+@notif_bp.get("/stream")
+async def stream_notifications(request):
+    """
+    Yeni bildirimleri Server-Sent Events ile anlık iletir (Redis pub/sub, tüm worker'lar).
+    ?ticket=<POST /stream-ticket> ile açılır; bilet tek kullanımlık olduğundan istemci her
+    yeniden bağlanmada yeni bilet alır.
+    """
+    redis = request.app.ctx.redis
+    user_id = await NotificationService.redeem_stream_ticket(request.args.get("ticket"), redis)
+    if user_id is None:
+        return json({"error": "Unauthorized: Invalid or expired stream ticket"}, 401)
+
+    user_channel = NotificationService.user_channel(user_id)
+    try:
+        sub = await realtime_hub.subscribe(
+            [user_channel, NotificationService.BROADCAST_CHANNEL],
+            limits={user_channel: REALTIME_MAX_PER_USER}
+        )
+    except HubFull as e:
+        return unavailable(e)
+    await realtime_hub.stream(request, sub)
+
 @notif_bp.post("/<notif_id:int>/read")
 @authorized()
 async def mark_read(request, notif_id):
     user_id = request.ctx.user["sub"]
-    result, status = await NotificationService.mark_as_read(notif_id, user_id)
-    return json(result, status=status)
\ No newline at end of file
+    result, status = await NotificationService.mark_as_read(notif_id, user_id, request.app.ctx.redis)
+    return json(result, status=status)
+
+@notif_bp.post("/broadcasts/<broadcast_id:int>/read")
+@authorized()
+async def mark_broadcast_read(request, broadcast_id):
+    user_id = request.ctx.user["sub"]
+    result, status = await NotificationService.mark_broadcast_read(broadcast_id, user_id, request.app.ctx.redis)
+    return json(result, status=status)
+
+@notif_bp.post("/read")
+@authorized()
+async def mark_many_read(request):
+    """Toplu okundu: {"ids": [1, 2, 3]} veya {"up_to": "<head_cursor>"}"""
+    data = request.json or {}
+    user_id = request.ctx.user["sub"]
+    result, status = await NotificationService.mark_many_as_read(
+        user_id, data.get("ids"), data.get("up_to"), request.app.ctx.redis
+    )
+    return json(result, status=status)
+
+@notif_bp.delete("/")
+@authorized()
+async def delete_many(request):
+    """Toplu silme: {"ids": [1, 2, 3]} veya {"up_to": "<cursor>"}"""
+    data = request.json or {}
+    user_id = request.ctx.user["sub"]
+    result, status = await NotificationService.delete_many(
+        user_id, data.get("ids"), data.get("up_to"), request.app.ctx.redis
+    )
+    return json(result, status=status)
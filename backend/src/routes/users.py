@@ -1,10 +1,27 @@
 from sanic import Blueprint
-from sanic.response import json
+from sanic.response import json, empty
 from src.services.user_service import UserService
+from src.services.calendar_service import CalendarService
+from src.security import create_calendar_token, decode_calendar_token
 from src.middleware import authorized, inject_user
+from src.config import PUBLIC_API_URL
+from src.pagination import cursor_arg, wants_total, ids_arg, InvalidIds
 
 users_bp = Blueprint("users", url_prefix="/users")
 
+@users_bp.get("/")
+@authorized()
+async def get_public_profiles(request):
+    """?ids=1,2,3 ile birden çok kullanıcının herkese açık profil özeti (tek sorgu)."""
+    try:
+        ids = ids_arg(request)
+    except InvalidIds as e:
+        return json({"error": str(e)}, status=400)
+    if ids is None:
+        return json({"error": "ids is required"}, status=400)
+    result, status = await UserService.get_public_profiles_by_ids(ids)
+    return json(result, status=status)
+
 @users_bp.get("/history")
 @authorized()
 async def get_history(request):
@@ -12,6 +29,58 @@ async def get_history(request):
     result, status = await UserService.get_user_history(user_id)
     return json(result, status=status)
 
+def _calendar_url(request, user_id: int, version: int) -> str:
+    """Takvim uygulamalarına verilecek mutlak abonelik adresi."""
+    base = PUBLIC_API_URL or f"{request.scheme}://{request.host}"
+    return f"{base}{users_bp.url_prefix}/calendar/{create_calendar_token(user_id, version)}.ics"
+
+@users_bp.get("/calendar")
+@authorized()
+async def get_calendar_link(request):
+    """Katılınan etkinliklerin takvim aboneliği adresi (telefon/masaüstü takvimine eklenir)."""
+    user_id = request.ctx.user["sub"]
+    version = await CalendarService.token_version(request.app.ctx.redis, user_id)
+    if version is None:
+        return json({"error": "User not found"}, 404)
+    return json({"url": _calendar_url(request, user_id, version)})
+
+@users_bp.post("/calendar/rotate")
+@authorized()
+async def rotate_calendar_link(request):
+    """Abonelik adresini yeniler; eski adres (ör. sızdırılmış bağlantı) artık akış döndürmez."""
+    user_id = request.ctx.user["sub"]
+    version = await CalendarService.rotate_token(request.app.ctx.redis, user_id)
+    if version is None:
+        return json({"error": "User not found"}, 404)
+    return json({"url": _calendar_url(request, user_id, version)})
+
+@users_bp.get("/calendar/<token:str>")
+async def get_calendar_feed(request, token: str):
+    """
+    Token'lı .ics akışı. VEVENT'ler dilim dilim gönderilir; ETag / If-Modified-Since
+    eşleşirse veritabanına gitmeden 304 döner. Yenilenmiş (eski sürüm) token'lar ve
+    banlı kullanıcılar 404 alır.
+    """
+    decoded = decode_calendar_token(token.removesuffix(".ics"))
+    if decoded is None:
+        return json({"error": "Invalid calendar token"}, 404)
+    user_id, version = decoded
+    if await CalendarService.token_version(request.app.ctx.redis, user_id) != version:
+        return json({"error": "Invalid calendar token"}, 404)
+
+    redis = request.app.ctx.redis
+    etag, last_modified = await CalendarService.validators(redis, user_id)
+    if CalendarService.is_not_modified(request.headers, etag, last_modified):
+        return empty(status=304, headers=CalendarService.headers(etag, last_modified))
+
+    last_modified = await CalendarService.remember(redis, user_id, etag, last_modified)
+    response = await request.respond(
+        content_type="text/calendar; charset=utf-8", headers=CalendarService.headers(etag, last_modified)
+    )
+    async for chunk in CalendarService.iter_feed(user_id):
+        await response.send(chunk)
+    await response.eof()
+
 @users_bp.get("/profile")
 @authorized()
 async def get_profile(request):
@@ -24,7 +93,7 @@ async def get_profile(request):
 @authorized()
 async def update_profile(request):
     user_id = request.ctx.user["sub"]
-    result, status = await UserService.update_profile(user_id, request.json)
+    result, status = await UserService.update_profile(user_id, request.json, request.app.ctx.redis)
     return json(result, status=status)
 
 @users_bp.get("/search")
@@ -50,5 +119,7 @@ async def get_user_comments(request, user_id: int):
     except ValueError:
         page, limit = 1, 10
         
-    result, status = await UserService.get_user_comments_paginated(user_id, page, limit)
+    result, status = await UserService.get_user_comments_paginated(
+        user_id, page, limit, cursor_arg(request), wants_total(request)
+    )
     return json(result, status=status)
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Etkinlik arama yardımcıları.
+
+MySQL'de events.search_document kolonu üzerindeki FULLTEXT index (src/migrations.py) ile
+MATCH ... AGAINST (BOOLEAN MODE) kullanılır. SQLite'ta (geliştirme/test) FULLTEXT olmadığı
+için aynı katlama kurallarıyla çalışan bellek içi ters indeks (InvertedIndex) kullanılır.
+
+Her iki yolda da metin Türkçe'ye uygun katlanır: "İ"/"I" doğru küçültülür ve Türkçe
+karakterler ASCII karşılıklarına indirilir; "IĞDIR", "Iğdır" ve "igdir" aynı token'dır.
+Sorgudaki her kelime önek olarak eşleşir ("konse" -> "konser") ve tüm kelimeler zorunludur.
+"""
+import re
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+from pypika_tortoise.terms import Term, ValueWrapper
+from pypika_tortoise.utils import format_alias_sql
+from tortoise.functions import Function
+
+_TURKISH_UPPER = str.maketrans({"İ": "i", "I": "ı"})
+_ASCII_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Başlıkta geçen kelime açıklamada geçenden daha alakalı sayılır
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+# InnoDB varsayılan innodb_ft_min_token_size; daha kısa kelimeler FULLTEXT'te indekslenmez
+MYSQL_MIN_TOKEN_SIZE = 3
+MAX_QUERY_TOKENS = 8
+
+
+def fold(text: Optional[str]) -> str:
+    """Türkçe'ye uygun küçük harfe çevirip ASCII'ye katlar."""
+    if not text:
+        return ""
+    return text.translate(_TURKISH_UPPER).lower().translate(_ASCII_FOLD)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+def build_search_document(title: Optional[str], description: Optional[str]) -> str:
+    """events.search_document içeriği: katlanmış token'lar (başlık ağırlığı için başlık tekrarlanır)."""
+    title_tokens = " ".join(tokenize(title))
+    return " ".join([title_tokens] * TITLE_WEIGHT + [" ".join(tokenize(description))]).strip()
+
+
+def parse_query(search: Optional[str]) -> List[str]:
+    """Kullanıcı sorgusunu tekrarsız token listesine çevirir (sıra korunur)."""
+    return list(dict.fromkeys(tokenize(search)))[:MAX_QUERY_TOKENS]
+
+
+def mysql_boolean_query(tokens: List[str]) -> str:
+    """
+    "+token*" biçiminde BOOLEAN MODE ifadesi. SQL'e gömülmez, BooleanMatch ile
+    bağlı parametre olarak gönderilir.
+    """
+    return " ".join(f"+{t}*" for t in tokens if len(t) >= MYSQL_MIN_TOKEN_SIZE)
+
+
+class _MatchAgainst(Term):
+    def __init__(self, column: Term, query: str):
+        super().__init__()
+        self.column = column
+        self.query = ValueWrapper(query)
+
+    def get_sql(self, ctx) -> str:
+        arg_ctx = ctx.copy(with_alias=False)
+        sql = f"MATCH({self.column.get_sql(arg_ctx)}) AGAINST({self.query.get_sql(arg_ctx)} IN BOOLEAN MODE)"
+        return format_alias_sql(sql, self.alias, ctx) if ctx.with_alias else sql
+
+
+class BooleanMatch(Function):
+    """
+    MATCH(alan) AGAINST(%s IN BOOLEAN MODE) alaka skoru (sadece MySQL).
+    Sorgu ifadesi bağlı parametredir, ör. annotate(relevance=BooleanMatch("search_document", q)).
+    """
+
+    database_func = _MatchAgainst
+
+
+class InvertedIndex:
+    """
+    token -> {event_id: ağırlık} ters indeksi. Önek eşleşmesi için token'lar sıralı bir
+    listede tutulur (bisect). Tek process içindir; SQLite geliştirme/test ortamında
+    kullanılır, yazma yolları add/remove ile güncel tutar.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: List[str] = []
+        self._docs: Dict[int, Tuple[List[str], Any]] = {}
+        self._dirty = False
+        self.ready = False
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, event_id: int, title: Optional[str], description: Optional[str], meta: Any = None):
+        """meta: arama sonrası filtreleme için etkinlikle birlikte tutulan değer (ör. kulüp, tarih)."""
+        self.remove(event_id)
+        weights: Dict[str, int] = {}
+        for token in tokenize(title):
+            weights[token] = weights.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+        postings = self._postings
+        for token, weight in weights.items():
+            if token not in postings:
+                postings[token] = {}
+                self._dirty = True
+            postings[token][event_id] = weight
+        self._docs[event_id] = (list(weights), meta)
+
+    def remove(self, event_id: int):
+        tokens, _ = self._docs.pop(event_id, ((), None))
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(event_id, None)
+                if not postings:
+                    del self._postings[token]
+                    self._dirty = True
+
+    def meta(self, event_id: int) -> Any:
+        doc = self._docs.get(event_id)
+        return doc[1] if doc else None
+
+    def clear(self):
+        self.__init__()
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        if self._dirty:
+            self._terms = sorted(self._postings)
+            self._dirty = False
+        start = bisect_left(self._terms, prefix)
+        terms = []
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, tokens: List[str]) -> List[Tuple[int, float]]:
+        """Tüm token'ları (önek olarak) içeren etkinlikleri alaka skoruna göre azalan döner."""
+        scores: Optional[Dict[int, float]] = None
+        for token in tokens:
+            matches: Dict[int, float] = {}
+            for term in self._prefix_terms(token):
+                # Tam kelime eşleşmesi önek eşleşmesinden daha alakalı
+                factor = 1.0 if term == token else 0.5
+                for event_id, weight in self._postings[term].items():
+                    matches[event_id] = matches.get(event_id, 0) + weight * factor
+            if scores is None:
+                scores = matches
+            else:
+                scores = {eid: score + matches[eid] for eid, score in scores.items() if eid in matches}
+            if not scores:
+                return []
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+
+event_index = InvertedIndex()
+
+
+async def backfill_search_documents(batch_size: int = 1000) -> int:
+    """search_document'ı boş olan etkinlikleri (kolon sonradan eklendiyse) partiler halinde doldurur."""
+    from src.models import Events
+
+    updated = 0
+    while True:
+        events = await Events.filter(search_document__isnull=True).order_by("event_id").limit(batch_size)
+        if not events:
+            return updated
+        for event in events:
+            event.search_document = build_search_document(event.title, event.description)
+        await Events.bulk_update(events, fields=["search_document"])
+        updated += len(events)
@@ -1,8 +1,18 @@
+import asyncio
+import hashlib
+import hmac
 import bcrypt
 import jwt
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
-from src.config import SECRET_KEY
+from typing import Optional, Dict, Any, Tuple
+from src.config import (
+    SECRET_KEY,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_CONCURRENCY,
+    PASSWORD_HASH_MAX_PENDING,
+)
 
 # Algoritmayı tek bir yerden yönetmek daha sağlıklıdır
 ALGORITHM = "HS256"
@@ -23,6 +33,109 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+# --- ASENKRON HASH HAVUZU ---
+
+class HashPoolSaturated(RuntimeError):
+    """Hash kuyruğu dolu olduğunda fırlatılır (istek 503 ile reddedilmeli)."""
+
+
+class PasswordHashPool:
+    """
+    bcrypt işlemlerini event loop dışında, sınırlı bir executor'da çalıştırır.
+    Worker başına eşzamanlılık bir semaphore ile, bekleyen iş sayısı ise
+    max_pending ile sınırlandırılır. Her Sanic worker kendi havuzunu kullanır.
+    """
+
+    def __init__(self, executor_kind: str = "thread", max_workers: int = 2,
+                 max_concurrency: Optional[int] = None, max_pending: int = 64):
+        self.executor_kind = executor_kind
+        self.max_workers = max(1, max_workers)
+        self.max_concurrency = max(1, max_concurrency or self.max_workers)
+        self.max_pending = max(0, max_pending)
+
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+        # Metrikler
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.peak_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pwhash")
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphore oluşturulduğu loop'a bağlanır; loop değişirse yeniden oluştur
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, fn, *args):
+        if self.queue_depth >= self.max_pending:
+            self.rejected += 1
+            raise HashPoolSaturated("Password hash queue is full")
+
+        semaphore = self._get_semaphore()
+        self.queue_depth += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(
+    executor_kind=PASSWORD_HASH_EXECUTOR,
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_concurrency=PASSWORD_HASH_MAX_CONCURRENCY,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password'ün event loop'u bloklamayan versiyonu."""
+    return await password_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password'ün event loop'u bloklamayan versiyonu."""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
 def create_access_token(user_id: int, role: str, expires_delta: Optional[timedelta] = None) -> str:
     """Kullanıcı ID ve rolüne göre JWT Access Token üretir."""
     if expires_delta:
@@ -54,4 +167,27 @@ def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
         return None
     except Exception:
         # Diğer beklenmedik hatalar
-        return None
\ No newline at end of file
+        return None
+
+
+# --- TAKVİM AKIŞI TOKEN'I ---
+# Takvim uygulamaları header gönderemez ve JWT'ler kısa ömürlüdür; akış URL'si kullanıcı id'si,
+# kullanıcının token sürümü (Users.calendar_token_version) ve SECRET_KEY ile imzalanmış bir token
+# taşır. Sürüm artırılınca (yenileme) eski URL'ler geçersizleşir; sürüm kontrolü CalendarService'te.
+
+def _calendar_signature(user_id: int, version: int) -> str:
+    message = f"calendar:{user_id}:{version}".encode("utf-8")
+    return hmac.new(SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()[:32]
+
+def create_calendar_token(user_id: int, version: int = 0) -> str:
+    return f"{user_id}.{version}.{_calendar_signature(user_id, version)}"
+
+def decode_calendar_token(token: str) -> Optional[Tuple[int, int]]:
+    """İmza geçerliyse (kullanıcı id'si, token sürümü), değilse None döner."""
+    parts = (token or "").split(".")
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    user_id, version = int(parts[0]), int(parts[1])
+    if not hmac.compare_digest(parts[2], _calendar_signature(user_id, version)):
+        return None
+    return user_id, version
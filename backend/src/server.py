@@ -3,6 +3,12 @@ from sanic.response import json
 from sanic_ext import Extend
 from src.database import init_db, close_db
 from src.config import REDIS_URL, logger
+from src.security import password_pool
+from src.services.mail_service import mail_queue
+from src.services.notification_service import NotificationService
+from src.services.timeline_service import TimelineService
+from src.services.reminder_service import ReminderService
+from src.realtime import realtime_hub
 from src.routes.auth import auth_bp
 from src.routes.clubs import clubs_bp
 from src.routes.events import events_bp
@@ -49,13 +55,28 @@ async def setup_db(app, loop):
     logger.info("Server Starting... Connecting to DB and Redis.")
     await init_db()
     app.ctx.redis = aioredis.from_url(REDIS_URL, decode_responses=True)
+    await mail_queue.start(app.ctx.redis)
+    await realtime_hub.start(app.ctx.redis)
+    NotificationService.start_digest_sweeper(app.ctx.redis)
+    ReminderService.start(app.ctx.redis)
     logger.info("Connected to Database and Redis.")
 
+@app.before_server_stop
+async def close_streams(app, loop):
+    # Açık SSE bağlantıları kapatılmazsa graceful shutdown süresi boyunca beklenir
+    await realtime_hub.stop()
+    await NotificationService.stop_digest_sweeper()
+    await ReminderService.stop(app.ctx.redis)
+
 @app.after_server_stop
 async def stop_db(app, loop):
     logger.info("Server Stopping... Closing connections.")
+    await mail_queue.stop()
+    await NotificationService.drain_background_tasks()
+    await TimelineService.drain_background_tasks()
     await close_db()
     await app.ctx.redis.close()
+    password_pool.shutdown()
     logger.info("Connections closed.")
 
 @app.get("/")
@@ -1,8 +1,20 @@
-from src.models import Users, Clubs, Events, UserRole, EventComments, Notifications
+from src.models import Users, Clubs, Events, UserRole, EventComments, Broadcasts
 from tortoise.exceptions import DoesNotExist
 from tortoise.expressions import Q 
 from tortoise.transactions import in_transaction 
+from datetime import datetime
 from src.config import logger
+from src.security import password_pool
+from src.middleware import token_cache
+from src.services.mail_service import mail_queue
+from src.realtime import realtime_hub, RealtimeHub
+from src.services.notification_service import NotificationService, UnreadCounter
+from src.services.comment_service import CommentService, CommentCounter, CommentThreadCache
+from src.services.event_service import EventService
+from src.services.calendar_service import CalendarService
+from src.services.user_service import UserService
+from src.cache import clubs_cache, events_cache
+from src.pagination import paginate_by_cursor, paginate_by_offset, InvalidCursor
 
 class AdminService:
 
@@ -23,8 +35,21 @@ class AdminService:
             return {"error": "Failed to fetch stats"}, 500
 
     @staticmethod
-    async def get_all_users(page: int, limit: int, search: str = None):
-        """Kullanıcıları listeleme (is_active alanından arındırıldı)"""
+    async def get_runtime_metrics():
+        """Bu worker'a ait çalışma zamanı metrikleri (havuzlar, kuyruklar)."""
+        return {
+            "metrics": {
+                "password_hash_pool": password_pool.stats(),
+                "jwt_cache": token_cache.stats(),
+                "mail_queue": await mail_queue.stats(),
+                "notification_fanout": NotificationService.fanout_stats(),
+                "realtime": realtime_hub.stats()
+            }
+        }, 200
+
+    @staticmethod
+    async def get_all_users(page: int, limit: int, search: str = None, cursor: str = None, with_total: bool = False):
+        """Kullanıcıları listeleme (is_active alanından arındırıldı); cursor ile keyset modunda çalışır."""
         try:
             query = Users.filter(is_deleted=False)
 
@@ -35,8 +60,23 @@ class AdminService:
                     Q(last_name__icontains=search)
                 )
 
-            total = await query.count()
-            users = await query.offset((page - 1) * limit).limit(limit).order_by("-created_at")
+            if cursor is not None:
+                try:
+                    users, pagination = await paginate_by_cursor(
+                        query, [("-created_at", datetime), ("-user_id", int)], cursor, limit
+                    )
+                except InvalidCursor:
+                    return {"error": "Invalid cursor"}, 400
+                if with_total:
+                    pagination["total"] = await query.count()
+            else:
+                users, total = await paginate_by_offset(query, ["-created_at", "-user_id"], page, limit)
+                pagination = {
+                    "total": total,
+                    "page": page,
+                    "limit": limit,
+                    "total_pages": (total + limit - 1) // limit
+                }
 
             users_list = [{
                 "id": u.user_id,
@@ -49,12 +89,7 @@ class AdminService:
 
             return {
                 "users": users_list,
-                "pagination": {
-                    "total": total,
-                    "page": page,
-                    "limit": limit,
-                    "total_pages": (total + limit - 1) // limit
-                }
+                "pagination": pagination
             }, 200
         except Exception as e:
             logger.error(f"User List Error: {str(e)}")
@@ -101,7 +136,7 @@ class AdminService:
             return {"error": f"İşlem başarısız: {str(e)}"}, 500
 
     @staticmethod
-    async def toggle_user_ban(target_user_id: int):
+    async def toggle_user_ban(target_user_id: int, redis=None):
         """Kullanıcıyı sil/silme (is_deleted üzerinden)"""
         try:
             user = await Users.get(user_id=target_user_id)
@@ -110,6 +145,8 @@ class AdminService:
             
             user.is_deleted = not user.is_deleted
             await user.save()
+            # Banlı kullanıcının takvim aboneliği bir sonraki yoklamada kesilsin
+            await CalendarService.forget_token(redis, target_user_id)
             
             action = "engellendi" if user.is_deleted else "etkinleştirildi"
             return {"message": f"Kullanıcı başarıyla {action}"}, 200
@@ -117,32 +154,42 @@ class AdminService:
             return {"error": "Kullanıcı bulunamadı"}, 404
 
     @staticmethod
-    async def delete_comment(comment_id: int):
+    async def delete_comment(comment_id: int, redis=None):
         """Yorum denetimi"""
         try:
+            event_ids = await EventComments.filter(comment_id=comment_id).values_list("event_id", flat=True)
             deleted_count = await EventComments.filter(comment_id=comment_id).delete()
             if deleted_count == 0:
                 return {"error": "Yorum bulunamadı"}, 404
+            await CommentCounter.adjust(redis, event_ids[0], -1)
+            await CommentThreadCache.invalidate(redis, event_ids)
+            await RealtimeHub.publish(redis, CommentService.event_channel(event_ids[0]), "comment_deleted", {"id": comment_id})
             return {"message": "Yorum başarıyla silindi"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
 
     @staticmethod
-    async def send_global_announcement(message: str):
-        """Tüm kullanıcılara duyuru gönder"""
+    async def send_global_announcement(message: str, admin_id: int = None, redis=None):
+        """Tüm kullanıcılara duyuru gönder (tek satır; kullanıcı feed'lerine okuma anında eklenir)"""
         try:
-            users = await Users.filter(is_deleted=False).all()
-            notif_objects = [
-                Notifications(user_id=u.user_id, message=f"📢 DUYURU: {message}") 
-                for u in users
-            ]
-            await Notifications.bulk_create(notif_objects)
-            return {"message": f"Duyuru {len(users)} kişiye iletildi"}, 200
+            broadcast = await Broadcasts.create(message=message, created_by_id=admin_id)
+            await UnreadCounter.add_broadcast(redis, broadcast.broadcast_id)
+            await RealtimeHub.publish(redis, NotificationService.BROADCAST_CHANNEL, "notification", {
+                "id": f"broadcast-{broadcast.broadcast_id}",
+                "broadcast_id": broadcast.broadcast_id,
+                "type": "broadcast",
+                "message": f"📢 DUYURU: {message}",
+                "is_read": False,
+                "created_at": str(broadcast.created_at)
+            })
+            logger.info(f"Global announcement {broadcast.broadcast_id} published by admin {admin_id}")
+            return {"message": "Duyuru tüm kullanıcılara iletildi", "broadcast_id": broadcast.broadcast_id}, 200
         except Exception as e:
+            logger.error(f"Announcement Error: {str(e)}")
             return {"error": "Duyuru gönderilemedi"}, 500
 
     @staticmethod
-    async def update_club_details(club_id: int, data: dict):
+    async def update_club_details(club_id: int, data: dict, redis=None):
         """Kulüp bilgilerini ve başkanını güncelle"""
         try:
             async with in_transaction():
@@ -170,14 +217,19 @@ class AdminService:
                         club.president_id = new_pid
 
                 await club.save()
-                return {"message": "Kulüp başarıyla güncellendi"}, 200
+            # Kulüp adı etkinlik listesinde ve detayında da gösterildiği için hepsi yenilenir
+            await clubs_cache.invalidate(redis)
+            await events_cache.invalidate(redis)
+            if "name" in data:
+                await EventService.invalidate_club_details(redis, club_id)
+            return {"message": "Kulüp başarıyla güncellendi"}, 200
         except DoesNotExist:
             return {"error": "Kulüp bulunamadı"}, 404
         except Exception as e:
             return {"error": str(e)}, 500
 
     @staticmethod
-    async def update_user_profile_as_admin(target_user_id: int, data: dict):
+    async def update_user_profile_as_admin(target_user_id: int, data: dict, redis=None):
         """Adminin bir kullanıcının profil bilgilerini değiştirmesini sağlar"""
         try:
             user = await Users.get(user_id=target_user_id)
@@ -193,6 +245,7 @@ class AdminService:
                 user.last_name = " ".join(names[1:]) if len(names) > 1 else ""
                 
             await user.save()
+            await UserService.invalidate_comment_cards(redis, target_user_id, data)
             logger.info(f"Admin updated profile for user {target_user_id}")
             return {"message": "Kullanıcı profili başarıyla güncellendi"}, 200
         except DoesNotExist:
@@ -1,19 +1,27 @@
 import secrets
-from datetime import datetime, timedelta
 from typing import Dict, Any, Tuple
 from tortoise.exceptions import DoesNotExist
 from tortoise.expressions import Q
 from src.services.mail_service import MailService
+from src.services.token_store import MemoryTokenStore, RedisTokenStore
 
 from src.models import Users, UserRole
-from src.security import hash_password, verify_password, create_access_token
+from src.security import hash_password_async, verify_password_async, create_access_token, HashPoolSaturated
 from src.config import logger
 
 class AuthService:
     
-    # Geçici token deposu (Gerçek projede Redis veya DB tablosu daha iyidir)
-    # format: {"token_string": {"user_id": 123, "expires": datetime}}
-    _reset_tokens = {}
+    RESET_TOKEN_TTL = 30 * 60  # saniye
+
+    # Redis yoksa (testler) kullanılan process içi yedek depo
+    _memory_reset_tokens = MemoryTokenStore()
+
+    @staticmethod
+    def _reset_token_store(redis=None):
+        """Şifre sıfırlama tokenları için depo: Redis varsa paylaşımlı, yoksa bellek içi."""
+        if redis:
+            return RedisTokenStore(redis, "auth:reset")
+        return AuthService._memory_reset_tokens
 
     @staticmethod
     async def register_user(data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
@@ -38,7 +46,7 @@ class AuthService:
                 return {"error": "Bu öğrenci numarası veya e-posta adresi zaten kullanımda."}, 400
             
             # Kullanıcıyı oluştur
-            hashed = hash_password(password)
+            hashed = await hash_password_async(password)
             user = await Users.create(
                 user_id=student_number,
                 email=email,
@@ -49,14 +57,13 @@ class AuthService:
                 department=department
             )
             
-            # --- HOŞ GELDİN MAİLİ GÖNDERİMİ ---
+            # --- HOŞ GELDİN MAİLİ (kuyruğa eklenir, gönderim arka planda) ---
             try:
-                # MailService içinde send_welcome_email metodunun tanımlı olması gerekir
                 await MailService.send_welcome_email(user.email, user.first_name)
-                logger.info(f"Welcome email sent to: {user.email}")
+                logger.info(f"Welcome email queued for: {user.email}")
             except Exception as mail_err:
                 # Mail hatası kaydı engellememeli, sadece loglanır
-                logger.error(f"Welcome email failed: {str(mail_err)}")
+                logger.error(f"Welcome email could not be queued: {str(mail_err)}")
             # ----------------------------------
 
             token = create_access_token(user.user_id, user.role.value)
@@ -70,6 +77,9 @@ class AuthService:
                 }
             }, 201
             
+        except HashPoolSaturated:
+            logger.warning("Password hash pool saturated, rejecting register request")
+            return {"error": "Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin."}, 503
         except Exception as e:
             logger.error(f"Registration Error: {str(e)}")
             return {"error": "Kayıt sırasında bir hata oluştu."}, 500
@@ -87,7 +97,7 @@ class AuthService:
             if user.is_deleted:
                 return {"error": "Hesabınız askıya alınmıştır."}, 403
 
-            if not verify_password(password, user.password):
+            if not await verify_password_async(password, user.password):
                 raise DoesNotExist 
 
             if required_role and user.role.value != required_role:
@@ -106,12 +116,15 @@ class AuthService:
 
         except DoesNotExist:
             return {"error": "E-posta veya şifre hatalı."}, 401
+        except HashPoolSaturated:
+            logger.warning("Password hash pool saturated, rejecting login request")
+            return {"error": "Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin."}, 503
         except Exception as e:
             logger.error(f"Login Error: {str(e)}")
             return {"error": "Giriş sırasında bir hata oluştu."}, 500
 
     @staticmethod
-    async def request_password_reset(email: str) -> Tuple[Dict[str, Any], int]:
+    async def request_password_reset(email: str, redis=None) -> Tuple[Dict[str, Any], int]:
         """Sıfırlama tokeni üretir ve sadece kayıtlı kullanıcılara mail gönderir."""
         try:
             # Kullanıcı kontrolü (DoesNotExist fırlatırsa doğrudan except bloğuna gider)
@@ -121,17 +134,14 @@ class AuthService:
                 return {"message": "Eğer hesap mevcutsa sıfırlama maili gönderilecektir."}, 200
             
             token = secrets.token_urlsafe(32)
-            expiry = datetime.now() + timedelta(minutes=30)
             
-            # Tokenı belleğe kaydet
-            AuthService._reset_tokens[token] = {
-                "user_id": user.user_id,
-                "expires": expiry
-            }
+            # Tokenı TTL ile depola (süresi dolunca kendiliğinden silinir)
+            store = AuthService._reset_token_store(redis)
+            await store.save(token, str(user.user_id), AuthService.RESET_TOKEN_TTL)
 
-            # Mail Gönder
+            # Mail kuyruğa eklenir, yanıt SMTP'yi beklemez
             await MailService.send_reset_email(email, token)
-            logger.info(f"Password reset link sent to: {email}")
+            logger.info(f"Password reset link queued for: {email}")
             
             return {"message": "Şifre sıfırlama bağlantısı e-posta adresinize gönderildi."}, 200
             
@@ -144,29 +154,31 @@ class AuthService:
             return {"error": "Bir hata oluştu."}, 500
 
     @staticmethod
-    async def complete_password_reset(token: str, new_password: str) -> Tuple[Dict[str, Any], int]:
+    async def complete_password_reset(token: str, new_password: str, redis=None) -> Tuple[Dict[str, Any], int]:
         """Token doğrulaması yapar ve şifreyi günceller."""
         try:
-            reset_data = AuthService._reset_tokens.get(token)
+            # Token önce sadece doğrulanır: hash havuzu doluysa (503) ya da hata olursa
+            # kullanıcı aynı bağlantıyla tekrar deneyebilir
+            store = AuthService._reset_token_store(redis)
+            user_id = await store.get(token)
 
-            if not reset_data:
-                return {"error": "Geçersiz veya kullanılmış token."}, 400
-            
-            if datetime.now() > reset_data["expires"]:
-                if token in AuthService._reset_tokens:
-                    del AuthService._reset_tokens[token]
-                return {"error": "Token süresi dolmuş. Lütfen tekrar deneyin."}, 400
+            if not user_id:
+                return {"error": "Geçersiz, kullanılmış veya süresi dolmuş token."}, 400
 
-            user = await Users.get(user_id=reset_data["user_id"])
-            user.password = hash_password(new_password)
-            await user.save()
+            user = await Users.get(user_id=int(user_id))
+            user.password = await hash_password_async(new_password)
 
-            # Kullanılan tokenı temizle
-            del AuthService._reset_tokens[token]
+            # Kaydetmeden hemen önce atomik olarak tüketilir (GETDEL); eşzamanlı ikinci istek burada elenir
+            if await store.pop(token) != user_id:
+                return {"error": "Geçersiz, kullanılmış veya süresi dolmuş token."}, 400
+            await user.save()
             
             logger.info(f"Password reset completed for user ID: {user.user_id}")
             return {"message": "Şifreniz başarıyla güncellendi. Giriş yapabilirsiniz."}, 200
 
+        except HashPoolSaturated:
+            logger.warning("Password hash pool saturated, rejecting password reset request")
+            return {"error": "Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin."}, 503
         except Exception as e:
             logger.error(f"Reset Completion Error: {str(e)}")
             return {"error": "Şifre güncellenirken bir hata oluştu."}, 500
\ No newline at end of file
@@ -0,0 +1,174 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime as http_date, parsedate_to_datetime
+from typing import AsyncIterator, Optional, Tuple
+from tortoise.expressions import F
+from src.models import EventParticipation, ParticipationStatus, Users
+from src.config import logger, CALENDAR_TOKEN_CACHE_TTL
+from src.cache import events_cache
+from src.ical import calendar_header, vevent, CALENDAR_FOOTER
+
+
+class CalendarService:
+    """
+    Kullanıcının katıldığı etkinliklerin .ics akışı (takvim uygulamalarının aboneliği için).
+
+    Takvim istemcileri ~15 dakikada bir yoklar. Doğrulayıcılar Redis'ten tek MGET ile okunur:
+      calendar:version:{uid}  -> kullanıcının katılımları değiştikçe artan sayaç
+      cache:events:gen        -> herhangi bir etkinlik yazıldıkça artan liste cache nesli
+      calendar:served:{uid}   -> son gönderilen "etag zaman" (Last-Modified / If-Modified-Since için)
+    ETag ikisinden türetilir; eşleşen yoklamalar veritabanına gitmeden 304 alır. Nesiller
+    veritabanı okumasından ÖNCE okunduğu için eş zamanlı bir değişiklik en kötü ihtimalle
+    bir sonraki yoklamada gelir.
+
+    Token'ın sürümü ve kullanıcının aktifliği de yoklama başına veritabanına gitmemek için
+    calendar:token:{uid} altında kısa süre tutulur; yenileme ve ban bu anahtarı siler.
+    """
+
+    BATCH_SIZE = 200
+    SERVED_TTL = 7 * 24 * 3600
+    INACTIVE = "-"
+
+    @staticmethod
+    def version_key(user_id: int) -> str:
+        return f"calendar:version:{user_id}"
+
+    @staticmethod
+    def served_key(user_id: int) -> str:
+        return f"calendar:served:{user_id}"
+
+    @staticmethod
+    def token_key(user_id: int) -> str:
+        return f"calendar:token:{user_id}"
+
+    @staticmethod
+    async def token_version(redis, user_id: int) -> Optional[int]:
+        """Aktif kullanıcının güncel token sürümü; kullanıcı yoksa veya banlıysa None."""
+        key = CalendarService.token_key(user_id)
+        if redis:
+            try:
+                cached = await redis.get(key)
+                if cached is not None:
+                    return None if cached == CalendarService.INACTIVE else int(cached)
+            except Exception as e:
+                logger.error(f"Calendar token lookup failed for user {user_id}: {str(e)}")
+
+        version = await Users.filter(user_id=user_id, is_deleted=False).first().values_list(
+            "calendar_token_version", flat=True
+        )
+        if redis:
+            try:
+                await redis.set(key, CalendarService.INACTIVE if version is None else version,
+                                ex=CALENDAR_TOKEN_CACHE_TTL)
+            except Exception as e:
+                logger.error(f"Calendar token cache write failed for user {user_id}: {str(e)}")
+        return version
+
+    @staticmethod
+    async def rotate_token(redis, user_id: int) -> Optional[int]:
+        """Token sürümünü artırır; eski abonelik adresleri hemen geçersizleşir. Yeni sürümü döner."""
+        await Users.filter(user_id=user_id).update(calendar_token_version=F("calendar_token_version") + 1)
+        await CalendarService.forget_token(redis, user_id)
+        return await CalendarService.token_version(redis, user_id)
+
+    @staticmethod
+    async def forget_token(redis, user_id: int):
+        """Sürüm/aktiflik bilgisini cache'ten düşürür (ban, yenileme)."""
+        if not redis:
+            return
+        try:
+            await redis.delete(CalendarService.token_key(user_id))
+        except Exception as e:
+            logger.error(f"Calendar token cache delete failed for user {user_id}: {str(e)}")
+
+    @staticmethod
+    async def touch(redis, user_id: int):
+        """Katılım değişince çağrılır; kullanıcının akışı bir sonraki yoklamada yeniden üretilir."""
+        if not redis:
+            return
+        try:
+            await redis.incr(CalendarService.version_key(user_id))
+        except Exception as e:
+            logger.error(f"Calendar version bump failed for user {user_id}: {str(e)}")
+
+    @staticmethod
+    async def validators(redis, user_id: int) -> Tuple[Optional[str], Optional[datetime]]:
+        """(etag, last_modified) döner; Redis yoksa (None, None) ve akış her seferinde üretilir."""
+        if not redis:
+            return None, None
+        try:
+            version, gen, served = await redis.mget(
+                CalendarService.version_key(user_id), events_cache.gen_key, CalendarService.served_key(user_id)
+            )
+        except Exception as e:
+            logger.error(f"Calendar validator lookup failed for user {user_id}: {str(e)}")
+            return None, None
+        etag = f'"{user_id}-{version or 0}-{gen or 0}"'
+        last_modified = None
+        if served:
+            served_etag, _, timestamp = served.rpartition(" ")
+            if served_etag == etag:
+                last_modified = datetime.fromtimestamp(int(timestamp), timezone.utc)
+        return etag, last_modified
+
+    @staticmethod
+    def is_not_modified(headers, etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+        if not etag:
+            return False
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match varsa If-Modified-Since yok sayılır (RFC 9110)
+            return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since and last_modified:
+            try:
+                return last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    async def remember(redis, user_id: int, etag: Optional[str], last_modified: Optional[datetime]) -> datetime:
+        """Gönderilen sürümü kaydeder; aynı sürüm tekrar gönderilirse ilk gönderim zamanı korunur."""
+        if last_modified:
+            return last_modified
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        if redis and etag:
+            try:
+                await redis.set(CalendarService.served_key(user_id), f"{etag} {int(now.timestamp())}",
+                                ex=CalendarService.SERVED_TTL)
+            except Exception as e:
+                logger.error(f"Calendar served marker failed for user {user_id}: {str(e)}")
+        return now
+
+    @staticmethod
+    def headers(etag: Optional[str], last_modified: datetime) -> dict:
+        headers = {"Last-Modified": http_date(last_modified, usegmt=True), "Cache-Control": "private, max-age=0"}
+        if etag:
+            headers["ETag"] = etag
+        return headers
+
+    @staticmethod
+    async def iter_feed(user_id: int, batch_size: int = BATCH_SIZE) -> AsyncIterator[str]:
+        """
+        VEVENT'leri katılım id'si üzerinde keyset dilimleriyle üretir: bellekte en fazla bir dilim
+        tutulur, satırlar model nesnesi yerine values_list ile okunur.
+        """
+        yield calendar_header("CampusHub Etkinliklerim")
+        last_id = 0
+        while True:
+            rows = await EventParticipation.filter(
+                user_id=user_id, status=ParticipationStatus.GOING, participation_id__gt=last_id,
+                event__is_deleted=False
+            ).order_by("participation_id").limit(batch_size).values_list(
+                "participation_id", "event__event_id", "event__title", "event__event_date", "event__end_time",
+                "event__location", "event__description", "event__updated_at"
+            )
+            if rows:
+                yield "".join(
+                    vevent(event_id, title, start, stamp or start, end, location, description)
+                    for _, event_id, title, start, end, location, description, stamp in rows
+                )
+                last_id = rows[-1][0]
+            if len(rows) < batch_size:
+                break
+        yield CALENDAR_FOOTER
@@ -1,8 +1,13 @@
-import json
 from src.models import Clubs, ClubFollowers, UserRole, Users, Events
-from tortoise.exceptions import DoesNotExist
+from tortoise.exceptions import DoesNotExist, IntegrityError
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
 from datetime import datetime, timezone
 from src.config import logger
+from src.cache import clubs_cache, events_cache
+from src.services.timeline_service import TimelineService
+from src.services.event_service import EventService
+from src.pagination import paginate_by_cursor, paginate_by_offset, ordered_batch, InvalidCursor
 
 class ClubService:
 
@@ -23,7 +28,7 @@ class ClubService:
             
             if status == "active":
                 logger.info(f"Club Created (Active) by Admin: {club.club_name}")
-                if redis: await redis.delete("clubs:all_active")
+                await clubs_cache.invalidate(redis)
                 msg = "Club created successfully"
             else:
                 logger.info(f"Club Application Submitted: {club.club_name} by User {user_ctx['sub']}")
@@ -61,7 +66,10 @@ class ClubService:
                     await user.save()
                     logger.info(f"User {user.user_id} promoted to CLUB_ADMIN upon club approval.")
             
-            if redis: await redis.delete("clubs:all_active")
+            # Etkinlik listesi ve akış sadece aktif kulüplerin etkinliklerini gösterir
+            await clubs_cache.invalidate(redis)
+            await events_cache.invalidate(redis)
+            await EventService.invalidate_club_details(redis, club_id)
             logger.info(f"Club Approved: {club.club_name} by Admin {user_ctx['sub']}")
             return {"message": f"'{club.club_name}' onaylandı ve başkanı yetkilendirildi."}, 200
         except DoesNotExist:
@@ -78,29 +86,46 @@ class ClubService:
             club.deleted_at = datetime.now(timezone.utc)
             await club.save()
             
-            if redis: await redis.delete("clubs:all_active")
+            # Etkinlik listesi sadece aktif kulüplerin etkinliklerini gösterir
+            await clubs_cache.invalidate(redis)
+            await events_cache.invalidate(redis)
+            await EventService.invalidate_club_details(redis, club_id)
+            TimelineService.schedule(TimelineService.retract_club, redis, club_id)
             logger.info(f"Club Deleted: {club.club_name} (ID: {club_id})")
             return {"message": "Club deleted successfully"}, 200
         except DoesNotExist:
             return {"error": "Club not found"}, 404
 
     @staticmethod
-    async def get_all_clubs(user_id=None, redis=None, page=1, limit=12):
-        """Tüm aktif kulüpleri sayfalar halinde listeler."""
-        # Cache key artık sayfaya özel olmalı
-        cache_key = f"clubs:active:p{page}:l{limit}"
-        
-        if not user_id and redis:
-            cached_data = await redis.get(cache_key)
+    async def get_all_clubs(user_id=None, redis=None, page=1, limit=12, cursor: str = None, with_total: bool = False):
+        """
+        Tüm aktif kulüpleri sayfalar halinde listeler.
+        cursor verilirse (boş string = ilk sayfa) club_id üzerinden keyset sayfalama yapılır.
+        """
+        # Sadece anonim liste cache'lenir (takip bilgisi kullanıcıya özel)
+        cache_key = None
+        if not user_id:
+            page_key = f"c:{cursor}:t{int(with_total)}" if cursor is not None else f"p{page}"
+            cached_data, cache_key = await clubs_cache.get(redis, f"{page_key}:l{limit}")
             if cached_data:
-                return json.loads(cached_data), 200
+                return cached_data, 200
         
-        # Pagination Mantığı
         query = Clubs.filter(is_deleted=False, status="active")
-        total_count = await query.count()
-        offset = (page - 1) * limit
-        
-        clubs = await query.offset(offset).limit(limit).all()
+        if cursor is not None:
+            try:
+                clubs, pagination = await paginate_by_cursor(query, [("club_id", int)], cursor, limit)
+            except InvalidCursor:
+                return {"error": "Invalid cursor"}, 400
+            if with_total:
+                pagination["total"] = await clubs_cache.count(redis, "active", query)
+        else:
+            clubs, total_count = await paginate_by_offset(query, ["club_id"], page, limit)
+            pagination = {
+                "total": total_count,
+                "page": page,
+                "limit": limit,
+                "total_pages": (total_count + limit - 1) // limit
+            }
         
         followed_club_ids = set()
         if user_id:
@@ -121,16 +146,10 @@ class ClubService:
             
         response_data = {
             "clubs": clubs_list,
-            "pagination": {
-                "total": total_count,
-                "page": page,
-                "limit": limit,
-                "total_pages": (total_count + limit - 1) // limit
-            }
+            "pagination": pagination
         }
         
-        if not user_id and redis: 
-            await redis.set(cache_key, json.dumps(response_data), ex=300)
+        await clubs_cache.set(redis, cache_key, response_data)
         
         return response_data, 200
 
@@ -142,30 +161,50 @@ class ClubService:
             club = await Clubs.get(club_id=club_id)
             if club.is_deleted: return {"error": "Club not found"}, 404
 
-            total_followers = await ClubFollowers.filter(club_id=club_id).count()
-            
-            return {
-                "club": {
-                    "id": club.club_id,
-                    "name": club.club_name,
-                    "description": club.description,
-                    "image_url": club.logo_url,
-                    "status": club.status,
-                    "president_id": club.president_id, 
-                    "follower_count": total_followers
-                }
-            }, 200
+            return {"club": ClubService._club_summary(club)}, 200
         except DoesNotExist:
             return {"error": "Club not found"}, 404
 
     @staticmethod
-    async def get_club_events_paginated(club_id: int, page=1, limit=5):
-        """Kulüp profili için postları (etkinlikleri) sayfalar."""
-        offset = (page - 1) * limit
-        query = Events.filter(club_id=club_id, is_deleted=False)
-        
-        total = await query.count()
-        events = await query.order_by("-event_date").offset(offset).limit(limit).all()
+    def _club_summary(club) -> dict:
+        return {
+            "id": club.club_id,
+            "name": club.club_name,
+            "description": club.description,
+            "image_url": club.logo_url,
+            "status": club.status,
+            "president_id": club.president_id,
+            "follower_count": club.follower_count
+        }
+
+    @staticmethod
+    async def get_clubs_by_ids(club_ids: list):
+        """Birden çok kulübü tek IN (...) sorgusuyla, istek sırasıyla döner (GET /clubs?ids=...)."""
+        clubs = await Clubs.filter(club_id__in=club_ids, is_deleted=False)
+        return ordered_batch(club_ids, {c.club_id: ClubService._club_summary(c) for c in clubs}), 200
+
+    @staticmethod
+    async def get_club_events_paginated(club_id: int, page=1, limit=5, cursor: str = None,
+                                        with_total: bool = False, redis=None):
+        """Kulüp profili için postları (etkinlikleri) sayfalar; cursor ile keyset modunda çalışır."""
+        query = Events.filter(club_id=club_id, is_deleted=False, series_id__isnull=True)
+
+        if cursor is not None:
+            try:
+                events, pagination = await paginate_by_cursor(
+                    query, [("-event_date", datetime), ("-event_id", int)], cursor, limit
+                )
+            except InvalidCursor:
+                return {"error": "Invalid cursor"}, 400
+            if with_total:
+                pagination["total"] = await events_cache.count(redis, f"club:{club_id}", query)
+        else:
+            events, total = await paginate_by_offset(query, ["-event_date", "-event_id"], page, limit)
+            pagination = {
+                "total": total,
+                "page": page,
+                "has_more": (page * limit) < total
+            }
         
         events_list = [{
             "id": e.event_id,
@@ -178,11 +217,7 @@ class ClubService:
 
         return {
             "events": events_list,
-            "pagination": {
-                "total": total,
-                "page": page,
-                "has_more": (page * limit) < total
-            }
+            "pagination": pagination
         }, 200
 
     @staticmethod
@@ -207,7 +242,7 @@ class ClubService:
             return {"error": "Club not found"}, 404
 
     @staticmethod
-    async def follow_club(user_ctx, club_id: int):
+    async def follow_club(user_ctx, club_id: int, redis=None):
         if user_ctx["role"] == UserRole.ADMIN:
              return {"error": "Admins cannot join clubs as members"}, 400
 
@@ -221,27 +256,48 @@ class ClubService:
 
             exists = await ClubFollowers.filter(user_id=user_ctx["sub"], club_id=club_id).exists()
             if exists: return {"message": "Already a member"}, 400
-            
-            await ClubFollowers.create(user_id=user_ctx["sub"], club_id=club_id)
+
+            # Takip satırı ve sayaç birlikte yazılır; eşzamanlı çift istekte unique kısıt devreye girer
+            async with in_transaction():
+                await ClubFollowers.create(user_id=user_ctx["sub"], club_id=club_id)
+                await ClubService._adjust_follower_count(club_id, 1)
+            await TimelineService.on_follow(redis, user_ctx["sub"], club_id)
             return {"message": f"Successfully joined {club.club_name}"}, 200
+        except IntegrityError:
+            return {"message": "Already a member"}, 400
         except DoesNotExist:
             return {"error": "Club not found"}, 404
 
     @staticmethod
-    async def leave_club(user_ctx, club_id: int):
-        deleted_count = await ClubFollowers.filter(user_id=user_ctx["sub"], club_id=club_id).delete()
+    async def _adjust_follower_count(club_id: int, delta: int):
+        """clubs.follower_count'u atomik olarak değiştirir (çağıranın transaction'ı içinde)."""
+        await Clubs.filter(club_id=club_id).update(follower_count=F("follower_count") + delta)
+
+    @staticmethod
+    async def _unfollow(club_id: int, user_id: int, redis=None) -> int:
+        async with in_transaction():
+            deleted_count = await ClubFollowers.filter(user_id=user_id, club_id=club_id).delete()
+            if deleted_count:
+                await ClubService._adjust_follower_count(club_id, -deleted_count)
+        if deleted_count:
+            await TimelineService.on_unfollow(redis, user_id, club_id)
+        return deleted_count
+
+    @staticmethod
+    async def leave_club(user_ctx, club_id: int, redis=None):
+        deleted_count = await ClubService._unfollow(club_id, user_ctx["sub"], redis)
         if deleted_count == 0:
             return {"error": "You are not a member of this club"}, 400
         return {"message": "Successfully left the club"}, 200
 
     @staticmethod
-    async def remove_follower(user_ctx, club_id: int, target_user_id: int):
+    async def remove_follower(user_ctx, club_id: int, target_user_id: int, redis=None):
         try:
             club = await Clubs.get(club_id=club_id)
             if not (user_ctx["role"] == UserRole.ADMIN or club.president_id == user_ctx["sub"]):
                 return {"error": "Unauthorized to manage members"}, 403
 
-            deleted_count = await ClubFollowers.filter(user_id=target_user_id, club_id=club_id).delete()
+            deleted_count = await ClubService._unfollow(club_id, target_user_id, redis)
             if deleted_count == 0: return {"error": "User is not a member"}, 404
             
             logger.info(f"User {target_user_id} removed from Club {club_id} by {user_ctx['sub']}")
@@ -1,10 +1,223 @@
+import json
+from typing import Iterable, List, Optional, Tuple
 from src.models import EventComments, Events, Users
 from tortoise.exceptions import DoesNotExist
+from src.config import (
+    logger, COMMENTS_PAGE_SIZE, COMMENTS_MAX_PAGE_SIZE, COMMENT_COUNT_TTL, COMMENT_THREAD_CACHE_TTL
+)
+from src.pagination import paginate_by_cursor, encode_cursor, InvalidCursor
+from src.realtime import RealtimeHub
+
+
+class CommentCounter:
+    """
+    Etkinlik başına yorum sayısı: comments:count:{event_id}.
+    Anahtar yoksa ilk okumada bir kez COUNT(*) ile doldurulur; ekleme/silme sadece var olan
+    anahtarı artırır/azaltır. TTL olası sapmayı sınırlar.
+    """
+
+    _INCR_IF_EXISTS = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+        if value < 0 then
+            redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+            return 0
+        end
+        return value
+    end
+    return false
+    """
+
+    @staticmethod
+    def key(event_id: int) -> str:
+        return f"comments:count:{event_id}"
+
+    @staticmethod
+    async def get(redis, event_id: int) -> int:
+        if redis:
+            try:
+                cached = await redis.get(CommentCounter.key(event_id))
+                if cached is not None:
+                    return int(cached)
+            except Exception as e:
+                logger.error(f"Comment counter read failed for event {event_id}: {str(e)}")
+                redis = None
+        count = await EventComments.filter(event_id=event_id).count()
+        if redis:
+            try:
+                await redis.set(CommentCounter.key(event_id), count, ex=COMMENT_COUNT_TTL, nx=True)
+            except Exception as e:
+                logger.error(f"Comment counter write failed for event {event_id}: {str(e)}")
+        return count
+
+    @staticmethod
+    async def adjust(redis, event_id: int, amount: int):
+        if not redis:
+            return
+        try:
+            await redis.eval(CommentCounter._INCR_IF_EXISTS, 1, CommentCounter.key(event_id), amount)
+        except Exception as e:
+            logger.error(f"Comment counter update failed for event {event_id}: {str(e)}")
+
+
+class CommentThreadCache:
+    """
+    Yorum dizisinin ilk sayfası için write-through Redis listesi: comments:thread:{event_id}
+    En yeni başta, render edilmiş yorum JSON'ları; en fazla SIZE eleman tutulur. Listenin
+    sonundaki END işareti dizinin tamamının listede olduğunu gösterir (daha eski yorum yok).
+
+    comments:thread:{event_id}:v yazma neslidir: ekleme/silme commit'ten sonra artırır, soğuk
+    doldurma nesli veritabanı okumasından ÖNCE okur ve değişmişse listeyi yazmaz. Böylece
+    doldurma ile eşzamanlı eklenen bir yorum listede eksik kalamaz.
+    """
+
+    END = "_"
+    SIZE = COMMENTS_MAX_PAGE_SIZE + 1
+
+    _FILL = """
+    if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+        return 0
+    end
+    redis.call('DEL', KEYS[1])
+    redis.call('RPUSH', KEYS[1], unpack(ARGV, 3))
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    _APPEND = """
+    redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        redis.call('LPUSH', KEYS[1], ARGV[1])
+        redis.call('LTRIM', KEYS[1], 0, ARGV[3] - 1)
+        return 1
+    end
+    return 0
+    """
+
+    @staticmethod
+    def key(event_id: int) -> str:
+        return f"comments:thread:{event_id}"
+
+    @staticmethod
+    def version_key(event_id: int) -> str:
+        return f"comments:thread:{event_id}:v"
+
+    @staticmethod
+    async def version(redis, event_id: int) -> Optional[str]:
+        try:
+            return await redis.get(CommentThreadCache.version_key(event_id)) or "0"
+        except Exception as e:
+            logger.error(f"Comment thread version read failed for event {event_id}: {str(e)}")
+            return None
+
+    @staticmethod
+    async def fill(redis, event_id: int, version: Optional[str], comments: List[dict], complete: bool):
+        if version is None:
+            return
+        items = [json.dumps(c) for c in comments[:CommentThreadCache.SIZE]]
+        if complete:
+            items.append(CommentThreadCache.END)
+        try:
+            await redis.eval(
+                CommentThreadCache._FILL, 2, CommentThreadCache.key(event_id), CommentThreadCache.version_key(event_id),
+                version, COMMENT_THREAD_CACHE_TTL, *items
+            )
+        except Exception as e:
+            logger.error(f"Comment thread fill failed for event {event_id}: {str(e)}")
+
+    @staticmethod
+    async def append(redis, event_id: int, comment: dict):
+        """Yeni yorumu liste sıcaksa başa ekler; soğuksa sadece nesli artırır."""
+        if not redis:
+            return
+        try:
+            await redis.eval(
+                CommentThreadCache._APPEND, 2, CommentThreadCache.key(event_id), CommentThreadCache.version_key(event_id),
+                json.dumps(comment), COMMENT_THREAD_CACHE_TTL, CommentThreadCache.SIZE
+            )
+        except Exception as e:
+            logger.error(f"Comment thread append failed for event {event_id}: {str(e)}")
+
+    @staticmethod
+    async def invalidate(redis, event_ids: Iterable[int]):
+        """Silme ve yazar profil değişikliklerinde: listeler silinir, nesil artar (tek pipeline)."""
+        event_ids = list(event_ids)
+        if not redis or not event_ids:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for event_id in event_ids:
+                pipe.incr(CommentThreadCache.version_key(event_id))
+                pipe.expire(CommentThreadCache.version_key(event_id), COMMENT_THREAD_CACHE_TTL)
+                pipe.delete(CommentThreadCache.key(event_id))
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Comment thread invalidation failed: {str(e)}")
+
+    @staticmethod
+    async def read(redis, event_id: int, limit: int, since: int = None) -> Optional[Tuple[List[dict], bool]]:
+        """
+        İlk sayfayı (since verilirse o id'den yeni yorumları) listeden çıkarır: (yorumlar, has_more).
+        Liste yoksa ya da istenen sayfa için yetmiyorsa None döner ve veritabanına düşülür.
+        """
+        if not redis:
+            return None
+        try:
+            items = await redis.lrange(CommentThreadCache.key(event_id), 0, limit)
+        except Exception as e:
+            logger.error(f"Comment thread read failed for event {event_id}: {str(e)}")
+            return None
+        comments = []
+        for raw in items:
+            if raw == CommentThreadCache.END:
+                return comments, False
+            comment = json.loads(raw)
+            if since is not None and comment["id"] <= since:
+                return comments, False
+            if len(comments) == limit:
+                return comments, True
+            comments.append(comment)
+        return None
+
 
 class CommentService:
 
     @staticmethod
-    async def add_comment(user_ctx, event_id: int, content: str):
+    def event_channel(event_id: int) -> str:
+        """Etkinlik sayfasını izleyenlerin canlı yorum kanalı (sadece değişiklikler yayınlanır)."""
+        return f"comments:live:{event_id}"
+
+    @staticmethod
+    async def is_watchable(event_id: int) -> bool:
+        return await Events.exists(event_id=event_id, is_deleted=False)
+
+    @staticmethod
+    def _render(comment, user) -> dict:
+        """Yorum kartı: yorum + yazarın görünen bilgileri (yazar yoksa anonim)."""
+        if user:
+            user_data = {
+                "user_name": f"{user.first_name} {user.last_name}",
+                "department": user.department,
+                "user_id": user.user_id,
+                "profile_photo": user.profile_image
+            }
+        else:
+            user_data = {
+                "user_name": "Anonim Kullanıcı",
+                "department": "",
+                "user_id": None,
+                "profile_photo": None
+            }
+        return {
+            "id": comment.comment_id,
+            "content": comment.content,
+            "created_at": comment.created_at.strftime("%d %b %Y %H:%M"),
+            **user_data
+        }
+
+    @staticmethod
+    async def add_comment(user_ctx, event_id: int, content: str, redis=None):
         # 1. Etkinlik kontrolü
         if not await Events.exists(event_id=event_id):
             return {"error": "Event not found"}, 404
@@ -19,51 +232,71 @@ class CommentService:
                 event_id=event_id,
                 content=content
             )
+            rendered = CommentService._render(comment, user)
+            await CommentCounter.adjust(redis, event_id, 1)
+            await CommentThreadCache.append(redis, event_id, rendered)
+            await RealtimeHub.publish(redis, CommentService.event_channel(event_id), "comment", rendered)
 
             # 4. Frontend'e hemen göstermek için detaylı obje döndür
             return {
-                "message": "Yorum eklendi", 
-                "comment": {
-                    "id": comment.comment_id,
-                    "content": comment.content,
-                    "user_name": f"{user.first_name} {user.last_name}",
-                    "department": user.department,          # YENİ: Bölüm Bilgisi
-                    "user_id": user.user_id,                # YENİ: Profil Linki İçin ID
-                    "profile_photo": user.profile_image,    # YENİ: Avatar İçin
-                    "created_at": comment.created_at.strftime("%d %b %Y %H:%M") # Formatlı Tarih
-                }
+                "message": "Yorum eklendi",
+                "comment": rendered
             }, 201
         except DoesNotExist:
             return {"error": "User not found"}, 404
 
     @staticmethod
-    async def get_comments(event_id: int):
-        # Yorumları ve kullanıcı detaylarını getir
-        comments = await EventComments.filter(event_id=event_id).prefetch_related("user").order_by("-created_at")
-        
-        result = []
-        for c in comments:
-            # Kullanıcı varsa bilgilerini al, yoksa (silinmişse) anonim yap
-            if c.user:
-                user_data = {
-                    "user_name": f"{c.user.first_name} {c.user.last_name}",
-                    "department": c.user.department,        # YENİ
-                    "user_id": c.user.user_id,              # YENİ
-                    "profile_photo": c.user.profile_image   # YENİ
-                }
+    async def get_comments(event_id: int, limit: int = COMMENTS_PAGE_SIZE, before: str = None,
+                           since: int = None, redis=None):
+        """
+        Yorumlar en yeniden eskiye, comment_id üzerinde keyset ile sayfalanır (?before=<next_cursor>).
+        Yazarlar aynı sorguda JOIN ile gelir. Sayı (count) Redis'teki sayaçtan, sadece ilk sayfada döner.
+        İlk sayfa ve since modu sıcak CommentThreadCache listesinden SQL çalıştırmadan okunur.
+        since=<latest_id> modu yalnızca o id'den yeni yorumları döner (canlı yenileme için);
+        has_more true ise arada limit'ten fazla yorum birikmiştir, ilk sayfa yeniden çekilmelidir.
+        """
+        query = EventComments.filter(event_id=event_id).select_related("user")
+
+        if since is not None:
+            cached = await CommentThreadCache.read(redis, event_id, limit, since)
+            if cached:
+                comments, has_more = cached
             else:
-                user_data = {
-                    "user_name": "Anonim Kullanıcı",
-                    "department": "",
-                    "user_id": None,
-                    "profile_photo": None
-                }
-
-            result.append({
-                "id": c.comment_id,
-                "content": c.content,
-                "created_at": c.created_at.strftime("%d %b %Y %H:%M"),
-                **user_data # user_data içindeki tüm alanları buraya yay
-            })
-            
-        return {"comments": result}, 200
\ No newline at end of file
+                rows = await query.filter(comment_id__gt=since).order_by("-comment_id").limit(limit + 1)
+                comments, has_more = [CommentService._render(c, c.user) for c in rows[:limit]], len(rows) > limit
+            return {
+                "comments": comments,
+                "latest_id": comments[0]["id"] if comments else since,
+                "has_more": has_more,
+                "count": await CommentCounter.get(redis, event_id),
+            }, 200
+
+        if before:
+            try:
+                rows, pagination = await paginate_by_cursor(query, [("-comment_id", int)], before, limit)
+            except InvalidCursor:
+                return {"error": "Invalid cursor"}, 400
+            return {"comments": [CommentService._render(c, c.user) for c in rows], "pagination": pagination}, 200
+
+        # İlk sayfa: sıcak listeden SQL'siz; soğuksa SIZE yorum okunup liste doldurulur
+        cached = await CommentThreadCache.read(redis, event_id, limit)
+        if cached:
+            comments, has_more = cached
+        else:
+            version = await CommentThreadCache.version(redis, event_id) if redis else None
+            rows = await query.order_by("-comment_id").limit(CommentThreadCache.SIZE if redis else limit + 1)
+            rendered = [CommentService._render(c, c.user) for c in rows]
+            if redis:
+                await CommentThreadCache.fill(redis, event_id, version, rendered, len(rows) < CommentThreadCache.SIZE)
+            comments, has_more = rendered[:limit], len(rendered) > limit
+
+        return {
+            "comments": comments,
+            "pagination": {
+                "limit": limit,
+                "has_more": has_more,
+                "next_cursor": encode_cursor(comments[-1]["id"]) if has_more else None
+            },
+            "count": await CommentCounter.get(redis, event_id),
+            "latest_id": comments[0]["id"] if comments else 0,
+        }, 200
@@ -1,15 +1,27 @@
-import json
 from src.models import Events, Clubs, EventParticipation, ParticipationStatus, UserRole, EventComments, Users
 from tortoise.exceptions import DoesNotExist
 from src.services.notification_service import NotificationService
-from datetime import datetime, timezone
+from src.services.reservation_service import SeatReservations, SeatFull, AlreadyJoined
+from src.services.timeline_service import TimelineService
+from src.services.calendar_service import CalendarService
+from datetime import datetime, timedelta, timezone
+from tortoise import Tortoise
+from tortoise.exceptions import IntegrityError
 from tortoise.expressions import Q
 from src.config import logger
+from src.cache import events_cache, event_detail_cache
+from src.pagination import (
+    encode_cursor, decode_cursor, keyset_filter, ordered_batch, InvalidCursor
+)
+from src.search import event_index, parse_query, mysql_boolean_query, BooleanMatch, MYSQL_MIN_TOKEN_SIZE
+from src.recurrence import (
+    InvalidRecurrence, parse_rule, series_end, occurrences, next_occurrence, is_occurrence, parse_occurrence
+)
 
 class EventService:
 
     @staticmethod
-    async def create_event(user_ctx, data):
+    async def create_event(user_ctx, data, redis=None):
         """
         Yeni bir etkinlik oluşturur ve takipçilere bildirim gönderir.
         Kapasite (kontenjan) kontrolü eklenmiştir.
@@ -33,20 +45,36 @@ class EventService:
         except (ValueError, TypeError):
             return {"error": "Lütfen geçerli bir sayısal kapasite değeri girin."}, 400
 
+        # Tekrarlayan seri tek satırdır; tekrarlar okuma anında hesaplanır (src/recurrence.py)
+        try:
+            recurrence = parse_rule(data.get("recurrence"))
+            event_date = parse_occurrence(data.get("date"), datetime.now(timezone.utc)) if recurrence else data.get("date")
+        except InvalidRecurrence as e:
+            return {"error": str(e)}, 400
+
         try:
             event = await Events.create(
                 title=data.get("title"),
                 description=data.get("description"),
-                event_date=data.get("date"),
+                event_date=event_date,
                 location=data.get("location"),
                 quota=capacity,
                 club_id=club_id,
                 image_url=data.get("image_url"),
-                created_by_id=user_ctx["sub"]
+                created_by_id=user_ctx["sub"],
+                recurrence=recurrence,
+                recurrence_until=series_end(event_date, recurrence) if recurrence else None
             )
             
             logger.info(f"Event Created: '{event.title}' (ID: {event.event_id})")
-            await NotificationService.notify_followers(club.club_id, club.club_name, event.title)
+            EventService._index_event(event)
+            await events_cache.invalidate(redis)
+            # Takipçi bildirimleri arka planda, parça parça yazılır
+            NotificationService.schedule_notify_followers(club.club_id, club.club_name, event.title, event.event_id, redis)
+            TimelineService.schedule(
+                TimelineService.publish, redis, event.event_id, club.club_id, EventService._upcoming_date(event),
+                bool(event.recurrence)
+            )
             
             return {"message": "Event created successfully", "event_id": event.event_id}, 201
         except Exception as e:
@@ -54,7 +82,7 @@ class EventService:
             return {"error": "An error occurred while creating the event."}, 500
 
     @staticmethod
-    async def update_event(user_ctx, event_id: int, data: dict):
+    async def update_event(user_ctx, event_id: int, data: dict, redis=None):
         """Var olan bir etkinliği günceller."""
         try:
             event = await Events.get(event_id=event_id).prefetch_related("club")
@@ -78,13 +106,35 @@ class EventService:
                 except ValueError: 
                     return {"error": "Invalid capacity"}, 400
 
+            if "recurrence" in data or (event.recurrence and "date" in data):
+                if event.series_id:
+                    return {"error": "A single occurrence cannot be made recurring"}, 400
+                try:
+                    event.recurrence = parse_rule(data.get("recurrence", event.recurrence))
+                    if event.recurrence:
+                        event.event_date = parse_occurrence(event.event_date, datetime.now(timezone.utc))
+                except InvalidRecurrence as e:
+                    return {"error": str(e)}, 400
+                event.recurrence_until = series_end(event.event_date, event.recurrence) if event.recurrence else None
+
             await event.save()
+            EventService._index_event(event)
+            await events_cache.invalidate(redis)
+            await event_detail_cache.invalidate(redis, event_id)
+            await EventService._propagate_to_occurrences(event, data, redis)
+            if "date" in data or "recurrence" in data:
+                # Yeni tarih için hatırlatma tekrar gönderilebilsin
+                await Events.filter(event_id=event_id).update(reminder_sent_at=None)
+                TimelineService.schedule(
+                    TimelineService.publish, redis, event.event_id, event.club_id, EventService._upcoming_date(event),
+                    bool(event.recurrence)
+                )
             return {"message": "Event updated successfully"}, 200
         except DoesNotExist:
             return {"error": "Event not found"}, 404
 
     @staticmethod
-    async def delete_event(user_ctx, event_id: int):
+    async def delete_event(user_ctx, event_id: int, redis=None):
         """Etkinliği siler (Soft-delete)."""
         try:
             event = await Events.get(event_id=event_id).prefetch_related("club")
@@ -94,47 +144,185 @@ class EventService:
             event.is_deleted = True
             event.deleted_at = datetime.now(timezone.utc)
             await event.save()
+            EventService._index_event(event)
+            await events_cache.invalidate(redis)
+            await event_detail_cache.invalidate(redis, event_id)
+            if event.recurrence:
+                children = Events.filter(series_id=event_id, is_deleted=False)
+                for child_id in await children.values_list("event_id", flat=True):
+                    await event_detail_cache.invalidate(redis, child_id)
+                await children.update(is_deleted=True, deleted_at=event.deleted_at)
+            TimelineService.schedule(TimelineService.retract, redis, event.event_id, event.club_id)
             return {"message": "Event deleted successfully"}, 200
         except DoesNotExist:
             return {"error": "Event not found"}, 404
 
+    # Seri düzenlenince somutlaşmış tekrarlara da yansıyan ortak alanlar (istek anahtarı -> kolon)
+    SHARED_FIELDS = {"title": "title", "description": "description", "location": "location",
+                     "image_url": "image_url", "capacity": "quota"}
+
+    @staticmethod
+    async def _propagate_to_occurrences(series, data: dict, redis=None):
+        """Serideki ortak alan değişikliklerini katılım almış tekrar satırlarına tek UPDATE ile yazar."""
+        if not series.recurrence:
+            return
+        changes = {column: getattr(series, column) for key, column in EventService.SHARED_FIELDS.items() if key in data}
+        if not changes:
+            return
+        children = Events.filter(series_id=series.event_id, is_deleted=False)
+        child_ids = await children.values_list("event_id", flat=True)
+        if "title" in changes or "description" in changes:
+            # update() save()'i atlar; arama dokümanı da seri ile aynı olur
+            changes["search_document"] = series.search_document
+        await children.update(**changes)
+        for child_id in child_ids:
+            await event_detail_cache.invalidate(redis, child_id)
+
     @staticmethod
-    async def get_event_detail(event_id: int, user_ctx=None): 
-        """Etkinlik detaylarını getirir."""
+    def _upcoming_date(event):
+        """Zaman tüneli için tarih: seride sıradaki tekrar (seri bittiyse ilk tarih, yayından kalkar)."""
+        if not event.recurrence:
+            return event.event_date
+        return next_occurrence(event.event_date, event.recurrence, datetime.now(timezone.utc)) or event.event_date
+
+    @staticmethod
+    async def _materialize_occurrence(series, occurrence):
+        """
+        Serinin bir tekrarını katılım alabilmesi için kendi satırına somutlaştırır (yoksa oluşturur).
+        Koltuk, sayaç, hatırlatma ve detay yolları bu satır üzerinde değişmeden çalışır.
+        (series_id, event_date) benzersiz olduğundan eşzamanlı iki ilk katılım aynı satırda buluşur.
+        """
+        when = parse_occurrence(occurrence, series.event_date)
+        if not is_occurrence(series.event_date, series.recurrence, when):
+            raise InvalidRecurrence("Not an occurrence of this event")
         try:
-            event = await Events.get(event_id=event_id).prefetch_related("club")
-            if event.is_deleted: return {"error": "Event not found"}, 404
-            
-            participant_count = await EventParticipation.filter(
-                event_id=event_id, status=ParticipationStatus.GOING
-            ).count()
-
-            is_joined = False
-            if user_ctx and user_ctx.get("sub"):
-                is_joined = await EventParticipation.filter(
-                    event_id=event_id, 
-                    user_id=user_ctx["sub"], 
-                    status=ParticipationStatus.GOING
-                ).exists()
-            
-            return {
-                "event": {
-                    "id": event.event_id,
-                    "title": event.title,
-                    "description": event.description,
-                    "date": str(event.event_date),
-                    "location": event.location,
-                    "capacity": event.quota,
-                    "image_url": event.image_url,
-                    "club_name": event.club.club_name if event.club else "Unknown",
-                    "club_id": event.club.club_id if event.club else None,
-                    "participant_count": participant_count,
-                    "is_joined": is_joined,
-                    "is_full": event.quota > 0 and participant_count >= event.quota
+            child, _ = await Events.get_or_create(
+                series_id=series.event_id, event_date=when,
+                defaults={
+                    "title": series.title, "description": series.description, "location": series.location,
+                    "quota": series.quota, "club_id": series.club_id, "image_url": series.image_url,
+                    "created_by_id": series.created_by_id,
                 }
-            }, 200
+            )
+        except IntegrityError:
+            child = await Events.get(series_id=series.event_id, event_date=when)
+        return child
+
+    @staticmethod
+    async def cancel_occurrence(user_ctx, event_id: int, occurrence, redis=None):
+        """Serinin tek bir tekrarını iptal eder: tarih istisnalara eklenir, somutlaşmış satır silinir."""
+        try:
+            event = await Events.get(event_id=event_id).prefetch_related("club")
         except DoesNotExist:
             return {"error": "Event not found"}, 404
+        if event.is_deleted or not event.recurrence:
+            return {"error": "Recurring event not found"}, 404
+        if not (user_ctx["role"] == UserRole.ADMIN or event.club.president_id == user_ctx["sub"]):
+            return {"error": "Unauthorized"}, 403
+        try:
+            when = parse_occurrence(occurrence, event.event_date)
+            if not is_occurrence(event.event_date, event.recurrence, when):
+                return {"error": "Not an occurrence of this event"}, 400
+            event.recurrence = parse_rule({**event.recurrence, "exdates": [*event.recurrence["exdates"], when]})
+        except InvalidRecurrence as e:
+            return {"error": str(e)}, 400
+
+        await event.save(update_fields=["recurrence"])
+        child = await Events.get_or_none(series_id=event_id, event_date=when, is_deleted=False)
+        if child:
+            child.is_deleted = True
+            child.deleted_at = datetime.now(timezone.utc)
+            await child.save(update_fields=["is_deleted", "deleted_at"])
+            await event_detail_cache.invalidate(redis, child.event_id)
+        await events_cache.invalidate(redis)
+        await event_detail_cache.invalidate(redis, event_id)
+        TimelineService.schedule(
+            TimelineService.publish, redis, event.event_id, event.club_id, EventService._upcoming_date(event),
+            bool(event.recurrence)
+        )
+        return {"message": "Occurrence cancelled"}, 200
+
+    @staticmethod
+    async def get_event_detail(event_id: int, user_ctx=None, redis=None):
+        """
+        Etkinlik detaylarını getirir. Herkese aynı olan kısım event_detail_cache'te paylaşılır,
+        is_joined ise etkinliğin koltuk kümesinden (SeatReservations) aynı Redis çağrısında okunur;
+        ikisi de sıcakken görüntüleme SQL çalıştırmaz.
+        """
+        user_id = user_ctx.get("sub") if user_ctx else None
+        detail, is_joined, version = await event_detail_cache.get(
+            redis, event_id, SeatReservations.key(event_id), user_id
+        )
+        if detail is None:
+            try:
+                event = await Events.get(event_id=event_id).prefetch_related("club")
+            except DoesNotExist:
+                return {"error": "Event not found"}, 404
+            if event.is_deleted: return {"error": "Event not found"}, 404
+
+            detail = EventService._public_detail(event)
+            await event_detail_cache.set(redis, event_id, detail, version)
+
+        if user_id and is_joined is None:
+            is_joined = await EventService._is_joined(redis, event_id, user_id)
+        return {"event": {**detail, "is_joined": bool(is_joined)}}, 200
+
+    @staticmethod
+    async def invalidate_club_details(redis, club_id: int):
+        """Detay cache'i kulüp adını içerir; kulüp güncellenince/silinince etkinliklerinin detayı düşürülür."""
+        if not redis:
+            return
+        event_ids = await Events.filter(club_id=club_id).values_list("event_id", flat=True)
+        await event_detail_cache.invalidate_many(redis, event_ids)
+
+    @staticmethod
+    def _public_detail(event) -> dict:
+        """Detay sayfasının kullanıcıdan bağımsız kısmı (club prefetch edilmiş olmalı)."""
+        return {
+            "id": event.event_id,
+            "title": event.title,
+            "description": event.description,
+            "date": str(event.event_date),
+            "location": event.location,
+            "capacity": event.quota,
+            "image_url": event.image_url,
+            "club_name": event.club.club_name if event.club else "Unknown",
+            "club_id": event.club.club_id if event.club else None,
+            "club_status": event.club.status if event.club else None,
+            "participant_count": event.participant_count,
+            "is_full": event.quota > 0 and event.participant_count >= event.quota,
+            "recurrence": event.recurrence,
+            "series_id": event.series_id
+        }
+
+    @staticmethod
+    async def get_events_by_ids(event_ids: list, redis=None):
+        """
+        Birden çok etkinliğin detayını istek sırasıyla döner (GET /events?ids=...).
+        Detay cache'i tek MGET ile okunur; eksikler tek IN (...) sorgusu + kulüp prefetch'i ile
+        getirilip cache'e yazılır. Silinmiş/bulunamayan id'ler "missing" listesinde döner.
+        """
+        found, versions = await event_detail_cache.get_many(redis, event_ids)
+        pending = [i for i in event_ids if i not in found]
+        if pending:
+            events = await Events.filter(event_id__in=pending, is_deleted=False).prefetch_related("club")
+            fetched = {e.event_id: EventService._public_detail(e) for e in events}
+            await event_detail_cache.set_many(redis, fetched, versions)
+            found.update(fetched)
+        return ordered_batch(event_ids, found), 200
+
+    @staticmethod
+    async def _is_joined(redis, event_id: int, user_id: int) -> bool:
+        """Koltuk kümesi Redis'te yoksa bir kez yüklenir (sonraki görüntülemeler ve katılımlar için)."""
+        if redis:
+            try:
+                await SeatReservations.load(redis, event_id)
+                return bool(await redis.sismember(SeatReservations.key(event_id), user_id))
+            except Exception as e:
+                logger.error(f"Seat set lookup failed for event {event_id}: {str(e)}")
+        return await EventParticipation.filter(
+            event_id=event_id, user_id=user_id, status=ParticipationStatus.GOING
+        ).exists()
 
     @staticmethod
     async def add_comment(user_ctx, event_id: int, content: str):
@@ -179,64 +367,359 @@ class EventService:
         }, 200
 
     @staticmethod
-    async def get_events(redis, page: int = 1, limit: int = 20, search: str = None, date_filter: str = None):
-        """Etkinlikleri listeler."""
-        cache_key = f"events:page:{page}:lim:{limit}:s:{search}:d:{date_filter}"
-        if redis:
-            cached_data = await redis.get(cache_key)
-            if cached_data: return json.loads(cached_data), 200
+    async def _ensure_search_index():
+        """SQLite yolunda bellek içi arama indeksini ilk aramada bir kez doldurur."""
+        if event_index.ready:
+            return
+        rows = await Events.filter(is_deleted=False, series_id__isnull=True).values_list(
+            "event_id", "title", "description", "club_id"
+        )
+        for event_id, title, description, club_id in rows:
+            event_index.add(event_id, title, description, meta=club_id)
+        event_index.ready = True
+        logger.info(f"Event search index built: {len(event_index)} events")
 
-        query = Events.filter(is_deleted=False, club__status="active")
-        if search:
-            query = query.filter(Q(title__icontains=search) | Q(description__icontains=search))
+    @staticmethod
+    def _index_event(event):
+        """Yazma yollarında bellek içi indeksi günceller (indeks hiç kurulmadıysa gerek yok)."""
+        if not event_index.ready or event.series_id:
+            return
+        if event.is_deleted:
+            event_index.remove(event.event_id)
+        else:
+            event_index.add(event.event_id, event.title, event.description, meta=event.club_id)
+
+    @staticmethod
+    async def _search_events(query, tokens, offset: int, limit: int, date_filter: str = None):
+        """
+        Arama sonucunu alaka skoruna göre sıralı (toplam, sayfa) olarak döner.
+        MySQL: search_document üzerinde FULLTEXT (BOOLEAN MODE, önek eşleşmesi).
+        Diğer: bellek içi ters indeks; kulüp filtresi bellekte, tarih filtresi veritabanında uygulanır.
+        """
+        if Tortoise.get_connection("default").capabilities.dialect == "mysql":
+            # innodb_ft_min_token_size'dan kısa kelimeler indekste yok, katlanmış dokümanda aranır
+            for token in tokens:
+                if len(token) < MYSQL_MIN_TOKEN_SIZE:
+                    query = query.filter(search_document__contains=token)
+            order = ["event_date"]
+            boolean_query = mysql_boolean_query(tokens)
+            if boolean_query:
+                query = query.annotate(relevance=BooleanMatch("search_document", boolean_query)) \
+                    .filter(relevance__gt=0)
+                order.insert(0, "-relevance")
+            total = await query.count()
+            events = await query.prefetch_related("club").order_by(*order).offset(offset).limit(limit)
+            return total, events
+
+        await EventService._ensure_search_index()
+        ranked = event_index.search(tokens)
+        if not ranked:
+            return 0, []
         if date_filter:
-            query = query.filter(event_date__gte=date_filter)
+            if len(ranked) <= 1000:
+                query = query.filter(event_id__in=[event_id for event_id, _ in ranked])
+            allowed = set(await query.values_list("event_id", flat=True))
+            ordered = [event_id for event_id, _ in ranked if event_id in allowed]
+        else:
+            # İndeks kulüp id'sini tuttuğu için aktif kulüp filtresi bellekte uygulanır
+            active_clubs = set(await Clubs.filter(status="active").values_list("club_id", flat=True))
+            ordered = [event_id for event_id, _ in ranked if event_index.meta(event_id) in active_clubs]
+        page_ids = ordered[offset:offset + limit]
+        events = await Events.filter(event_id__in=page_ids).prefetch_related("club")
+        position = {event_id: i for i, event_id in enumerate(page_ids)}
+        events.sort(key=lambda e: position[e.event_id])
+        return len(ordered), events
 
-        total_count = await query.count()
-        offset = (page - 1) * limit
-        events = await query.prefetch_related("club").order_by("event_date").offset(offset).limit(limit)
-        
+    # Sonsuz serilerin liste görünümünde genişletildiği ufuk (bugünden/date filtresinden/ilk tekrardan itibaren)
+    SERIES_HORIZON_DAYS = 92
+
+    @staticmethod
+    async def _series_occurrences(query, window_start: datetime = None) -> list:
+        """
+        Serilerin tekrarları (anahtar, seri, tekrar) olarak, (tarih, id) sırasıyla. Seriler az sayıda
+        olduğundan bellekte genişletilir; her seri window_start'tan (yoksa ilk tekrarından) ufka
+        kadar tekrar üretir. Anahtar tekil etkinliklerle aynı biçimdedir (_list_key).
+        """
+        now = datetime.now(timezone.utc)
+        if window_start:
+            query = query.filter(Q(recurrence_until__isnull=True) | Q(recurrence_until__gte=window_start))
+        rows = []
+        for e in await query.filter(recurrence__isnull=False).prefetch_related("club"):
+            first = parse_occurrence(e.event_date, now)
+            start = max(first, window_start) if window_start else first
+            horizon = max(now, start) + timedelta(days=EventService.SERIES_HORIZON_DAYS)
+            for when in occurrences(e.event_date, e.recurrence, start, horizon):
+                rows.append(((parse_occurrence(when, now), e.event_id), e, when))
+        rows.sort(key=lambda row: row[0])
+        return rows
+
+    @staticmethod
+    def _list_key(event_date, event_id: int):
+        """Tekil etkinlik ve tekrarların birlikte sıralandığı (tarih, id) anahtarı."""
+        return parse_occurrence(event_date, datetime.now(timezone.utc)), event_id
+
+    @staticmethod
+    async def _merge_page(singles, series: list, offset: int, limit: int) -> list:
+        """
+        Tekil etkinlikler (SQL, tarih sırasında) ile seri tekrarlarının birleşik sırasında
+        [offset, offset + limit) aralığı. Sayfadan önce gelen tekrar sayısı (k) ikili aramayla
+        bulunur; her adım tek satırlık bir OFFSET sorgusudur, pencere bellekte toplanmaz.
+        """
+        single_count = await singles.count()
+
+        async def single_key(position):
+            if position >= single_count:
+                return None
+            row = await singles.order_by("event_date", "event_id").offset(position).limit(1) \
+                .values_list("event_date", "event_id")
+            return EventService._list_key(*row[0])
+
+        # k tekrar sayfadan önceyse son tekrar, sayfadan önceki son tekil etkinlikten sonra gelmemeli
+        low, high = max(0, offset - single_count), min(offset, len(series))
+        while low < high:
+            k = (low + high + 1) // 2
+            after = await single_key(offset - k)
+            if after is None or series[k - 1][0] < after:
+                low = k
+            else:
+                high = k - 1
+
+        rows = await singles.prefetch_related("club").order_by("event_date", "event_id") \
+            .offset(offset - low).limit(limit)
+        merged = [(EventService._list_key(e.event_date, e.event_id), e, e.event_date) for e in rows]
+        merged += series[low:low + limit]
+        merged.sort(key=lambda row: row[0])
+        return merged[:limit]
+
+    @staticmethod
+    async def _occurrence_rows(page: list) -> dict:
+        """Sayfadaki tekrarların somutlaşmış satırları: {_list_key(tarih, seri id): satır id}."""
+        wanted = [(e.event_id, when) for _, e, when in page if e.recurrence]
+        if not wanted:
+            return {}
+        rows = await Events.filter(
+            series_id__in=list({series_id for series_id, _ in wanted}),
+            event_date__in=list({when for _, when in wanted}), is_deleted=False
+        ).values_list("event_id", "series_id", "event_date")
+        return {EventService._list_key(event_date, series_id): child_id for child_id, series_id, event_date in rows}
+
+    @staticmethod
+    async def get_events(redis, page: int = 1, limit: int = 20, search: str = None, date_filter: str = None,
+                         cursor: str = None, with_total: bool = False):
+        """
+        Etkinlikleri listeler. Arama varsa sonuçlar tarih yerine alaka skoruna göre sıralanır.
+        cursor verilirse (boş string = ilk sayfa) keyset sayfalama kullanılır; toplam sayı
+        sadece with_total ile ve cache'ten hesaplanır. Arama dışında tekrarlayan seriler her
+        tekrarıyla, gerçek tarihinde listelenir (tekil etkinlikler yine SQL'de sayfalanır).
+        """
+        tokens = parse_query(search)
+        if cursor is not None and tokens:
+            return {"error": "Cursor pagination is not supported together with search"}, 400
+        try:
+            window_start = parse_occurrence(date_filter, datetime.now(timezone.utc)) if date_filter else None
+        except InvalidRecurrence:
+            return {"error": "date must be an ISO date"}, 400
+
+        page_key = f"c:{cursor}:t{int(with_total)}" if cursor is not None else f"p{page}"
+        cached_data, cache_key = await events_cache.get(
+            redis, f"{page_key}:l{limit}:s:{' '.join(tokens)}:d:{date_filter}"
+        )
+        if cached_data: return cached_data, 200
+
+        # Somutlaşmış tekrarlar listede serileri üzerinden görünür
+        base = Events.filter(is_deleted=False, club__status="active", series_id__isnull=True)
+        query = base.filter(event_date__gte=window_start) if window_start else base
+
+        if tokens:
+            total_count, events = await EventService._search_events(
+                query, tokens, (page - 1) * limit, limit, date_filter
+            )
+            rows = [(None, e, e.event_date) for e in events]
+        else:
+            singles = query.filter(recurrence__isnull=True)
+            series = await EventService._series_occurrences(base, window_start)
+            total_count = len(series)
+            if cursor is not None:
+                try:
+                    position = decode_cursor(cursor, datetime, int)
+                except InvalidCursor:
+                    return {"error": "Invalid cursor"}, 400
+                if position:
+                    singles = singles.filter(keyset_filter(["event_date", "event_id"], position))
+                    position = EventService._list_key(*position)
+                    series = [row for row in series if row[0] > position]
+                rows = await EventService._merge_page(singles, series, 0, limit + 1)
+            else:
+                rows = await EventService._merge_page(singles, series, (page - 1) * limit, limit)
+                total_count += await singles.count()
+
+        if cursor is not None:
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            pagination = {
+                "limit": limit,
+                "has_more": has_more,
+                "next_cursor": encode_cursor(rows[-1][2], rows[-1][1].event_id) if has_more else None
+            }
+            if with_total:
+                singles = query.filter(recurrence__isnull=True)
+                pagination["total"] = total_count + await events_cache.count(redis, f"d:{date_filter}", singles)
+        else:
+            pagination = {
+                "total": total_count,
+                "page": page,
+                "limit": limit,
+                "total_pages": (total_count + limit - 1) // limit
+            }
+
+        occurrence_rows = await EventService._occurrence_rows(rows)
         result_list = [{
             "id": e.event_id,
             "title": e.title,
             "description": e.description,
-            "date": str(e.event_date),
+            "date": str(when),
             "club_name": e.club.club_name if e.club else "Unknown",
             "location": e.location,
             "image_url": e.image_url,
-            "capacity": e.quota
-        } for e in events]
+            "capacity": e.quota,
+            "series_id": e.event_id if e.recurrence else None,
+            "occurrence_id": occurrence_rows.get(EventService._list_key(when, e.event_id)) if e.recurrence else None
+        } for _, e, when in rows]
             
         response_data = {
             "events": result_list,
+            "pagination": pagination
+        }
+        await events_cache.set(redis, cache_key, response_data)
+        return response_data, 200
+
+    # Takvim penceresi sınırı: genişletme maliyeti pencere uzunluğuyla orantılıdır
+    MAX_WINDOW_DAYS = 92
+
+    @staticmethod
+    async def get_events_in_window(redis, window_start: str, window_end: str = None, page: int = 1, limit: int = 20):
+        """
+        [from, to) aralığındaki etkinlikleri tekrarlar genişletilmiş olarak, tarihe göre sıralı listeler
+        (GET /events?from=&to=). Tekil etkinlikler tarih index'iyle, seriler recurrence_until ile
+        daraltılarak okunur; her seri sadece penceredeki tekrarları kadar öğe üretir. Katılım almış
+        tekrarlar somutlaşmış satırlarından participant_count ve occurrence_id ile gelir.
+        """
+        try:
+            start = datetime.fromisoformat(window_start)
+            end = datetime.fromisoformat(window_end) if window_end else start + timedelta(days=31)
+        except (TypeError, ValueError):
+            return {"error": "from/to must be ISO dates"}, 400
+        if start.tzinfo is None: start = start.replace(tzinfo=timezone.utc)
+        if end.tzinfo is None: end = end.replace(tzinfo=timezone.utc)
+        if not start < end <= start + timedelta(days=EventService.MAX_WINDOW_DAYS):
+            return {"error": f"Window must be positive and at most {EventService.MAX_WINDOW_DAYS} days"}, 400
+
+        cached_data, cache_key = await events_cache.get(
+            redis, f"w:{start.isoformat()}:{end.isoformat()}:p{page}:l{limit}"
+        )
+        if cached_data: return cached_data, 200
+
+        base = Events.filter(is_deleted=False, club__status="active", series_id__isnull=True)
+        singles = await base.filter(
+            recurrence__isnull=True, event_date__gte=start, event_date__lt=end
+        ).prefetch_related("club")
+        series = await base.filter(recurrence__isnull=False, event_date__lt=end).filter(
+            Q(recurrence_until__isnull=True) | Q(recurrence_until__gte=start)
+        ).prefetch_related("club")
+        materialized = {}
+        if series:
+            for child_id, series_id, event_date, count in await Events.filter(
+                series_id__in=[e.event_id for e in series], event_date__gte=start, event_date__lt=end,
+                is_deleted=False
+            ).values_list("event_id", "series_id", "event_date", "participant_count"):
+                materialized[(series_id, parse_occurrence(event_date, start))] = (child_id, count)
+
+        def item(e, when, occurrence_id=None, participant_count=None):
+            return {
+                "id": e.event_id,
+                "title": e.title,
+                "description": e.description,
+                "date": str(when),
+                "club_name": e.club.club_name if e.club else "Unknown",
+                "location": e.location,
+                "image_url": e.image_url,
+                "capacity": e.quota,
+                "participant_count": e.participant_count if participant_count is None else participant_count,
+                "series_id": e.event_id if e.recurrence else None,
+                "occurrence_id": occurrence_id,
+            }
+
+        items = [(parse_occurrence(e.event_date, start), e.event_id, item(e, e.event_date)) for e in singles]
+        for e in series:
+            for when in occurrences(e.event_date, e.recurrence, start, end):
+                child_id, count = materialized.get((e.event_id, parse_occurrence(when, start)), (None, 0))
+                items.append((parse_occurrence(when, start), e.event_id, item(e, when, child_id, count)))
+        items.sort(key=lambda row: (row[0], row[1]))
+
+        offset = (page - 1) * limit
+        response_data = {
+            "events": [row[2] for row in items[offset:offset + limit]],
             "pagination": {
-                "total": total_count,
+                "total": len(items),
                 "page": page,
                 "limit": limit,
-                "total_pages": (total_count + limit - 1) // limit
+                "total_pages": (len(items) + limit - 1) // limit
             }
         }
-        if redis: await redis.set(cache_key, json.dumps(response_data), ex=60)
+        await events_cache.set(redis, cache_key, response_data)
         return response_data, 200
 
     @staticmethod
-    async def join_event(user_ctx, event_id: int):
-        """Etkinliğe katılma."""
+    async def join_event(user_ctx, event_id: int, redis=None, occurrence=None):
+        """
+        Etkinliğe katılma. Kontenjan kontrolü ve kayıt atomik yapılır (SeatReservations).
+        Tekrarlayan seride katılım occurrence ile seçilen (verilmezse sıradaki) tekrarın satırına
+        yazılır; dönen event_id o satırın id'sidir (ayrılma ve detay için kullanılır).
+        """
         try:
             event = await Events.get(event_id=event_id)
             if event.is_deleted: return {"error": "Event not found"}, 404
-            current_count = await EventParticipation.filter(event_id=event_id, status=ParticipationStatus.GOING).count()
-            if event.quota > 0 and current_count >= event.quota:
-                return {"error": "Etkinlik kontenjanı dolu."}, 400
-            exists = await EventParticipation.filter(user_id=user_ctx["sub"], event_id=event_id).exists()
-            if exists: return {"message": "Zaten bu etkinliğe kayıtlısınız."}, 400
-            await EventParticipation.create(user_id=user_ctx["sub"], event_id=event_id, status=ParticipationStatus.GOING)
-            return {"message": "Successfully joined"}, 200
+            if event.recurrence:
+                occurrence = occurrence or next_occurrence(event.event_date, event.recurrence, datetime.now(timezone.utc))
+                if not occurrence:
+                    return {"error": "This recurring event has no upcoming occurrences"}, 400
+                try:
+                    event = await EventService._materialize_occurrence(event, occurrence)
+                except InvalidRecurrence as e:
+                    return {"error": str(e)}, 400
+            await SeatReservations.join(redis, event, user_ctx["sub"])
+            await event_detail_cache.invalidate(redis, event.event_id)
+            await CalendarService.touch(redis, user_ctx["sub"])
+            return {"message": "Successfully joined", "event_id": event.event_id}, 200
+        except SeatFull:
+            return {"error": "Etkinlik kontenjanı dolu."}, 400
+        except AlreadyJoined:
+            return {"message": "Zaten bu etkinliğe kayıtlısınız."}, 400
         except DoesNotExist:
             return {"error": "Event not found"}, 404
 
     @staticmethod
-    async def leave_event(user_ctx, event_id: int):
-        deleted_count = await EventParticipation.filter(user_id=user_ctx["sub"], event_id=event_id).delete()
+    async def leave_event(user_ctx, event_id: int, redis=None):
+        deleted_count = await SeatReservations.leave(redis, event_id, user_ctx["sub"])
         if deleted_count == 0: return {"error": "Not joined"}, 400
-        return {"message": "Successfully left"}, 200
\ No newline at end of file
+        await event_detail_cache.invalidate(redis, event_id)
+        await CalendarService.touch(redis, user_ctx["sub"])
+        return {"message": "Successfully left"}, 200
+
+    @staticmethod
+    async def remove_participant(user_ctx, event_id: int, target_user_id: int, redis=None):
+        """Bir katılımcıyı etkinlikten çıkarır (Admin veya kulüp başkanı)."""
+        try:
+            event = await Events.get(event_id=event_id).prefetch_related("club")
+            if not (user_ctx["role"] == UserRole.ADMIN or event.club.president_id == user_ctx["sub"]):
+                return {"error": "Unauthorized"}, 403
+
+            deleted_count = await SeatReservations.leave(redis, event_id, target_user_id)
+            if deleted_count == 0: return {"error": "User is not a participant"}, 404
+            await event_detail_cache.invalidate(redis, event_id)
+            await CalendarService.touch(redis, target_user_id)
+
+            logger.info(f"User {target_user_id} removed from Event {event_id} by {user_ctx['sub']}")
+            return {"message": "Participant removed successfully"}, 200
+        except DoesNotExist:
+            return {"error": "Event not found"}, 404
\ No newline at end of file
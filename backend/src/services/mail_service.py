@@ -1,28 +1,296 @@
 import aiosmtplib
-from email.message import EmailMessage
+import asyncio
+import json
 import os
-from src.config import logger
+import socket
+import time
+import uuid
+from email.message import EmailMessage
+from typing import Optional, Dict, Any
+from src.config import logger, MAIL_WORKERS, MAIL_MAX_RETRIES, MAIL_RETRY_BASE_DELAY
+
+
+def _smtp_settings() -> Dict[str, Any]:
+    return {
+        "hostname": os.getenv("SMTP_HOST"),
+        "port": int(os.getenv("SMTP_PORT") or 587),
+        "username": os.getenv("SMTP_USER") or None,
+        "password": os.getenv("SMTP_PASS") or None,
+        "start_tls": (os.getenv("SMTP_START_TLS") or "true").lower() == "true",
+    }
+
+
+class MailQueue:
+    """
+    Giden mail kuyruğu. Mesajlar Redis'teki outbox listesine yazılır (restart'a dayanıklı),
+    her Sanic worker'ında küçük bir worker havuzu bu listeyi boşaltır. Her worker kendi
+    kimliği doğrulanmış SMTP bağlantısını açık tutar ve tekrar kullanır.
+    Redis verilmezse process içi asyncio.Queue kullanılır (testler/scriptler).
+
+    Başarısız gönderimler worker'ı bekletmez: mesaj, tekrar deneme zamanını skor alan
+    mail:retry ZSET'ine yazılır ve zamanı gelince outbox'a geri taşınır.
+    """
+
+    OUTBOX_KEY = "mail:outbox"
+    DEAD_KEY = "mail:dead"
+    RETRY_KEY = "mail:retry"
+    PROCESSING_PREFIX = "mail:processing"
+    CONSUMER_PREFIX = "mail:consumer"
+    HEARTBEAT_TTL = 30
+    RETRY_POLL_INTERVAL = 1.0
+    RETRY_BATCH = 100
+
+    # Zamanı gelen tekrar denemeleri atomik olarak outbox'a taşır (birden fazla worker güvenli)
+    _PROMOTE = """
+    local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+    for _, item in ipairs(due) do
+        redis.call('ZREM', KEYS[1], item)
+        redis.call('LPUSH', KEYS[2], item)
+    end
+    return #due
+    """
+
+    def __init__(self, workers: int = 2, max_retries: int = 5, retry_base_delay: float = 2.0):
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        # Konteyner yeniden başlayınca hostname:pid aynı kalabilir; rastgele sonek sayesinde
+        # önceki sürecin processing listesi heartbeat'i düşünce yetim olarak devralınır
+        self.consumer_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.redis = None
+        self._memory_queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._running = False
+
+        # Metrikler
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+
+    @property
+    def _processing_key(self) -> str:
+        return f"{self.PROCESSING_PREFIX}:{self.consumer_id}"
+
+    def _get_memory_queue(self) -> asyncio.Queue:
+        if self._memory_queue is None:
+            self._memory_queue = asyncio.Queue()
+        return self._memory_queue
+
+    # --- ÜRETİCİ TARAFI ---
+
+    async def enqueue(self, to_email: str, subject: str, body: str) -> str:
+        """Mesajı kuyruğa yazar ve hemen döner; gönderim arka planda yapılır."""
+        message = {
+            "id": uuid.uuid4().hex,
+            "to": to_email,
+            "subject": subject,
+            "body": body,
+            "attempts": 0,
+        }
+        if self.redis:
+            await self.redis.lpush(self.OUTBOX_KEY, json.dumps(message))
+        else:
+            self._get_memory_queue().put_nowait(json.dumps(message))
+        self.enqueued += 1
+        return message["id"]
+
+    # --- YAŞAM DÖNGÜSÜ ---
+
+    async def start(self, redis=None):
+        self.redis = redis
+        self._running = True
+        if self.redis:
+            await self._heartbeat()
+            await self.recover_orphans()
+            self._tasks.append(asyncio.create_task(self._maintenance_loop()))
+            self._tasks.append(asyncio.create_task(self._retry_loop()))
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker_loop(i)))
+        logger.info(f"Mail queue started with {self.workers} workers (consumer: {self.consumer_id})")
+
+    async def stop(self):
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.redis:
+            # Yarım kalan mesajları outbox'a geri bırak, diğer worker'lar devralsın
+            while await self.redis.lmove(self._processing_key, self.OUTBOX_KEY, "RIGHT", "RIGHT"):
+                pass
+            await self.redis.delete(f"{self.CONSUMER_PREFIX}:{self.consumer_id}")
+
+    async def _heartbeat(self):
+        await self.redis.set(f"{self.CONSUMER_PREFIX}:{self.consumer_id}", "1", ex=self.HEARTBEAT_TTL)
+
+    async def recover_orphans(self) -> int:
+        """Heartbeat'i düşmüş (çökmüş/yeniden başlamış) consumer'ların mesajlarını outbox'a taşır."""
+        recovered = 0
+        async for key in self.redis.scan_iter(match=f"{self.PROCESSING_PREFIX}:*"):
+            consumer = key[len(self.PROCESSING_PREFIX) + 1:]
+            if await self.redis.exists(f"{self.CONSUMER_PREFIX}:{consumer}"):
+                continue
+            while await self.redis.lmove(key, self.OUTBOX_KEY, "RIGHT", "RIGHT"):
+                recovered += 1
+        if recovered:
+            logger.warning(f"Mail queue recovered {recovered} orphaned messages")
+        return recovered
+
+    async def _maintenance_loop(self):
+        while self._running:
+            await asyncio.sleep(self.HEARTBEAT_TTL / 3)
+            try:
+                await self._heartbeat()
+                await self.recover_orphans()
+            except Exception as e:
+                logger.error(f"Mail queue maintenance error: {str(e)}")
+
+    async def promote_due_retries(self) -> int:
+        """Tekrar deneme zamanı gelmiş mesajları outbox'a taşır."""
+        return await self.redis.eval(
+            self._PROMOTE, 2, self.RETRY_KEY, self.OUTBOX_KEY, time.time(), self.RETRY_BATCH
+        )
+
+    async def _retry_loop(self):
+        while self._running:
+            await asyncio.sleep(self.RETRY_POLL_INTERVAL)
+            try:
+                await self.promote_due_retries()
+            except Exception as e:
+                logger.error(f"Mail queue retry promotion error: {str(e)}")
+
+    async def _schedule_retry(self, message: Dict[str, Any], delay: float):
+        raw = json.dumps(message)
+        if self.redis:
+            await self.redis.zadd(self.RETRY_KEY, {raw: time.time() + delay})
+        else:
+            asyncio.get_running_loop().call_later(delay, self._get_memory_queue().put_nowait, raw)
+
+    # --- TÜKETİCİ TARAFI ---
+
+    async def _next_message(self) -> Optional[str]:
+        if self.redis:
+            # Güvenilir kuyruk: mesaj işlenirken bu consumer'ın processing listesinde durur
+            return await self.redis.blmove(self.OUTBOX_KEY, self._processing_key, 1, "RIGHT", "LEFT")
+        try:
+            return await asyncio.wait_for(self._get_memory_queue().get(), timeout=1)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _ack(self, raw: str):
+        if self.redis:
+            await self.redis.lrem(self._processing_key, 1, raw)
+
+    async def _worker_loop(self, index: int):
+        smtp = None
+        while self._running:
+            try:
+                raw = await self._next_message()
+                if raw is None:
+                    continue
+                smtp = await self._deliver(smtp, raw)
+                await self._ack(raw)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Mail worker {index} error: {str(e)}")
+                await asyncio.sleep(1)
+        await self._close(smtp)
+
+    async def _deliver(self, smtp, raw: str):
+        """Tek gönderim denemesi; başarısızsa mesaj gecikmeli olarak yeniden kuyruğa alınır."""
+        message = json.loads(raw)
+        try:
+            smtp = await self._ensure_connection(smtp)
+            await smtp.send_message(self._build(message))
+            self.sent += 1
+            return smtp
+        except (aiosmtplib.SMTPException, OSError) as e:
+            await self._close(smtp)
+            message["attempts"] += 1
+            if message["attempts"] > self.max_retries:
+                self.dead += 1
+                logger.error(f"Mail to {message['to']} dropped after {message['attempts']} attempts: {str(e)}")
+                if self.redis:
+                    await self.redis.lpush(self.DEAD_KEY, json.dumps(message))
+                return None
+            self.retried += 1
+            delay = self.retry_base_delay * (2 ** (message["attempts"] - 1))
+            logger.warning(f"Mail to {message['to']} failed ({str(e)}), retrying in {delay:.1f}s")
+            await self._schedule_retry(message, delay)
+            return None
+
+    @staticmethod
+    def _build(message: Dict[str, Any]) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = os.getenv("SMTP_USER") or "noreply@campushub.local"
+        email["To"] = message["to"]
+        email["Subject"] = message["subject"]
+        email.set_content(message["body"])
+        return email
+
+    @staticmethod
+    async def _ensure_connection(smtp):
+        """Açık bağlantıyı tekrar kullanır; yoksa bağlanıp bir kez login olur."""
+        if smtp is not None and smtp.is_connected:
+            return smtp
+        settings = _smtp_settings()
+        smtp = aiosmtplib.SMTP(
+            hostname=settings["hostname"],
+            port=settings["port"],
+            start_tls=settings["start_tls"],
+        )
+        await smtp.connect()
+        if settings["username"]:
+            await smtp.login(settings["username"], settings["password"])
+        return smtp
+
+    @staticmethod
+    async def _close(smtp):
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        data = {
+            "workers": self.workers,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+        if self.redis:
+            data["outbox_length"] = await self.redis.llen(self.OUTBOX_KEY)
+            data["dead_letter_length"] = await self.redis.llen(self.DEAD_KEY)
+            data["retry_length"] = await self.redis.zcard(self.RETRY_KEY)
+        elif self._memory_queue is not None:
+            data["outbox_length"] = self._memory_queue.qsize()
+        return data
+
+
+mail_queue = MailQueue(workers=MAIL_WORKERS, max_retries=MAIL_MAX_RETRIES, retry_base_delay=MAIL_RETRY_BASE_DELAY)
+
 
 class MailService:
     @staticmethod
     async def send_reset_email(to_email: str, token: str):
+        """Şifre sıfırlama mailini kuyruğa ekler."""
         reset_link = f"http://localhost:5173/reset-password?token={token}"
-        message = EmailMessage()
-        message["From"] = os.getenv("SMTP_USER")
-        message["To"] = to_email
-        message["Subject"] = "CampusHub - Şifre Sıfırlama"
-        message.set_content(f"Şifrenizi sıfırlamak için tıklayın: {reset_link}")
+        return await mail_queue.enqueue(
+            to_email,
+            "CampusHub - Şifre Sıfırlama",
+            f"Şifrenizi sıfırlamak için tıklayın: {reset_link}"
+        )
 
-        try:
-            await aiosmtplib.send(
-                message,
-                hostname=os.getenv("SMTP_HOST"),
-                port=int(os.getenv("SMTP_PORT", 587)),
-                username=os.getenv("SMTP_USER"),
-                password=os.getenv("SMTP_PASS"),
-                start_tls=True
-            )
-            return True
-        except Exception as e:
-            logger.error(f"Mail hatası: {str(e)}")
-            return False
\ No newline at end of file
+    @staticmethod
+    async def send_welcome_email(to_email: str, first_name: str):
+        """Hoş geldin mailini kuyruğa ekler."""
+        return await mail_queue.enqueue(
+            to_email,
+            "CampusHub'a Hoş Geldin!",
+            f"Merhaba {first_name},\n\nCampusHub hesabın başarıyla oluşturuldu. Kulüpleri keşfetmeye hemen başlayabilirsin!"
+        )
@@ -1,52 +1,596 @@
-from src.models import Notifications, ClubFollowers
-from tortoise.exceptions import DoesNotExist
+import asyncio
+import json
+import secrets
+import time
+from datetime import datetime
+from typing import List
+from tortoise.expressions import Q
+from src.models import Notifications, ClubFollowers, Users, Broadcasts, BroadcastReadCursors
+from src.config import logger, NOTIFY_FANOUT_CHUNK_SIZE, NOTIFY_DIGEST_WINDOW, REALTIME_TICKET_TTL
+from src.pagination import encode_cursor, decode_cursor, InvalidCursor
+from src.realtime import RealtimeHub
+from src.services.token_store import MemoryTokenStore, RedisTokenStore
+
+
+class UnreadCounter:
+    """
+    Navbar'daki okunmamış sayısı için Redis sayaçları (MySQL'e gitmeden okunur).
+      notifications:unread:{uid}            -> okunmamış bildirim sayısı
+      notifications:broadcast_cursor:{uid}  -> kullanıcının etkin duyuru okuma imleci
+      notifications:broadcasts              -> yayınlanan duyuru id'leri (ZSET, 0 = sentinel)
+    Anahtar yoksa bir kez MySQL'den hesaplanır; yazma yolları sadece var olan anahtarları
+    artırır/azaltır, böylece sayaç ilk okumaya kadar tembel kalır. TTL olası sapmayı sınırlar.
+    """
+
+    TTL = 7 * 24 * 3600
+    BROADCASTS_KEY = "notifications:broadcasts"
+
+    _INCR_IF_EXISTS = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+        if value < 0 then
+            redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+            return 0
+        end
+        return value
+    end
+    return false
+    """
+
+    _RAISE_CURSOR = """
+    local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+    if current >= 0 and current < tonumber(ARGV[1]) then
+        redis.call('SET', KEYS[1], ARGV[1], 'KEEPTTL')
+    end
+    return current
+    """
+
+    _ZADD_IF_EXISTS = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        return redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1])
+    end
+    return false
+    """
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f"notifications:unread:{user_id}"
+
+    @staticmethod
+    def cursor_key(user_id: int) -> str:
+        return f"notifications:broadcast_cursor:{user_id}"
+
+    @staticmethod
+    async def adjust(redis, user_ids, amount: int):
+        """Var olan sayaçları tek pipeline'da artırır/azaltır."""
+        if not redis or not user_ids or not amount:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.eval(UnreadCounter._INCR_IF_EXISTS, 1, UnreadCounter.key(user_id), amount)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Unread counter update failed: {str(e)}")
+
+    @staticmethod
+    async def raise_broadcast_cursor(redis, user_id: int, broadcast_id: int):
+        if not redis:
+            return
+        try:
+            await redis.eval(UnreadCounter._RAISE_CURSOR, 1, UnreadCounter.cursor_key(user_id), broadcast_id)
+        except Exception as e:
+            logger.error(f"Broadcast cursor update failed: {str(e)}")
+
+    @staticmethod
+    async def add_broadcast(redis, broadcast_id: int):
+        if not redis:
+            return
+        try:
+            await redis.eval(UnreadCounter._ZADD_IF_EXISTS, 1, UnreadCounter.BROADCASTS_KEY, broadcast_id)
+        except Exception as e:
+            logger.error(f"Broadcast index update failed: {str(e)}")
+
+    @staticmethod
+    async def effective_broadcast_cursor(user_id: int) -> int:
+        """Okuma imleci ile hesap açılmadan önceki son duyuru id'sinin büyüğü."""
+        cursor = await BroadcastReadCursors.get_or_none(user_id=user_id).values("last_read_broadcast_id")
+        last_read = cursor["last_read_broadcast_id"] if cursor else 0
+        user = await Users.get_or_none(user_id=user_id).values("created_at")
+        if user:
+            before_join = await Broadcasts.filter(created_at__lt=user["created_at"]) \
+                .order_by("-broadcast_id").first().values_list("broadcast_id", flat=True)
+            last_read = max(last_read, before_join or 0)
+        return last_read
+
+    @staticmethod
+    async def count_from_db(user_id: int) -> int:
+        unread = await Notifications.filter(user_id=user_id, is_read=False).count()
+        cursor = await UnreadCounter.effective_broadcast_cursor(user_id)
+        unread += await Broadcasts.filter(is_deleted=False, broadcast_id__gt=cursor).count()
+        return unread
+
+    @staticmethod
+    async def get(redis, user_id: int) -> int:
+        if not redis:
+            return await UnreadCounter.count_from_db(user_id)
+
+        key, cursor_key = UnreadCounter.key(user_id), UnreadCounter.cursor_key(user_id)
+        unread, cursor, has_index = await redis.pipeline(transaction=False) \
+            .get(key).get(cursor_key).exists(UnreadCounter.BROADCASTS_KEY).execute()
+
+        # Soğuk başlangıç: eksik anahtarlar bir kez MySQL'den doldurulur
+        if unread is None:
+            unread = await Notifications.filter(user_id=user_id, is_read=False).count()
+            await redis.set(key, unread, ex=UnreadCounter.TTL, nx=True)
+        if cursor is None:
+            cursor = await UnreadCounter.effective_broadcast_cursor(user_id)
+            await redis.set(cursor_key, cursor, ex=UnreadCounter.TTL, nx=True)
+        if not has_index:
+            ids = await Broadcasts.filter(is_deleted=False).values_list("broadcast_id", flat=True)
+            await redis.zadd(UnreadCounter.BROADCASTS_KEY, {"0": 0, **{str(i): i for i in ids}})
+
+        unread_broadcasts = await redis.zcount(UnreadCounter.BROADCASTS_KEY, f"({int(cursor)}", "+inf")
+        return int(unread) + unread_broadcasts
+
+
+class NotificationDigest:
+    """
+    Bir kulübün kısa aralıklarla paylaştığı etkinlikleri yazma anında tek bildirimde birleştirir.
+      notifications:digest:club:{cid}  -> pencere içinde biriken etkinlikler (LIST, JSON)
+      notifications:digest:due         -> açık pencerelerin kapanış zamanı (ZSET, member = club_id)
+    İlk etkinlik pencereyi açar; pencere kapanınca tampon atomik olarak boşaltılır ve takipçilere
+    tek fan-out yapılır. Böylece satır sayısı etkinlik sayısıyla değil kulüp aktivitesiyle büyür.
+    """
+
+    DUE_KEY = "notifications:digest:due"
+    # Pencereyi açan worker düşerse tampon sweeper tarafından alınana kadar kaybolmasın
+    BUFFER_TTL = 24 * 3600
+
+    _ADD = """
+    local size = redis.call('RPUSH', KEYS[1], ARGV[1])
+    if size == 1 then
+        redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+    end
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return size
+    """
+
+    _TAKE = """
+    local items = redis.call('LRANGE', KEYS[1], 0, -1)
+    redis.call('DEL', KEYS[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    return items
+    """
+
+    @staticmethod
+    def key(club_id: int) -> str:
+        return f"notifications:digest:club:{club_id}"
+
+    @staticmethod
+    async def add(redis, club_id: int, club_name: str, event_id: int, event_title: str, window: float) -> int:
+        """Etkinliği tampona ekler; 1 dönerse pencereyi bu çağrı açmıştır (flush'ı o planlar)."""
+        item = json.dumps({"event_id": event_id, "title": event_title, "club_name": club_name})
+        return await redis.eval(NotificationDigest._ADD, 2, NotificationDigest.key(club_id),
+                                NotificationDigest.DUE_KEY, item, time.time() + window, club_id,
+                                NotificationDigest.BUFFER_TTL)
+
+    @staticmethod
+    async def take(redis, club_id: int) -> List[dict]:
+        """Tamponu atomik olarak boşaltır; aynı pencere iki kez gönderilemez."""
+        items = await redis.eval(NotificationDigest._TAKE, 2, NotificationDigest.key(club_id),
+                                 NotificationDigest.DUE_KEY, club_id)
+        return [json.loads(item) for item in items or []]
+
+    @staticmethod
+    async def overdue(redis, grace: float) -> List[int]:
+        """Kapanış zamanının üzerinden grace saniye geçmiş (sahipsiz kalmış) pencereler."""
+        members = await redis.zrangebyscore(NotificationDigest.DUE_KEY, "-inf", time.time() - grace)
+        return [int(m) for m in members]
+
+    @staticmethod
+    def build_message(club_name: str, events: List[dict], max_titles: int = 3) -> str:
+        if len(events) == 1:
+            message = f"📢 '{club_name}' yeni bir etkinlik paylaştı: {events[0]['title']}"
+        else:
+            titles = ", ".join(e["title"] for e in events[:max_titles])
+            rest = len(events) - max_titles
+            message = f"📢 '{club_name}' {len(events)} yeni etkinlik paylaştı: {titles}"
+            if rest > 0:
+                message += f" ve {rest} etkinlik daha"
+        # Notifications.message 255 karakter
+        return message if len(message) <= 255 else message[:254] + "…"
+
 
 class NotificationService:
 
+    # Arka planda çalışan fan-out görevleri (GC'ye karşı referans tutulur)
+    _background_tasks = set()
+    _fanout_stats = {"running": 0, "completed": 0, "failed": 0, "notifications": 0,
+                     "coalesced_events": 0, "last_duration_ms": None}
+    # Sahipsiz kalan özet tamponlarını gönderen görev
+    _digest_sweeper = None
+    _digest_sweeper_running = False
+
+    # Toplu okundu/silme isteğinde kabul edilen en fazla id sayısı
+    BULK_MAX_IDS = 500
+
+    # Gerçek zamanlı yayın kanalları (Redis pub/sub)
+    BROADCAST_CHANNEL = "notifications:broadcast"
+
+    # Redis yoksa (testler) stream biletleri için process içi yedek depo
+    _memory_stream_tickets = MemoryTokenStore()
+
+    @staticmethod
+    def user_channel(user_id: int) -> str:
+        return f"notifications:user:{user_id}"
+
+    @staticmethod
+    def _stream_ticket_store(redis=None):
+        if redis:
+            return RedisTokenStore(redis, "notifications:ticket")
+        return NotificationService._memory_stream_tickets
+
+    @staticmethod
+    async def issue_stream_ticket(user_id: int, redis=None):
+        """
+        SSE bağlantısı için kısa ömürlü, tek kullanımlık bilet. Erişim JWT'si URL'de (dolayısıyla
+        access/proxy loglarında) taşınmaz; her (yeniden) bağlanmada yeni bilet alınır.
+        """
+        ticket = secrets.token_urlsafe(24)
+        await NotificationService._stream_ticket_store(redis).save(ticket, str(user_id), REALTIME_TICKET_TTL)
+        return {"ticket": ticket, "expires_in": REALTIME_TICKET_TTL}, 201
+
+    @staticmethod
+    async def redeem_stream_ticket(ticket: str, redis=None):
+        """Bileti tüketir; geçerliyse kullanıcı id'sini döner."""
+        if not ticket:
+            return None
+        user_id = await NotificationService._stream_ticket_store(redis).pop(ticket)
+        return int(user_id) if user_id else None
+
     @staticmethod
-    async def create_notification(user_id: int, message: str, club_id: int = None, event_id: int = None):
-        await Notifications.create(
+    async def create_notification(user_id: int, message: str, club_id: int = None, event_id: int = None, redis=None):
+        notif = await Notifications.create(
             user_id=user_id, 
             message=message,
             club_id=club_id,
             event_id=event_id
         )
+        await UnreadCounter.adjust(redis, [user_id], 1)
+        await RealtimeHub.publish(redis, NotificationService.user_channel(user_id), "notification", {
+            "id": notif.notification_id,
+            "type": "notification",
+            "message": message,
+            "is_read": False,
+            "created_at": str(notif.created_at),
+            "club_id": club_id,
+            "event_id": event_id
+        })
 
     @staticmethod
-    async def notify_followers(club_id: int, club_name: str, event_title: str):
-        followers = await ClubFollowers.filter(club_id=club_id).all()
-        
-        message = f"📢 '{club_name}' yeni bir etkinlik paylaştı: {event_title}"
-        for f in followers:
-            await Notifications.create(
-                user_id=f.user_id, 
-                message=message,
-                club_id=club_id
-            )
-
-    @staticmethod
-    async def get_my_notifications(user_id: int):
-        notifs = await Notifications.filter(user_id=user_id).order_by("-is_read", "-created_at")
-        result_list = []
-        for n in notifs:
-            result_list.append({
-                "id": n.notification_id,
-                "message": n.message,
-                "is_read": n.is_read,
-                "created_at": str(n.created_at),
-                "club_id": n.club_id if hasattr(n, "club_id") else None,
-                "event_id": n.event_id if hasattr(n, "event_id") else None
-            })
-            
-        return {"notifications": result_list}, 200
-
-    @staticmethod
-    async def mark_as_read(notif_id: int, user_id: int):
+    async def notify_followers(club_id: int, club_name: str, event_title: str, event_id: int = None,
+                               redis=None, chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE, message: str = None):
+        """
+        Takipçileri id'ye göre keyset sayfalama ile parça parça okur ve her parçayı
+        tek bir bulk INSERT ile yazar. Bellekte aynı anda en fazla chunk_size satır tutulur.
+        """
+        message = message or f"📢 '{club_name}' yeni bir etkinlik paylaştı: {event_title}"
+        started = time.perf_counter()
+        last_id, total = 0, 0
+
+        while True:
+            rows = await ClubFollowers.filter(club_id=club_id, id__gt=last_id) \
+                .order_by("id").limit(chunk_size).values_list("id", "user_id")
+            if not rows:
+                break
+
+            await Notifications.bulk_create([
+                Notifications(user_id=user_id, message=message, club_id=club_id, event_id=event_id)
+                for _, user_id in rows
+            ])
+            await UnreadCounter.adjust(redis, [user_id for _, user_id in rows], 1)
+            # Bulk insert id döndürmediği için canlı mesajda id yok; istemci gerekirse listeyi yeniler
+            await RealtimeHub.publish_many(redis, [
+                (NotificationService.user_channel(user_id), "notification",
+                 {"type": "notification", "message": message, "is_read": False, "club_id": club_id, "event_id": event_id})
+                for _, user_id in rows
+            ])
+            last_id = rows[-1][0]
+            total += len(rows)
+            logger.info(f"Fan-out progress: club {club_id} -> {total} notifications written")
+
+            if len(rows) < chunk_size:
+                break
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Fan-out finished: club {club_id}, {total} followers notified in {duration_ms} ms")
+        return {"notified": total, "duration_ms": duration_ms}
+
+    @staticmethod
+    async def flush_digest(club_id: int, redis):
+        """Kulübün biriken etkinliklerini tek bildirim olarak takipçilere yazar."""
+        events = await NotificationDigest.take(redis, club_id)
+        if not events:
+            return {"notified": 0, "duration_ms": 0, "events": 0}
+        club_name = events[-1]["club_name"]
+        # Tek etkinlikte doğrudan etkinliğe, özet bildirimde kulübe bağlanır
+        event_id = events[0]["event_id"] if len(events) == 1 else None
+        result = await NotificationService.notify_followers(
+            club_id, club_name, events[-1]["title"], event_id, redis,
+            message=NotificationDigest.build_message(club_name, events)
+        )
+        NotificationService._fanout_stats["coalesced_events"] += len(events) - 1
+        return {**result, "events": len(events)}
+
+    @staticmethod
+    def schedule_notify_followers(club_id: int, club_name: str, event_title: str, event_id: int = None,
+                                  redis=None, window: float = NOTIFY_DIGEST_WINDOW):
+        """
+        Fan-out'u isteği bekletmeden arka planda başlatır (etkinlik commit edildikten sonra çağrılmalı).
+        Redis varsa etkinlik önce kulübün özet tamponuna eklenir; pencereyi açan görev window
+        saniye bekleyip o sürede biriken tüm etkinlikleri tek fan-out ile gönderir.
+        """
+        stats = NotificationService._fanout_stats
+
+        async def run():
+            stats["running"] += 1
+            try:
+                position = 0
+                if redis and window > 0:
+                    try:
+                        position = await NotificationDigest.add(redis, club_id, club_name, event_id, event_title, window)
+                    except Exception as e:
+                        logger.error(f"Digest buffer unavailable for club {club_id}, sending directly: {str(e)}")
+                if position > 1:
+                    return  # Açık pencereye eklendi, flush'ı pencereyi açan görev yapar
+                if position == 1:
+                    # İptal edilirse tampon Redis'te kalır, digest sweeper gönderir
+                    await asyncio.sleep(window)
+                    result = await NotificationService.flush_digest(club_id, redis)
+                else:
+                    result = await NotificationService.notify_followers(club_id, club_name, event_title, event_id, redis)
+                stats["completed"] += 1
+                stats["notifications"] += result["notified"]
+                stats["last_duration_ms"] = result["duration_ms"]
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                stats["failed"] += 1
+                logger.error(f"Fan-out failed for club {club_id}: {str(e)}")
+            finally:
+                stats["running"] -= 1
+
+        task = asyncio.get_running_loop().create_task(run())
+        NotificationService._background_tasks.add(task)
+        task.add_done_callback(NotificationService._background_tasks.discard)
+        return task
+
+    @staticmethod
+    async def _sweep_digests(redis, window: float):
+        """Pencereyi açan worker kapanmış/çökmüşse süresi geçen tamponları gönderir."""
+        while NotificationService._digest_sweeper_running:
+            try:
+                for club_id in await NotificationDigest.overdue(redis, grace=window):
+                    result = await NotificationService.flush_digest(club_id, redis)
+                    if result["events"]:
+                        logger.info(f"Digest sweeper flushed club {club_id}: {result['events']} events")
+            except Exception as e:
+                logger.error(f"Digest sweeper error: {str(e)}")
+            await asyncio.sleep(window)
+
+    @staticmethod
+    def start_digest_sweeper(redis, window: float = NOTIFY_DIGEST_WINDOW):
+        if window <= 0 or NotificationService._digest_sweeper:
+            return
+        NotificationService._digest_sweeper_running = True
+        NotificationService._digest_sweeper = asyncio.get_running_loop().create_task(
+            NotificationService._sweep_digests(redis, window)
+        )
+
+    @staticmethod
+    async def stop_digest_sweeper():
+        sweeper = NotificationService._digest_sweeper
+        NotificationService._digest_sweeper_running = False
+        NotificationService._digest_sweeper = None
+        if sweeper:
+            sweeper.cancel()
+            await asyncio.gather(sweeper, return_exceptions=True)
+
+    @staticmethod
+    async def drain_background_tasks(timeout: float = 10):
+        """
+        Kapanışta yarım kalan fan-out görevlerinin bitmesini bekler. Özet penceresinde
+        bekleyen görevler iptal edilir; tamponları Redis'te kaldığı için sweeper gönderir.
+        """
+        tasks = list(NotificationService._background_tasks)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def fanout_stats():
+        return dict(NotificationService._fanout_stats)
+
+    @staticmethod
+    def _before_cursor(ts: datetime, rank: int, last_id: int, own_rank: int, id_field: str,
+                       inclusive: bool = False) -> Q:
+        """
+        (created_at, rank, id) azalan sırasında cursor'dan sonra gelen kayıtlar için filtre.
+        inclusive=True ise cursor'ın gösterdiği kaydın kendisi de dahil edilir.
+        """
+        if own_rank < rank:
+            return Q(created_at__lte=ts)
+        if own_rank > rank:
+            return Q(created_at__lt=ts)
+        id_lookup = f"{id_field}__lte" if inclusive else f"{id_field}__lt"
+        return Q(created_at__lt=ts) | Q(created_at=ts, **{id_lookup: last_id})
+
+    @staticmethod
+    async def _get_broadcast_feed(user_id: int, limit: int, position=None):
+        """Kullanıcının hesabı açıldıktan sonraki duyuruları (sıralama anahtarı, item) çiftleri olarak döner."""
+        user = await Users.get_or_none(user_id=user_id).values("created_at")
+        if not user:
+            return []
+        cursor = await BroadcastReadCursors.get_or_none(user_id=user_id).values("last_read_broadcast_id")
+        last_read = cursor["last_read_broadcast_id"] if cursor else 0
+
+        query = Broadcasts.filter(is_deleted=False, created_at__gte=user["created_at"])
+        if position:
+            query = query.filter(NotificationService._before_cursor(*position, own_rank=1, id_field="broadcast_id"))
+        broadcasts = await query.order_by("-created_at", "-broadcast_id").limit(limit)
+        return [((b.created_at, 1, b.broadcast_id), {
+            "id": f"broadcast-{b.broadcast_id}",
+            "broadcast_id": b.broadcast_id,
+            "type": "broadcast",
+            "message": f"📢 DUYURU: {b.message}",
+            "is_read": b.broadcast_id <= last_read,
+            "created_at": str(b.created_at),
+            "club_id": None,
+            "event_id": None
+        }) for b in broadcasts]
+
+    @staticmethod
+    async def get_my_notifications(user_id: int, limit: int = 20, cursor: str = None):
+        """
+        Bildirim feed'ini en yeniden eskiye keyset sayfalama ile döner.
+        Sıralama anahtarı (created_at, tür, id); next_cursor bir sonraki sayfayı getirir.
+        """
+        try:
+            position = decode_cursor(cursor, datetime, int, int)
+        except InvalidCursor:
+            return {"error": "Invalid cursor"}, 400
+
+        query = Notifications.filter(user_id=user_id)
+        if position:
+            query = query.filter(NotificationService._before_cursor(*position, own_rank=0, id_field="notification_id"))
+        notifs = await query.order_by("-created_at", "-notification_id").limit(limit + 1)
+
+        feed = [((n.created_at, 0, n.notification_id), {
+            "id": n.notification_id,
+            "type": "notification",
+            "message": n.message,
+            "is_read": n.is_read,
+            "created_at": str(n.created_at),
+            "club_id": n.club_id,
+            "event_id": n.event_id
+        }) for n in notifs]
+
+        # Duyurular okuma anında birleştirilir (fan-out-on-read)
+        feed.extend(await NotificationService._get_broadcast_feed(user_id, limit + 1, position))
+        feed.sort(key=lambda item: item[0], reverse=True)
+
+        page = feed[:limit]
+        has_more = len(feed) > limit
+        return {
+            "notifications": [item for _, item in page],
+            "pagination": {
+                "limit": limit,
+                "has_more": has_more,
+                "next_cursor": encode_cursor(*page[-1][0]) if has_more and page else None,
+                # "Tümünü okundu işaretle" için sayfanın en yeni kaydı (up_to olarak gönderilir)
+                "head_cursor": encode_cursor(*page[0][0]) if page else None
+            }
+        }, 200
+
+    @staticmethod
+    async def get_unread_count(user_id: int, redis=None):
         try:
-            # notification_id alanına göre sorgu
-            notif = await Notifications.get(notification_id=notif_id, user_id=user_id)
-            notif.is_read = True
-            await notif.save()
+            return {"unread_count": await UnreadCounter.get(redis, user_id)}, 200
+        except Exception as e:
+            logger.error(f"Unread count error: {str(e)}")
+            return {"unread_count": await UnreadCounter.count_from_db(user_id)}, 200
+
+    @staticmethod
+    async def mark_as_read(notif_id: int, user_id: int, redis=None):
+        # Sadece okunmamışken güncellenen satır sayacı azaltır
+        updated = await Notifications.filter(
+            notification_id=notif_id, user_id=user_id, is_read=False
+        ).update(is_read=True)
+        if updated:
+            await UnreadCounter.adjust(redis, [user_id], -1)
+            return {"message": "Marked as read"}, 200
+        if await Notifications.exists(notification_id=notif_id, user_id=user_id):
             return {"message": "Marked as read"}, 200
-        except DoesNotExist:
-            return {"error": "Notification not found"}, 404
\ No newline at end of file
+        return {"error": "Notification not found"}, 404
+
+    @staticmethod
+    async def mark_broadcast_read(broadcast_id: int, user_id: int, redis=None):
+        """Okuma imlecini ileri taşır (bu ve önceki duyurular okunmuş sayılır)."""
+        if not await Broadcasts.exists(broadcast_id=broadcast_id, is_deleted=False):
+            return {"error": "Notification not found"}, 404
+
+        await BroadcastReadCursors.get_or_create(user_id=user_id)
+        await BroadcastReadCursors.filter(
+            user_id=user_id, last_read_broadcast_id__lt=broadcast_id
+        ).update(last_read_broadcast_id=broadcast_id)
+        await UnreadCounter.raise_broadcast_cursor(redis, user_id, broadcast_id)
+        return {"message": "Marked as read"}, 200
+
+    @staticmethod
+    def _bulk_query(user_id: int, ids=None, up_to=None):
+        """ids listesi ya da up_to cursor'ı (dahil) ile kullanıcının bildirimlerini seçer."""
+        query = Notifications.filter(user_id=user_id)
+        if ids is not None:
+            return query.filter(notification_id__in=ids), None
+        position = decode_cursor(up_to, datetime, int, int)
+        return query.filter(NotificationService._before_cursor(
+            *position, own_rank=0, id_field="notification_id", inclusive=True
+        )), position
+
+    @staticmethod
+    def _validate_bulk_args(ids, up_to):
+        if ids is None and not up_to:
+            return "Either 'ids' or 'up_to' is required"
+        if ids is not None:
+            if not isinstance(ids, list) or not ids or len(ids) > NotificationService.BULK_MAX_IDS:
+                return f"'ids' must be a non-empty list of at most {NotificationService.BULK_MAX_IDS} ids"
+            # bool, int'in alt sınıfıdır: {"ids": [true]} id 1 olarak yorumlanmasın
+            if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                return "'ids' must contain integers"
+        return None
+
+    @staticmethod
+    async def mark_many_as_read(user_id: int, ids=None, up_to: str = None, redis=None):
+        """
+        Birden fazla bildirimi tek UPDATE ile okundu yapar. up_to verilirse o cursor'a kadar
+        (dahil) olan duyurular için okuma imleci de ilerletilir.
+        """
+        error = NotificationService._validate_bulk_args(ids, up_to)
+        if error:
+            return {"error": error}, 400
+        try:
+            query, position = NotificationService._bulk_query(user_id, ids, up_to)
+        except InvalidCursor:
+            return {"error": "Invalid cursor"}, 400
+
+        updated = await query.filter(is_read=False).update(is_read=True)
+        await UnreadCounter.adjust(redis, [user_id], -updated)
+
+        if position:
+            last_broadcast = await Broadcasts.filter(
+                NotificationService._before_cursor(*position, own_rank=1, id_field="broadcast_id", inclusive=True),
+                is_deleted=False
+            ).order_by("-broadcast_id").first().values_list("broadcast_id", flat=True)
+            if last_broadcast:
+                await NotificationService.mark_broadcast_read(last_broadcast, user_id, redis)
+
+        return {"message": "Marked as read", "updated": updated}, 200
+
+    @staticmethod
+    async def delete_many(user_id: int, ids=None, up_to: str = None, redis=None):
+        """Birden fazla bildirimi siler; silinen okunmamışlar sayaçtan düşülür."""
+        error = NotificationService._validate_bulk_args(ids, up_to)
+        if error:
+            return {"error": error}, 400
+        try:
+            query, _ = NotificationService._bulk_query(user_id, ids, up_to)
+        except InvalidCursor:
+            return {"error": "Invalid cursor"}, 400
+
+        # Önce okunmamışları okundu yap: sayaç, silinen okunmamış sayısı kadar azalır
+        unread = await query.filter(is_read=False).update(is_read=True)
+        await UnreadCounter.adjust(redis, [user_id], -unread)
+        deleted = await query.delete()
+        return {"message": "Notifications deleted", "deleted": deleted}, 200
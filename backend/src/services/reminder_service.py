@@ -0,0 +1,176 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from tortoise.transactions import in_transaction
+from src.models import Events, EventParticipation, Notifications, ParticipationStatus
+from src.config import (
+    logger, NOTIFY_FANOUT_CHUNK_SIZE, REMINDER_ENABLED, REMINDER_LEAD_MINUTES, REMINDER_TICK, REMINDER_BATCH_SIZE
+)
+from src.realtime import RealtimeHub
+from src.services.notification_service import NotificationService, UnreadCounter
+
+
+class LeaderLock:
+    """
+    Redis üzerinde tek sahipli, süreli kilit (SET NX EX). Sahibi her tick'te süresini uzatır;
+    worker çökerse kilit TTL sonunda düşer ve başka bir worker devralır.
+    """
+
+    _RENEW = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('EXPIRE', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    _RELEASE = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, key: str, ttl: int):
+        self.key = key
+        self.ttl = ttl
+        self.token = uuid.uuid4().hex
+
+    async def hold(self, redis) -> bool:
+        """Kilidi alır ya da uzatır; lider bu worker ise True."""
+        if await redis.eval(self._RENEW, 1, self.key, self.token, self.ttl):
+            return True
+        return bool(await redis.set(self.key, self.token, nx=True, ex=self.ttl))
+
+    async def release(self, redis):
+        await redis.eval(self._RELEASE, 1, self.key, self.token)
+
+
+class ReminderService:
+    """
+    "Etkinliğin 2 saat sonra başlıyor" hatırlatmaları.
+
+    Her tick'te event_date index'i üzerinde [şimdi, şimdi + REMINDER_LEAD_MINUTES] penceresi
+    REMINDER_BATCH_SIZE'lık dilimlerle taranır; tarama maliyeti tablonun büyüklüğüne değil
+    penceredeki etkinlik sayısına bağlıdır. Her etkinlik, reminder_sent_at işareti ve GOING
+    katılımcılara yazılan bildirimlerle aynı transaction'da sahiplenilir: yeniden başlatma veya
+    aynı anda tarayan iki worker aynı hatırlatmayı iki kez gönderemez. Redis liderlik kilidi
+    sadece gereksiz taramayı önler; Redis yoksa her worker tarar, işaret yine tekilliği korur.
+    """
+
+    LOCK_KEY = "scheduler:reminders:leader"
+
+    _task = None
+    _running = False
+    _lock = LeaderLock(LOCK_KEY, ttl=max(int(REMINDER_TICK * 3), 10))
+
+    @staticmethod
+    def build_message(title: str, lead_minutes: int = REMINDER_LEAD_MINUTES) -> str:
+        lead = f"{lead_minutes // 60} saat" if lead_minutes % 60 == 0 else f"{lead_minutes} dakika"
+        return f"⏰ '{title}' etkinliği {lead} içinde başlıyor."
+
+    @staticmethod
+    async def _due_events(now: datetime, horizon: datetime, limit: int):
+        # Seri satırının kendisi katılım almaz; hatırlatma somutlaşmış tekrar satırlarına gider
+        return await Events.filter(
+            event_date__gte=now, event_date__lte=horizon, reminder_sent_at__isnull=True, is_deleted=False,
+            recurrence__isnull=True
+        ).order_by("event_date", "event_id").limit(limit).values_list("event_id", "title", "club_id")
+
+    @staticmethod
+    async def _remind(event_id: int, title: str, club_id: int, now: datetime, redis=None,
+                      lead_minutes: int = REMINDER_LEAD_MINUTES,
+                      chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE) -> Optional[int]:
+        """Etkinliği sahiplenip katılımcılara hatırlatma yazar; başka worker sahiplendiyse None döner."""
+        message = ReminderService.build_message(title, lead_minutes)
+        async with in_transaction():
+            claimed = await Events.filter(event_id=event_id, reminder_sent_at__isnull=True).update(reminder_sent_at=now)
+            if not claimed:
+                return None
+            user_ids = list(await EventParticipation.filter(
+                event_id=event_id, status=ParticipationStatus.GOING
+            ).values_list("user_id", flat=True))
+            for i in range(0, len(user_ids), chunk_size):
+                await Notifications.bulk_create([
+                    Notifications(user_id=user_id, message=message, club_id=club_id, event_id=event_id)
+                    for user_id in user_ids[i:i + chunk_size]
+                ])
+
+        # Redis tarafı commit'ten sonra: sayaç/canlı mesaj kaybolsa bile bildirim satırları yerinde
+        await UnreadCounter.adjust(redis, user_ids, 1)
+        await RealtimeHub.publish_many(redis, [
+            (NotificationService.user_channel(user_id), "notification",
+             {"type": "notification", "message": message, "is_read": False, "club_id": club_id, "event_id": event_id})
+            for user_id in user_ids
+        ])
+        return len(user_ids)
+
+    @staticmethod
+    async def run_once(redis=None, now: datetime = None, lead_minutes: int = REMINDER_LEAD_MINUTES,
+                       batch_size: int = REMINDER_BATCH_SIZE):
+        """Penceredeki hatırlatılmamış etkinlikleri işler; {"events", "notifications", "duration_ms"} döner."""
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        horizon = now + timedelta(minutes=lead_minutes)
+        events, notified = 0, 0
+        while True:
+            rows = await ReminderService._due_events(now, horizon, batch_size)
+            progressed = 0
+            for event_id, title, club_id in rows:
+                try:
+                    count = await ReminderService._remind(event_id, title, club_id, now, redis, lead_minutes)
+                    progressed += 1
+                    if count is not None:
+                        events += 1
+                        notified += count
+                except Exception as e:
+                    logger.error(f"Reminder failed for event {event_id}: {str(e)}")
+            # Hepsi hata verdiyse aynı dilimi tekrar seçmemek için sonraki tick'e bırakılır
+            if len(rows) < batch_size or not progressed:
+                break
+        return {"events": events, "notifications": notified,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    @staticmethod
+    async def _is_leader(redis) -> bool:
+        if not redis:
+            return True
+        try:
+            return await ReminderService._lock.hold(redis)
+        except Exception as e:
+            logger.error(f"Reminder leader lock unavailable, scanning anyway: {str(e)}")
+            return True
+
+    @staticmethod
+    async def _loop(redis, tick: float):
+        while ReminderService._running:
+            try:
+                if await ReminderService._is_leader(redis):
+                    report = await ReminderService.run_once(redis)
+                    if report["events"]:
+                        logger.info(f"Reminders sent: {report}")
+            except Exception as e:
+                logger.error(f"Reminder scheduler error: {str(e)}")
+            await asyncio.sleep(tick)
+
+    @staticmethod
+    def start(redis, tick: float = REMINDER_TICK):
+        if not REMINDER_ENABLED or ReminderService._task:
+            return
+        ReminderService._running = True
+        ReminderService._task = asyncio.get_running_loop().create_task(ReminderService._loop(redis, tick))
+
+    @staticmethod
+    async def stop(redis=None):
+        task = ReminderService._task
+        ReminderService._running = False
+        ReminderService._task = None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if redis:
+            try:
+                await ReminderService._lock.release(redis)
+            except Exception as e:
+                logger.error(f"Reminder leader lock release failed: {str(e)}")
@@ -0,0 +1,210 @@
+import asyncio
+import uuid
+from typing import Dict, Iterable, Optional
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+from src.models import Events, EventParticipation, ParticipationStatus
+from src.config import logger
+
+
+class SeatFull(Exception):
+    """Etkinlik kontenjanı dolu."""
+
+
+class AlreadyJoined(Exception):
+    """Kullanıcı etkinliğe zaten kayıtlı."""
+
+
+class SeatReservations:
+    """
+    Etkinlik kontenjanı için atomik koltuk rezervasyonu.
+      events:seats:{eid}  -> GOING durumundaki kullanıcı id'leri (SET, "_" = boş küme sentinel'i)
+    Kontrol + ekleme tek Lua script'inde yapılır; aynı anda gelen binlerce katılım isteği
+    MySQL'de COUNT çalıştırmadan sıraya girer ve kontenjan asla aşılmaz. Küme yoksa bir kez
+    EventParticipation'dan doldurulur; veritabanı kaynak kabul edilir (reconcile ile eşitlenir).
+    Redis yoksa etkinlik satırı SELECT ... FOR UPDATE ile kilitlenerek aynı garanti verilir.
+    """
+
+    TTL = 24 * 3600
+    SENTINEL = "_"
+
+    # 1 = rezerve edildi, 0 = dolu, -1 = zaten kayıtlı, -2 = küme yüklenmemiş
+    _RESERVE = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return -2
+    end
+    if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+        return -1
+    end
+    local quota = tonumber(ARGV[2])
+    if quota > 0 and redis.call('SCARD', KEYS[1]) - 1 >= quota then
+        return 0
+    end
+    redis.call('SADD', KEYS[1], ARGV[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+    """
+
+    # Geçici kümede hazırlanan içerik atomik olarak yayınlanır; başka bir worker aynı anda
+    # yüklediyse (ve rezervasyon aldıysa) üzerine yazılmaz
+    _PUBLISH = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        redis.call('DEL', KEYS[2])
+        return 0
+    end
+    redis.call('RENAME', KEYS[2], KEYS[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    return 1
+    """
+
+    _RELEASE_IF_EXISTS = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        return redis.call('SREM', KEYS[1], ARGV[1])
+    end
+    return 0
+    """
+
+    @staticmethod
+    def key(event_id: int) -> str:
+        return f"events:seats:{event_id}"
+
+    @staticmethod
+    async def _going_user_ids(event_id: int):
+        return await EventParticipation.filter(
+            event_id=event_id, status=ParticipationStatus.GOING
+        ).values_list("user_id", flat=True)
+
+    @staticmethod
+    async def load(redis, event_id: int, chunk_size: int = 1000):
+        user_ids = await SeatReservations._going_user_ids(event_id)
+        temp_key = f"{SeatReservations.key(event_id)}:load:{uuid.uuid4().hex}"
+        pipe = redis.pipeline(transaction=False)
+        pipe.sadd(temp_key, SeatReservations.SENTINEL)
+        for i in range(0, len(user_ids), chunk_size):
+            pipe.sadd(temp_key, *user_ids[i:i + chunk_size])
+        pipe.expire(temp_key, 60)
+        await pipe.execute()
+        await redis.eval(SeatReservations._PUBLISH, 2, SeatReservations.key(event_id), temp_key,
+                         SeatReservations.TTL)
+
+    @staticmethod
+    async def _reserve(redis, event_id: int, user_id: int, quota: int):
+        result = await redis.eval(SeatReservations._RESERVE, 1, SeatReservations.key(event_id),
+                                  user_id, quota, SeatReservations.TTL)
+        if result == -2:
+            await SeatReservations.load(redis, event_id)
+            result = await redis.eval(SeatReservations._RESERVE, 1, SeatReservations.key(event_id),
+                                      user_id, quota, SeatReservations.TTL)
+        if result == 0:
+            raise SeatFull()
+        if result == -1:
+            raise AlreadyJoined()
+
+    @staticmethod
+    async def release(redis, event_id: int, user_id: int):
+        if not redis:
+            return
+        try:
+            await redis.eval(SeatReservations._RELEASE_IF_EXISTS, 1, SeatReservations.key(event_id), user_id)
+        except Exception as e:
+            logger.error(f"Seat release failed for event {event_id}: {str(e)}")
+
+    @staticmethod
+    async def join(redis, event: Events, user_id: int):
+        """
+        Koltuğu rezerve edip katılım satırını yazar. SeatFull / AlreadyJoined fırlatabilir.
+        Satır yazılamazsa rezervasyon geri bırakılır.
+        """
+        if not redis:
+            return await SeatReservations._join_locked(event.event_id, user_id)
+        try:
+            await SeatReservations._reserve(redis, event.event_id, user_id, event.quota)
+        except (SeatFull, AlreadyJoined):
+            raise
+        except Exception as e:
+            logger.error(f"Seat reservation via Redis failed, using row lock: {str(e)}")
+            return await SeatReservations._join_locked(event.event_id, user_id)
+
+        try:
+            async with in_transaction():
+                await EventParticipation.create(user_id=user_id, event_id=event.event_id, status=ParticipationStatus.GOING)
+                await SeatReservations._adjust_count(event.event_id, 1)
+        except IntegrityError:
+            # Küme geride kalmış, satır zaten var: koltuk zaten bu kullanıcının
+            raise AlreadyJoined()
+        except Exception:
+            await SeatReservations.release(redis, event.event_id, user_id)
+            raise
+
+    @staticmethod
+    async def _join_locked(event_id: int, user_id: int):
+        """
+        Redis olmadan: etkinlik satırı kilitlenir, kontrol ve ekleme aynı transaction'da yapılır.
+        Satır kilitliyken participant_count güncel olduğundan COUNT(*) çalıştırılmaz.
+        """
+        async with in_transaction():
+            event = await Events.select_for_update().get(event_id=event_id)
+            if await EventParticipation.filter(event_id=event_id, user_id=user_id).exists():
+                raise AlreadyJoined()
+            if event.quota > 0 and event.participant_count >= event.quota:
+                raise SeatFull()
+            await EventParticipation.create(user_id=user_id, event_id=event_id, status=ParticipationStatus.GOING)
+            await SeatReservations._adjust_count(event_id, 1)
+
+    @staticmethod
+    async def _adjust_count(event_id: int, delta: int):
+        """events.participant_count'u atomik olarak değiştirir (çağıranın transaction'ı içinde)."""
+        await Events.filter(event_id=event_id).update(participant_count=F("participant_count") + delta)
+
+    @staticmethod
+    async def leave(redis, event_id: int, user_id: int) -> int:
+        """Katılım satırını siler, sayaç aynı transaction'da azaltılır; silinen satır sayısını döner."""
+        async with in_transaction():
+            going = await EventParticipation.filter(
+                user_id=user_id, event_id=event_id, status=ParticipationStatus.GOING
+            ).delete()
+            deleted = going + await EventParticipation.filter(user_id=user_id, event_id=event_id).delete()
+            if going:
+                await SeatReservations._adjust_count(event_id, -going)
+        if deleted:
+            await SeatReservations.release(redis, event_id, user_id)
+        return deleted
+
+    @staticmethod
+    async def _drift(redis, event_id: int) -> Optional[int]:
+        members = await redis.smembers(SeatReservations.key(event_id))
+        if not members:
+            return None
+        cached = {int(m) for m in members if m != SeatReservations.SENTINEL}
+        actual = set(await SeatReservations._going_user_ids(event_id))
+        return None if cached == actual else len(cached) - len(actual)
+
+    @staticmethod
+    async def reconcile(redis, event_ids: Optional[Iterable[int]] = None, grace: float = 1.0) -> Dict[int, int]:
+        """
+        Redis kümelerini EventParticipation ile karşılaştırır; farklı olanları veritabanından
+        yeniden yükler. {event_id: fark} döner (küme - veritabanı). Rezervasyonu alınmış ama
+        satırı henüz yazılmamış katılımlar fark gibi görünebileceği için grace süresi sonra
+        tekrar kontrol edilir.
+        """
+        if event_ids is None:
+            event_ids = set()
+            async for key in redis.scan_iter(match="events:seats:*"):
+                suffix = key.split(":")[2]
+                if suffix.isdigit():
+                    event_ids.add(int(suffix))
+        suspects = [eid for eid in event_ids if await SeatReservations._drift(redis, eid) is not None]
+        if suspects and grace:
+            await asyncio.sleep(grace)
+
+        drift = {}
+        for event_id in suspects:
+            difference = await SeatReservations._drift(redis, event_id)
+            if difference is None:
+                continue
+            drift[event_id] = difference
+            await redis.delete(SeatReservations.key(event_id))
+            await SeatReservations.load(redis, event_id)
+            logger.warning(f"Seat set for event {event_id} drifted by {difference}, reloaded")
+        return drift
@@ -0,0 +1,552 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from tortoise.expressions import Q
+from src.models import ClubFollowers, Clubs, Events
+from src.config import (
+    logger, NOTIFY_FANOUT_CHUNK_SIZE, TIMELINE_MAX_ITEMS, TIMELINE_FANOUT_LIMIT, TIMELINE_TTL
+)
+from src.pagination import encode_cursor, decode_cursor, keyset_filter, InvalidCursor
+from src.recurrence import next_occurrence
+
+
+def event_score(event_date) -> int:
+    """Etkinlik tarihini ZSET skoruna (unix saniye) çevirir; saat dilimi yoksa UTC kabul edilir."""
+    if isinstance(event_date, str):
+        event_date = datetime.fromisoformat(event_date)
+    if event_date.tzinfo is None:
+        event_date = event_date.replace(tzinfo=timezone.utc)
+    return int(event_date.timestamp())
+
+
+class TimelineService:
+    """
+    Ana sayfa akışı: takip edilen kulüplerin yaklaşan etkinlikleri, tarihe göre.
+      timeline:user:{uid}  -> ZSET event_id -> event_date (unix sn), "_" (skor 0) = kurulmuş sentinel'i
+      timeline:club:{cid}  -> ZSET kulübün yaklaşan etkinlikleri (aynı biçim)
+      timeline:pull:{uid}  -> SET kullanıcının takip ettiği büyük kulüpler
+      timeline:big_clubs   -> SET büyük kulüpler
+      timeline:series      -> ZSET yayındaki tekrarlayan seriler -> yayınlanan tekrarın skoru
+
+    Etkinlik oluşturulunca id takipçilerin ZSET'lerine yazılır (fan-out-on-write). Takipçisi
+    TIMELINE_FANOUT_LIMIT'i aşan kulüplerde bu yapılmaz; kulübün kendi ZSET'i okuma anında
+    birleştirilir (fan-out-on-read). Geçmişte kalan etkinlikler skorla kırpılır. Akışı olmayan
+    (süresi dolmuş) kullanıcıya yazılmaz; ilk okumada veritabanından yeniden kurulur.
+
+    Seriler sıradaki tekrarlarının skoruyla yayınlanır. O tekrar geçince ilk okuyan
+    (timeline:series'ten üyeyi ZREM ile devralan) seriyi bir sonraki tekrarıyla yeniden yayınlar.
+    """
+
+    BIG_CLUBS_KEY = "timeline:big_clubs"
+    SERIES_KEY = "timeline:series"
+    # Okuma başına devralınacak en fazla vadesi gelmiş seri
+    ROLL_BATCH = 20
+    SENTINEL = "_"
+
+    _background_tasks = set()
+
+    # KEYS = kullanıcı akışları; ARGV = üye, skor, şimdi, en fazla kayıt, ttl
+    _PUSH = """
+    for _, key in ipairs(KEYS) do
+        if redis.call('EXISTS', key) == 1 then
+            redis.call('ZADD', key, ARGV[2], ARGV[1])
+            redis.call('ZREMRANGEBYSCORE', key, '(0', ARGV[3])
+            redis.call('ZREMRANGEBYRANK', key, tonumber(ARGV[4]) + 1, -1)
+            redis.call('EXPIRE', key, ARGV[5])
+        end
+    end
+    return 1
+    """
+
+    # Takip edilen kulübün yaklaşan etkinliklerini akışa ekler (sentinel'ler aynı üye olduğu için birleşir)
+    _MERGE = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    redis.call('ZUNIONSTORE', KEYS[1], 2, KEYS[1], KEYS[2], 'AGGREGATE', 'MAX')
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '(0', ARGV[1])
+    redis.call('ZREMRANGEBYRANK', KEYS[1], tonumber(ARGV[2]) + 1, -1)
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+    """
+
+    _UNMERGE = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    local members = redis.call('ZRANGE', KEYS[2], 0, -1)
+    local batch = {}
+    for _, member in ipairs(members) do
+        if member ~= '_' then
+            table.insert(batch, member)
+            if #batch == 1000 then
+                redis.call('ZREM', KEYS[1], unpack(batch))
+                batch = {}
+            end
+        end
+    end
+    if #batch > 0 then
+        redis.call('ZREM', KEYS[1], unpack(batch))
+    end
+    return 1
+    """
+
+    # Akış + büyük kulüplerin ZSET'leri tek çağrıda (skor, id) sırasıyla birleştirilir (salt okuma).
+    # KEYS = kullanıcı akışı, ardından büyük kulüp ZSET'leri (tüm anahtarlar KEYS'te: Cluster ve
+    # script replikasyonu için); ARGV = başlangıç skoru, cursor id'si (-1 = ilk sayfa), adet
+    _READ = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return false
+    end
+    local min_score, after_id, n = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3])
+    local items, seen = {}, {}
+    local function collect(member, score)
+        if member ~= '_' and not seen[member] then
+            seen[member] = true
+            table.insert(items, {tonumber(score), tonumber(member)})
+        end
+    end
+    for _, key in ipairs(KEYS) do
+        local lower = min_score
+        if after_id >= 0 then
+            for _, member in ipairs(redis.call('ZRANGEBYSCORE', key, min_score, min_score)) do
+                if member ~= '_' and tonumber(member) > after_id then
+                    collect(member, min_score)
+                end
+            end
+            lower = '(' .. min_score
+        end
+        local rows = redis.call('ZRANGEBYSCORE', key, lower, '+inf', 'WITHSCORES', 'LIMIT', 0, n)
+        for i = 1, #rows, 2 do
+            collect(rows[i], rows[i + 1])
+        end
+    end
+    table.sort(items, function(a, b)
+        if a[1] == b[1] then return a[2] < b[2] end
+        return a[1] < b[1]
+    end)
+    local out = {}
+    for i = 1, math.min(n, #items) do
+        table.insert(out, tostring(items[i][2]))
+        table.insert(out, string.format('%d', items[i][1]))
+    end
+    return out
+    """
+
+    @staticmethod
+    def user_key(user_id: int) -> str:
+        return f"timeline:user:{user_id}"
+
+    @staticmethod
+    def club_key(club_id: int) -> str:
+        return f"timeline:club:{club_id}"
+
+    @staticmethod
+    def pull_key(user_id: int) -> str:
+        return f"timeline:pull:{user_id}"
+
+    @staticmethod
+    async def _next_occurrences(query, after: datetime) -> Dict[int, datetime]:
+        """Sorgudaki devam eden serilerin after'dan sonraki ilk tekrarları: {event_id: tarih}."""
+        rows = await query.filter(recurrence__isnull=False).filter(
+            Q(recurrence_until__isnull=True) | Q(recurrence_until__gte=after)
+        ).values_list("event_id", "event_date", "recurrence")
+        upcoming = {}
+        for event_id, event_date, recurrence in rows:
+            when = next_occurrence(event_date, recurrence, after)
+            if when is not None:
+                upcoming[event_id] = when
+        return upcoming
+
+    @staticmethod
+    async def _upcoming(now: int, **filters) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        (öğeler, seriler): yaklaşan tekil etkinlikler + serilerin sıradaki tekrarları {id: skor};
+        ikinci sözlük serileri ayrıca verir (timeline:series'e kaydedilmeleri için).
+        """
+        after = datetime.fromtimestamp(now, timezone.utc)
+        query = Events.filter(
+            is_deleted=False, series_id__isnull=True, club__is_deleted=False, club__status="active", **filters
+        )
+        rows = await query.filter(recurrence__isnull=True, event_date__gte=after) \
+            .order_by("event_date").limit(TIMELINE_MAX_ITEMS).values_list("event_id", "event_date")
+        series = {
+            str(event_id): event_score(when)
+            for event_id, when in (await TimelineService._next_occurrences(query, after)).items()
+        }
+        items = {str(event_id): event_score(event_date) for event_id, event_date in rows}
+        items = dict(sorted({**items, **series}.items(), key=lambda item: item[1])[:TIMELINE_MAX_ITEMS])
+        return items, {event_id: score for event_id, score in series.items() if event_id in items}
+
+    @staticmethod
+    async def _ensure_club(redis, club_id: int, now: int):
+        """Kulüp ZSET'i yoksa veritabanından kurar (kulüp anahtarlarına TTL verilmez, kırpılarak sınırlı kalır)."""
+        key = TimelineService.club_key(club_id)
+        if await redis.exists(key):
+            return
+        items, series = await TimelineService._upcoming(now, club_id=club_id)
+        pipe = redis.pipeline(transaction=False)
+        pipe.zadd(key, {TimelineService.SENTINEL: 0, **items})
+        if series:
+            pipe.zadd(TimelineService.SERIES_KEY, series)
+        await pipe.execute()
+
+    @staticmethod
+    async def _is_big(redis, club_id: int) -> bool:
+        if await redis.sismember(TimelineService.BIG_CLUBS_KEY, club_id):
+            return True
+        counts = await Clubs.filter(club_id=club_id).values_list("follower_count", flat=True)
+        if not counts or counts[0] <= TIMELINE_FANOUT_LIMIT:
+            return False
+        await TimelineService._promote(redis, club_id)
+        return True
+
+    @staticmethod
+    async def _promote(redis, club_id: int, chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE):
+        """
+        Kulübü büyük olarak işaretler; mevcut takipçilerin okuma anında birleştirme listesine bir
+        kez eklenir. Sonrasında takip/bırakma bu listeyi günceller. Kulüp küçülse de büyük kalır.
+        """
+        if not await redis.sadd(TimelineService.BIG_CLUBS_KEY, club_id):
+            return
+        last_id = 0
+        while True:
+            rows = await ClubFollowers.filter(club_id=club_id, id__gt=last_id) \
+                .order_by("id").limit(chunk_size).values_list("id", "user_id")
+            if not rows:
+                break
+            pipe = redis.pipeline(transaction=False)
+            for _, user_id in rows:
+                pipe.sadd(TimelineService.pull_key(user_id), club_id)
+                pipe.expire(TimelineService.pull_key(user_id), TIMELINE_TTL)
+            await pipe.execute()
+            last_id = rows[-1][0]
+        logger.info(f"Timeline: club {club_id} switched to fan-out-on-read")
+
+    @staticmethod
+    async def _fanout(redis, club_id: int, script: str, args, chunk_size: int):
+        last_id, total = 0, 0
+        while True:
+            rows = await ClubFollowers.filter(club_id=club_id, id__gt=last_id) \
+                .order_by("id").limit(chunk_size).values_list("id", "user_id")
+            if not rows:
+                break
+            await redis.eval(script, len(rows), *(TimelineService.user_key(u) for _, u in rows), *args)
+            last_id = rows[-1][0]
+            total += len(rows)
+        return total
+
+    @staticmethod
+    async def publish(redis, event_id: int, club_id: int, event_date, recurring: bool = False,
+                      chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE) -> int:
+        """
+        Etkinliği kulübün ve (küçük kulüpse) takipçilerin akışına yazar; tarih değiştiyse skoru günceller.
+        Seride event_date sıradaki tekrardır (recurring=True); geçince roll_series yeniden yayınlar.
+        """
+        now = int(time.time())
+        score = event_score(event_date)
+        if score <= now:
+            return await TimelineService.retract(redis, event_id, club_id, chunk_size)
+
+        await TimelineService._ensure_club(redis, club_id, now)
+        pipe = redis.pipeline(transaction=False)
+        if recurring:
+            pipe.zadd(TimelineService.SERIES_KEY, {str(event_id): score})
+        else:
+            pipe.zrem(TimelineService.SERIES_KEY, event_id)
+        pipe.zadd(TimelineService.club_key(club_id), {str(event_id): score})
+        pipe.zremrangebyscore(TimelineService.club_key(club_id), "(0", now)
+        pipe.zremrangebyrank(TimelineService.club_key(club_id), TIMELINE_MAX_ITEMS + 1, -1)
+        await pipe.execute()
+        if await TimelineService._is_big(redis, club_id):
+            return 0
+        args = (event_id, score, now, TIMELINE_MAX_ITEMS, TIMELINE_TTL)
+        return await TimelineService._fanout(redis, club_id, TimelineService._PUSH, args, chunk_size)
+
+    @staticmethod
+    async def retract(redis, event_id: int, club_id: int, chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE) -> int:
+        """Silinen/geçmişe alınan etkinliği akışlardan çıkarır (büyük kulüpte sadece kulüp ZSET'inden)."""
+        await redis.zrem(TimelineService.club_key(club_id), event_id)
+        await redis.zrem(TimelineService.SERIES_KEY, event_id)
+        if await redis.sismember(TimelineService.BIG_CLUBS_KEY, club_id):
+            return 0
+        last_id, total = 0, 0
+        while True:
+            rows = await ClubFollowers.filter(club_id=club_id, id__gt=last_id) \
+                .order_by("id").limit(chunk_size).values_list("id", "user_id")
+            if not rows:
+                break
+            pipe = redis.pipeline(transaction=False)
+            for _, user_id in rows:
+                pipe.zrem(TimelineService.user_key(user_id), event_id)
+            await pipe.execute()
+            last_id = rows[-1][0]
+            total += len(rows)
+        return total
+
+    @staticmethod
+    async def roll_series(redis, event_ids, now: int) -> int:
+        """
+        Yayınlanan tekrarı geçmiş serileri sıradaki tekrarlarıyla yeniden yayınlar; seri bittiyse
+        ya da silindiyse akışlardan çıkarır. Üyeyi timeline:series'ten ZREM ile silebilen tek
+        okuyucu seriyi devralır, eşzamanlı okuyucular aynı fan-out'u tekrarlamaz.
+        """
+        rolled = 0
+        after = datetime.fromtimestamp(now + 1, timezone.utc)
+        for event_id in event_ids:
+            if not await redis.zrem(TimelineService.SERIES_KEY, event_id):
+                continue
+            event = await Events.get_or_none(event_id=int(event_id))
+            if event is None:
+                continue
+            when = None
+            if not event.is_deleted and event.recurrence:
+                when = next_occurrence(event.event_date, event.recurrence, after)
+            if when is None:
+                await TimelineService.retract(redis, event.event_id, event.club_id)
+            else:
+                await TimelineService.publish(redis, event.event_id, event.club_id, when, True)
+                rolled += 1
+        return rolled
+
+    @staticmethod
+    async def retract_club(redis, club_id: int, chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE) -> int:
+        """
+        Silinen kulübün etkinliklerini takipçi akışlarından ve okuma anında birleştirme
+        listelerinden çıkarır; kulübün kendi ZSET'i de silinir.
+        """
+        club_key = TimelineService.club_key(club_id)
+        await TimelineService._ensure_club(redis, club_id, int(time.time()))
+        last_id, total = 0, 0
+        while True:
+            rows = await ClubFollowers.filter(club_id=club_id, id__gt=last_id) \
+                .order_by("id").limit(chunk_size).values_list("id", "user_id")
+            if not rows:
+                break
+            pipe = redis.pipeline(transaction=False)
+            for _, user_id in rows:
+                pipe.srem(TimelineService.pull_key(user_id), club_id)
+                pipe.eval(TimelineService._UNMERGE, 2, TimelineService.user_key(user_id), club_key)
+            await pipe.execute()
+            last_id = rows[-1][0]
+            total += len(rows)
+        await redis.srem(TimelineService.BIG_CLUBS_KEY, club_id)
+        await redis.delete(club_key)
+        return total
+
+    @staticmethod
+    def schedule(coro_fn, *args):
+        """Akış güncellemesini isteği bekletmeden arka planda çalıştırır (commit'ten sonra çağrılmalı)."""
+        if not args or not args[0]:
+            return None
+
+        async def run():
+            try:
+                await coro_fn(*args)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Timeline update failed ({coro_fn.__name__}): {str(e)}")
+
+        task = asyncio.get_running_loop().create_task(run())
+        TimelineService._background_tasks.add(task)
+        task.add_done_callback(TimelineService._background_tasks.discard)
+        return task
+
+    @staticmethod
+    async def drain_background_tasks(timeout: float = 10):
+        tasks = list(TimelineService._background_tasks)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def on_follow(redis, user_id: int, club_id: int):
+        if not redis:
+            return
+        try:
+            if await TimelineService._is_big(redis, club_id):
+                pipe = redis.pipeline(transaction=False)
+                pipe.sadd(TimelineService.pull_key(user_id), club_id)
+                pipe.expire(TimelineService.pull_key(user_id), TIMELINE_TTL)
+                await pipe.execute()
+                return
+            now = int(time.time())
+            await TimelineService._ensure_club(redis, club_id, now)
+            await redis.eval(TimelineService._MERGE, 2, TimelineService.user_key(user_id),
+                             TimelineService.club_key(club_id), now, TIMELINE_MAX_ITEMS, TIMELINE_TTL)
+        except Exception as e:
+            logger.error(f"Timeline follow update failed for user {user_id}: {str(e)}")
+
+    @staticmethod
+    async def on_unfollow(redis, user_id: int, club_id: int):
+        if not redis:
+            return
+        try:
+            await redis.srem(TimelineService.pull_key(user_id), club_id)
+            await TimelineService._ensure_club(redis, club_id, int(time.time()))
+            await redis.eval(TimelineService._UNMERGE, 2, TimelineService.user_key(user_id),
+                             TimelineService.club_key(club_id))
+        except Exception as e:
+            logger.error(f"Timeline unfollow update failed for user {user_id}: {str(e)}")
+
+    @staticmethod
+    async def _rebuild(redis, user_id: int, now: int):
+        """Kullanıcının akışını takip ettiği aktif kulüplerden kurar (soğuk başlangıç / TTL sonrası)."""
+        follows = await ClubFollowers.filter(
+            user_id=user_id, club__is_deleted=False, club__status="active"
+        ).values_list("club_id", flat=True)
+        small, big = [], []
+        for club_id in follows:
+            (big if await TimelineService._is_big(redis, club_id) else small).append(club_id)
+        for club_id in big:
+            await TimelineService._ensure_club(redis, club_id, now)
+        items, series = await TimelineService._upcoming(now, club_id__in=small) if small else ({}, {})
+
+        user_key, pull_key = TimelineService.user_key(user_id), TimelineService.pull_key(user_id)
+        pipe = redis.pipeline(transaction=True)
+        pipe.delete(user_key, pull_key)
+        pipe.zadd(user_key, {TimelineService.SENTINEL: 0, **items})
+        if series:
+            pipe.zadd(TimelineService.SERIES_KEY, series)
+        pipe.expire(user_key, TIMELINE_TTL)
+        if big:
+            pipe.sadd(pull_key, *big)
+            pipe.expire(pull_key, TIMELINE_TTL)
+        await pipe.execute()
+
+    @staticmethod
+    async def get_feed(user_ctx, redis=None, limit: int = 20, cursor: Optional[str] = None):
+        """
+        Akışın bir sayfası: tek Lua çağrısıyla (ZRANGEBYSCORE) id'ler alınır, detaylar
+        EventService.get_events_by_ids ile toplu getirilir. Artık bulunamayan (silinmiş)
+        etkinlikler akıştan temizlenir. Redis yoksa ya da hata verirse aynı sıralama (ve aynı
+        cursor biçimi) veritabanından okunur.
+        """
+        from src.services.event_service import EventService
+
+        user_id = user_ctx["sub"]
+        now = int(time.time())
+        try:
+            position = decode_cursor(cursor, int, int)
+        except InvalidCursor:
+            return {"error": "Invalid cursor"}, 400
+        if not redis:
+            return await TimelineService._get_feed_from_db(user_id, limit, position)
+        min_score, after_id = position if position else (now, -1)
+
+        args = (min_score, after_id, limit + 1)
+        user_key = TimelineService.user_key(user_id)
+        try:
+            keys = await TimelineService._read_keys(redis, user_id, now)
+            rows = await redis.eval(TimelineService._READ, len(keys), *keys, *args)
+            if rows is None:
+                await TimelineService._rebuild(redis, user_id, now)
+                keys = await TimelineService._read_keys(redis, user_id, now)
+                rows = await redis.eval(TimelineService._READ, len(keys), *keys, *args)
+        except Exception as e:
+            logger.error(f"Timeline read failed for user {user_id}, using database: {str(e)}")
+            return await TimelineService._get_feed_from_db(user_id, limit, position)
+        rows = rows or []
+
+        ids, scores = [int(i) for i in rows[0::2]], [int(s) for s in rows[1::2]]
+        has_more = len(ids) > limit
+        ids, scores = ids[:limit], scores[:limit]
+        batch, _ = await EventService.get_events_by_ids(ids, redis)
+        if batch["missing"]:
+            try:
+                await redis.zrem(user_key, *batch["missing"])
+            except Exception as e:
+                logger.error(f"Timeline cleanup failed for user {user_id}: {str(e)}")
+        scores_by_id = dict(zip(ids, scores))
+        return {
+            # Kulübü sonradan aktifliğini yitirmişse veritabanı yolu gibi gösterilmez
+            "events": [
+                TimelineService._as_occurrence(e, scores_by_id[e["id"]])
+                for e in batch["items"] if e.get("club_status") == "active"
+            ],
+            "pagination": {
+                "limit": limit,
+                "has_more": has_more,
+                "next_cursor": encode_cursor(scores[-1], ids[-1]) if has_more else None
+            }
+        }, 200
+
+    @staticmethod
+    async def _read_keys(redis, user_id: int, now: int):
+        """
+        _READ'in KEYS listesi: kullanıcı akışı + takip edilen büyük kulüplerin ZSET'leri.
+        Geçmişte kalanlar okuma script'inin dışında, aynı pipeline'da kırpılır.
+        """
+        user_key = TimelineService.user_key(user_id)
+        pipe = redis.pipeline(transaction=False)
+        pipe.zrangebyscore(TimelineService.SERIES_KEY, "-inf", now, start=0, num=TimelineService.ROLL_BATCH)
+        pipe.zremrangebyscore(user_key, "(0", now)
+        pipe.smembers(TimelineService.pull_key(user_id))
+        due, _, big = await pipe.execute()
+        if due:
+            # Geçen tekrar kırpıldı; seri sıradaki tekrarıyla akışlara (bu okumadan önce) geri yazılır
+            try:
+                await TimelineService.roll_series(redis, due, now)
+            except Exception as e:
+                logger.error(f"Timeline series roll failed: {str(e)}")
+        club_keys = [TimelineService.club_key(club_id) for club_id in sorted(big, key=int)]
+        if club_keys:
+            pipe = redis.pipeline(transaction=False)
+            for key in club_keys:
+                pipe.zremrangebyscore(key, "(0", now)
+            await pipe.execute()
+        return [user_key, *club_keys]
+
+    @staticmethod
+    def _as_occurrence(detail: dict, score: int) -> dict:
+        """Seri kartında tarih olarak ilk tekrar yerine akışta sıralandığı tekrar gösterilir."""
+        if not detail.get("recurrence"):
+            return detail
+        return {**detail, "date": str(datetime.fromtimestamp(score, timezone.utc))}
+
+    @staticmethod
+    async def _get_feed_from_db(user_id: int, limit: int, position=None):
+        """
+        Redis akışıyla aynı sıralama ve cursor (skor, id) üzerinde keyset sayfalama. Tekil
+        etkinlikler SQL'de sayfalanır; seriler (kulüp başına az sayıda) sıradaki tekrarlarıyla
+        skorlanıp sayfaya birleştirilir.
+        """
+        from src.services.event_service import EventService
+
+        now = datetime.now(timezone.utc)
+        query = Events.filter(
+            is_deleted=False, series_id__isnull=True,
+            club__followers__user_id=user_id, club__is_deleted=False, club__status="active"
+        )
+        singles = query.filter(recurrence__isnull=True, event_date__gte=now)
+        if position:
+            start = datetime.fromtimestamp(position[0], timezone.utc)
+            singles = singles.filter(keyset_filter(["event_date", "event_id"], [start, position[1]]))
+        rows = [
+            (event_score(e.event_date), e.event_id, e)
+            for e in await singles.prefetch_related("club").order_by("event_date", "event_id").limit(limit + 1)
+        ]
+
+        upcoming = await TimelineService._next_occurrences(query, now)
+        series = {
+            event_id: event_score(when) for event_id, when in upcoming.items()
+            if not position or (event_score(when), event_id) > tuple(position)
+        }
+        if series:
+            for e in await Events.filter(event_id__in=list(series)).prefetch_related("club"):
+                rows.append((series[e.event_id], e.event_id, e))
+        rows.sort(key=lambda row: (row[0], row[1]))
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "events": [TimelineService._as_occurrence(EventService._public_detail(e), score) for score, _, e in rows],
+            "pagination": {
+                "limit": limit,
+                "has_more": has_more,
+                "next_cursor": encode_cursor(rows[-1][0], rows[-1][1]) if has_more else None
+            }
+        }, 200
@@ -0,0 +1,66 @@
+import time
+from typing import Optional, Dict, Tuple
+from src.config import logger
+
+
+class MemoryTokenStore:
+    """
+    Tek process'lik bellek içi token deposu (testler ve Redis olmayan ortamlar için).
+    Süresi dolan kayıtlar her yazmada temizlenir.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+
+    def _sweep(self):
+        now = time.monotonic()
+        expired = [k for k, (_, exp) in self._tokens.items() if exp <= now]
+        for k in expired:
+            del self._tokens[k]
+
+    async def save(self, token: str, value: str, ttl: int):
+        self._sweep()
+        self._tokens[token] = (value, time.monotonic() + ttl)
+
+    async def get(self, token: str) -> Optional[str]:
+        item = self._tokens.get(token)
+        if not item or item[1] <= time.monotonic():
+            return None
+        return item[0]
+
+    async def pop(self, token: str) -> Optional[str]:
+        item = self._tokens.pop(token, None)
+        if not item or item[1] <= time.monotonic():
+            return None
+        return item[0]
+
+    def __len__(self):
+        return len(self._tokens)
+
+
+class RedisTokenStore:
+    """
+    Worker'lar ve node'lar arasında paylaşılan token deposu.
+    Süre Redis TTL ile yönetilir; get sadece doğrular, tüketme (okuma+silme) tek atomik GETDEL komutudur.
+    """
+
+    def __init__(self, redis, prefix: str):
+        self.redis = redis
+        self.prefix = prefix
+
+    async def save(self, token: str, value: str, ttl: int):
+        await self.redis.set(f"{self.prefix}:{token}", value, ex=ttl)
+
+    async def get(self, token: str) -> Optional[str]:
+        try:
+            return await self.redis.get(f"{self.prefix}:{token}")
+        except Exception as e:
+            logger.error(f"Token store error: {str(e)}")
+            return None
+
+    async def pop(self, token: str) -> Optional[str]:
+        try:
+            return await self.redis.getdel(f"{self.prefix}:{token}")
+        except Exception as e:
+            logger.error(f"Token store error: {str(e)}")
+            return None
@@ -2,6 +2,9 @@ from src.models import EventParticipation, ParticipationStatus, Users, EventComm
 from tortoise.exceptions import DoesNotExist
 from src.config import logger
 from tortoise.expressions import Q
+from datetime import datetime
+from src.pagination import paginate_by_cursor, paginate_by_offset, ordered_batch, InvalidCursor
+from src.services.comment_service import CommentThreadCache
 
 class UserService:
 
@@ -72,13 +75,28 @@ class UserService:
             return {"error": "User not found"}, 404
 
     @staticmethod
-    async def get_user_comments_paginated(user_id: int, page=1, limit=10):
-        """Kullanıcının yorumlarını sayfalar (Profil Fikir Arşivi)."""
-        offset = (page - 1) * limit
-        query = EventComments.filter(user_id=user_id).prefetch_related("event")
-        
-        total = await query.count()
-        comments = await query.order_by("-created_at").offset(offset).limit(limit).all()
+    async def get_user_comments_paginated(user_id: int, page=1, limit=10, cursor: str = None, with_total: bool = False):
+        """Kullanıcının yorumlarını sayfalar (Profil Fikir Arşivi); cursor ile keyset modunda çalışır."""
+        query = EventComments.filter(user_id=user_id)
+
+        if cursor is not None:
+            try:
+                comments, pagination = await paginate_by_cursor(
+                    query.prefetch_related("event"), [("-created_at", datetime), ("-comment_id", int)], cursor, limit
+                )
+            except InvalidCursor:
+                return {"error": "Invalid cursor"}, 400
+            if with_total:
+                pagination["total"] = await query.count()
+        else:
+            comments, total = await paginate_by_offset(
+                query.prefetch_related("event"), ["-created_at", "-comment_id"], page, limit
+            )
+            pagination = {
+                "total": total,
+                "page": page,
+                "has_more": (page * limit) < total
+            }
         
         comments_list = [{
             "id": c.comment_id,
@@ -90,15 +108,21 @@ class UserService:
 
         return {
             "comments": comments_list,
-            "pagination": {
-                "total": total,
-                "page": page,
-                "has_more": (page * limit) < total
-            }
+            "pagination": pagination
         }, 200
 
+    # Yorum kartlarında görünen alanlar: değişirse kullanıcının yorum yaptığı dizilerin cache'i düşer
+    COMMENT_CARD_FIELDS = ("full_name", "department", "profile_photo")
+
+    @staticmethod
+    async def invalidate_comment_cards(redis, user_id: int, data: dict):
+        """Profil güncellemesi yorum kartı alanlarına dokunduysa kullanıcının yorum dizilerini düşürür."""
+        if redis and any(field in data for field in UserService.COMMENT_CARD_FIELDS):
+            event_ids = await EventComments.filter(user_id=user_id).distinct().values_list("event_id", flat=True)
+            await CommentThreadCache.invalidate(redis, event_ids)
+
     @staticmethod
-    async def update_profile(user_id: int, data: dict):
+    async def update_profile(user_id: int, data: dict, redis=None):
         try:
             user = await Users.get(user_id=user_id)
             
@@ -118,6 +142,7 @@ class UserService:
                 user.profile_image = photo_url
                 
             await user.save()
+            await UserService.invalidate_comment_cards(redis, user_id, data)
             return {
                 "message": "Profil başarıyla güncellendi",
                 "profile": {
@@ -213,19 +238,29 @@ class UserService:
             # Yorumlar buradan kaldırıldı, ayrı endpointten çekilecek.
 
             return {
-                "profile": {
-                    "id": user.user_id,
-                    "full_name": f"{user.first_name} {user.last_name}",
-                    "department": user.department,
-                    "role": user.role,
-                    "profile_photo": user.profile_image,
-                    "bio": user.bio,
-                    "interests": user.interests
-                },
+                "profile": UserService._public_profile(user),
                 "activities": {
                     "participated_events": participated_events,
                     "followed_clubs": clubs
                 }
             }, 200
         except DoesNotExist:
-            return {"error": "Kullanıcı bulunamadı"}, 404
\ No newline at end of file
+            return {"error": "Kullanıcı bulunamadı"}, 404
+
+    @staticmethod
+    def _public_profile(user) -> dict:
+        return {
+            "id": user.user_id,
+            "full_name": f"{user.first_name} {user.last_name}",
+            "department": user.department,
+            "role": user.role,
+            "profile_photo": user.profile_image,
+            "bio": user.bio,
+            "interests": user.interests
+        }
+
+    @staticmethod
+    async def get_public_profiles_by_ids(user_ids: list):
+        """Birden çok kullanıcının herkese açık profil özetini tek IN (...) sorgusuyla döner (GET /users?ids=...)."""
+        users = await Users.filter(user_id__in=user_ids, is_deleted=False)
+        return ordered_batch(user_ids, {u.user_id: UserService._public_profile(u) for u in users}), 200
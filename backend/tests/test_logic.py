@@ -1,5 +1,10 @@
 import pytest
-from src.security import decode_access_token
+from datetime import datetime, timedelta, timezone
+from src.security import decode_access_token, create_calendar_token, decode_calendar_token
+from src.pagination import encode_cursor, decode_cursor, parse_limit, InvalidCursor, ids_arg, ordered_batch, InvalidIds
+from src.search import fold, parse_query, mysql_boolean_query, InvertedIndex, BooleanMatch
+from src.ical import escape_text, vevent, fold as fold_line
+from src.recurrence import parse_rule, occurrences, series_end, next_occurrence, is_occurrence, InvalidRecurrence
 
 def test_invalid_token_handling():
     assert decode_access_token("bu.bir.token.degildir") is None
@@ -14,4 +19,88 @@ def test_pagination_math():
     total_items = 5
     limit = 10
     total_pages = (total_items + limit - 1) // limit
-    assert total_pages == 1
\ No newline at end of file
+    assert total_pages == 1
+
+def test_cursor_roundtrip():
+    created_at = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, 0, 42)
+    assert decode_cursor(cursor, datetime, int, int) == [created_at, 0, 42]
+    assert decode_cursor(None) is None
+    with pytest.raises(InvalidCursor):
+        decode_cursor("bozuk-cursor", datetime, int, int)
+    assert parse_limit("500", default=20, maximum=100) == 100
+    assert parse_limit("abc", default=20) == 20
+
+def test_turkish_search_folding_and_ranking():
+    assert fold("IĞDIR") == fold("Iğdır") == fold("igdir") == "igdir"
+    assert fold("İSTANBUL") == "istanbul"
+    assert parse_query("Konser konser, ŞİİR!") == ["konser", "siir"]
+    # Operatör karakterleri token'a giremez, kısa kelimeler FULLTEXT ifadesine eklenmez
+    assert mysql_boolean_query(parse_query("yapay +zeka* ai")) == "+yapay* +zeka*"
+
+    index = InvertedIndex()
+    index.add(1, "Bahar Konseri", "Kampüs amfisinde", meta=10)
+    index.add(2, "Satranç Turnuvası", "Konser sonrası ödül töreni", meta=10)
+    index.add(3, "Konser", "Havuz başı", meta=11)
+    # Başlıkta tam eşleşme > başlıkta önek eşleşmesi > açıklamada eşleşme
+    assert [eid for eid, _ in index.search(["konser"])] == [3, 1, 2]
+    assert [eid for eid, _ in index.search(["konser", "odul"])] == [2]
+    index.remove(3)
+    assert [eid for eid, _ in index.search(["konse"])] == [1, 2]
+    assert index.meta(1) == 10
+
+def test_fulltext_match_query_is_bound_parameter():
+    from pypika_tortoise import MySQLQuery, Table
+    events = Table("events")
+    match = BooleanMatch.database_func(events.search_document, "x') OR 1=1 -- ")
+    sql, params = MySQLQuery.from_(events).select(events.event_id).where(match > 0).get_parameterized_sql()
+    assert "AGAINST(%s IN BOOLEAN MODE)" in sql and "1=1" not in sql
+    assert params[0] == "x') OR 1=1 -- "
+
+def test_batch_ids_parsing_and_order():
+    class FakeRequest:
+        def __init__(self, args):
+            self.args = args
+        def get_args(self, keep_blank_values=False):
+            return self.args
+
+    assert ids_arg(FakeRequest({})) is None
+    assert ids_arg(FakeRequest({"ids": ["3,1,3", "2"]})) == [3, 1, 2]
+    for bad in (["1,x"], [""], [",".join(map(str, range(101)))]):
+        with pytest.raises(InvalidIds):
+            ids_arg(FakeRequest({"ids": bad}))
+    assert ordered_batch([3, 1, 2], {1: "a", 3: "c"}) == {"items": ["c", "a"], "missing": [2]}
+
+
+def test_recurrence_window_expansion():
+    start = datetime(2030, 1, 7, 18, 0, tzinfo=timezone.utc)
+    rule = parse_rule("FREQ=WEEKLY;INTERVAL=1;COUNT=10")
+    rule = parse_rule({**rule, "exdates": ["2030-01-21"]})
+    assert series_end(start, rule) == start + timedelta(weeks=9)
+
+    window = occurrences(start, rule, datetime(2030, 1, 10, tzinfo=timezone.utc), datetime(2030, 2, 1, tzinfo=timezone.utc))
+    assert [d.day for d in window] == [14, 28]
+    assert occurrences(start, rule, datetime(2031, 1, 1, tzinfo=timezone.utc), datetime(2031, 2, 1, tzinfo=timezone.utc)) == []
+    assert next_occurrence(start, rule, datetime(2030, 1, 15, tzinfo=timezone.utc)).day == 28
+    assert is_occurrence(start, rule, datetime(2030, 1, 14, 18, 0))
+    assert not is_occurrence(start, rule, datetime(2030, 1, 21, 18, 0))
+    for bad in ("FREQ=HOURLY", "FREQ=DAILY;INTERVAL=0", {"freq": "daily", "until": "yarın"}):
+        with pytest.raises(InvalidRecurrence):
+            parse_rule(bad)
+
+def test_ical_feed_formatting_and_token():
+    assert escape_text("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+    folded = fold_line("SUMMARY:" + "ş" * 60)
+    assert all(len(line.encode("utf-8")) <= 75 for line in folded.split("\r\n"))
+    assert folded.replace("\r\n ", "") == "SUMMARY:" + "ş" * 60 + "\r\n"
+    event = vevent(7, "Konser", datetime(2030, 1, 7, 21, 0, tzinfo=timezone(timedelta(hours=3))),
+                   datetime(2030, 1, 1))
+    assert "DTSTART:20300107T180000Z\r\n" in event and "UID:event-7@" in event
+
+    token = create_calendar_token(42, 3)
+    assert decode_calendar_token(token) == (42, 3)
+    _, _, signature = token.split(".")
+    assert decode_calendar_token(f"43.3.{signature}") is None
+    assert decode_calendar_token(f"42.4.{signature}") is None
+    assert create_calendar_token(42, 4) != token
+    assert decode_calendar_token("garbage") is None
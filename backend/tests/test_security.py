@@ -1,5 +1,10 @@
+import time
 import pytest
-from src.security import hash_password, verify_password, create_access_token, decode_access_token
+from src.security import (
+    hash_password, verify_password, create_access_token, decode_access_token,
+    hash_password_async, verify_password_async, PasswordHashPool, HashPoolSaturated
+)
+from src.middleware import TokenCache
 
 def test_password_hashing():
     raw = "campus_123"
@@ -13,4 +18,38 @@ def test_jwt_operations():
     decoded = decode_access_token(token)
     assert decoded is not None
     assert str(decoded["sub"]) == str(user_id)
-    assert decoded["role"] == role
\ No newline at end of file
+    assert decoded["role"] == role
+
+@pytest.mark.asyncio
+async def test_password_hashing_async():
+    raw = "campus_123"
+    hashed = await hash_password_async(raw)
+    assert await verify_password_async(raw, hashed) is True
+    assert await verify_password_async("wrong_pass", hashed) is False
+
+@pytest.mark.asyncio
+async def test_hash_pool_rejects_when_queue_full():
+    pool = PasswordHashPool(max_workers=1, max_concurrency=1, max_pending=0)
+    with pytest.raises(HashPoolSaturated):
+        await pool.run(hash_password, "campus_123")
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+def test_token_cache_hit_miss_and_expiry():
+    cache = TokenCache(max_size=2)
+    token = create_access_token(101, "student")
+    payload = decode_access_token(token)
+
+    assert cache.get(token) is None
+    cache.set(token, payload)
+    assert cache.get(token)["role"] == "student"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # Süresi geçmiş kayıt önbellekten düşmeli
+    cache.set("expired", {"sub": 1, "exp": time.time() - 1})
+    assert cache.get("expired") is None
+
+    # LRU sınırı aşıldığında en eski kayıt atılır
+    cache.set("a", {"sub": 2, "exp": time.time() + 60})
+    cache.set("b", {"sub": 3, "exp": time.time() + 60})
+    assert cache.stats()["size"] == 2
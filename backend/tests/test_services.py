@@ -1,5 +1,56 @@
+import asyncio
+import time
 import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from tortoise import Tortoise
+from datetime import datetime, timedelta, timezone
+from src.models import (
+    Users, Clubs, Events, EventParticipation, ParticipationStatus, Notifications, NotificationArchive, EventComments
+)
+from src.cache import event_detail_cache
+from src.pagination import encode_cursor, paginate_by_cursor, paginate_by_offset, keyset_filter
 from src.services.weather_service import WeatherService
+from src.services.token_store import MemoryTokenStore
+from src.services.auth_service import AuthService
+from src.security import password_pool, verify_password
+from src.services.mail_service import MailQueue
+from src.dev_smtp import DevSMTPServer
+from src.realtime import Subscription, RealtimeHub, HubFull, HubUnavailable, unavailable
+from src.services.comment_service import CommentService, CommentCounter, CommentThreadCache
+from src.services.notification_service import NotificationDigest, NotificationService, UnreadCounter
+from src.services.reminder_service import ReminderService
+from src.retention import purge_read_notifications
+from src.migrations import run_migrations, AddColumn
+from src.reconcile import reconcile_counters
+from src.recurrence import parse_rule
+from src.services.reservation_service import SeatReservations, SeatFull, AlreadyJoined
+from src.services.event_service import EventService
+from src.services.admin_service import AdminService
+from src.services.club_service import ClubService
+from src.services.timeline_service import TimelineService
+from src.services.calendar_service import CalendarService
+
+@pytest_asyncio.fixture
+async def db():
+    """Servis testleri için bellek içi SQLite (MySQL gerektirmez)."""
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["src.models"]})
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+@pytest.fixture
+def redis():
+    return FakeAsyncRedis(decode_responses=True)
+
+async def make_user(user_id: int, **extra) -> Users:
+    fields = {"first_name": "Test", "last_name": f"User{user_id}", **extra}
+    return await Users.create(user_id=user_id, email=f"user{user_id}@campus.hub", password="-", **fields)
+
+async def make_event(quota: int = 0, club: Clubs = None, **extra) -> Events:
+    club = club or await Clubs.create(club_name=f"Kulüp {await Clubs.all().count() + 1}", status="active")
+    fields = {"title": "Etkinlik", "event_date": datetime.now(timezone.utc) + timedelta(days=3), **extra}
+    return await Events.create(club=club, quota=quota, **fields)
 
 def test_weather_descriptions():
 
@@ -15,4 +66,822 @@ def test_notification_logic():
     
 
     assert expected_msg.startswith("📢")
-    assert club_name in expected_msg
\ No newline at end of file
+    assert club_name in expected_msg
+
+def test_notification_digest_message():
+
+    single = NotificationDigest.build_message("Müzik Kulübü", [{"title": "Konser"}])
+    assert single == "📢 'Müzik Kulübü' yeni bir etkinlik paylaştı: Konser"
+
+    events = [{"title": f"Konser {i}"} for i in range(5)]
+    digest = NotificationDigest.build_message("Müzik Kulübü", events)
+    assert "5 yeni etkinlik" in digest and "ve 2 etkinlik daha" in digest
+
+    long_digest = NotificationDigest.build_message("Müzik Kulübü", [{"title": "x" * 150}] * 3)
+    assert len(long_digest) <= 255
+
+def test_reminder_message_lead_time():
+
+    assert ReminderService.build_message("Konser", 120) == "⏰ 'Konser' etkinliği 2 saat içinde başlıyor."
+    assert "45 dakika" in ReminderService.build_message("Konser", 45)
+
+@pytest.mark.asyncio
+async def test_memory_token_store_is_single_use_and_expires():
+    store = MemoryTokenStore()
+    await store.save("tok", "101", ttl=60)
+    assert await store.get("tok") == "101"
+    assert await store.pop("tok") == "101"
+    assert await store.pop("tok") is None
+
+    await store.save("old", "102", ttl=0)
+    assert await store.pop("old") is None
+    await store.save("new", "103", ttl=60)
+    assert len(store) == 1
+
+
+@pytest.mark.asyncio
+async def test_mail_queue_reuses_smtp_connection(monkeypatch):
+    server = await DevSMTPServer(port=0).start()
+    monkeypatch.setenv("SMTP_HOST", server.host)
+    monkeypatch.setenv("SMTP_PORT", str(server.port))
+    monkeypatch.setenv("SMTP_USER", "")
+    monkeypatch.setenv("SMTP_START_TLS", "false")
+
+    queue = MailQueue(workers=1, max_retries=0)
+    await queue.start()
+    for i in range(3):
+        await queue.enqueue(f"user{i}@campus.hub", "Test", "Merhaba")
+    for _ in range(200):
+        if queue.sent == 3:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    await server.stop()
+
+    assert server.received == 3
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_realtime_subscription_closes_slow_consumer():
+    sub = Subscription(["notifications:user:1"], queue_size=2)
+    assert sub.push({"event": "notification", "data": {}}) is True
+    assert sub.push({"event": "notification", "data": {}}) is True
+    # Kuyruk dolu: yavaş istemci beklenmez, bağlantı kapatılır
+    assert sub.push({"event": "notification", "data": {}}) is False
+    assert sub.closed and sub.close_reason == "slow_consumer"
+
+
+@pytest.mark.asyncio
+async def test_live_comment_channel_caps_watchers_per_event():
+    class FakePubSub:
+        subscribed = False
+        async def subscribe(self, *channels): pass
+        async def unsubscribe(self, *channels): pass
+
+    hub = RealtimeHub(max_connections=10, queue_size=4)
+    hub._pubsub, hub._lock = FakePubSub(), asyncio.Lock()
+    channel = CommentService.event_channel(7)
+    watchers = [await hub.subscribe([channel], limits={channel: 2}) for _ in range(2)]
+    with pytest.raises(HubFull):
+        await hub.subscribe([channel], limits={channel: 2})
+    # Başka etkinliğin kanalı etkilenmez, izleyici ayrılınca yer açılır
+    await hub.subscribe([CommentService.event_channel(8)], limits={CommentService.event_channel(8): 2})
+    await hub.unsubscribe(watchers[0])
+    await hub.subscribe([channel], limits={channel: 2})
+    assert RealtimeHub.frame("comment", {"id": 1}) == 'event: comment\ndata: {"id": 1}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_bulk_read_and_delete_by_ids_and_up_to(db, redis):
+    await make_user(1)
+    await make_user(2)
+    notes = [await Notifications.create(user_id=1, message=f"n{i}") for i in range(4)]
+    other = await Notifications.create(user_id=2, message="other")
+    assert await UnreadCounter.get(redis, 1) == 4
+
+    # Başka kullanıcının id'si sessizce atlanır; bool id olarak kabul edilmez
+    result, status = await NotificationService.mark_many_as_read(1, [notes[0].notification_id, other.notification_id], redis=redis)
+    assert status == 200 and result["updated"] == 1
+    assert (await NotificationService.mark_many_as_read(1, [True], redis=redis))[1] == 400
+    assert (await NotificationService.delete_many(1, [1, False], redis=redis))[1] == 400
+    assert (await NotificationService.mark_many_as_read(1, redis=redis))[1] == 400
+    assert (await NotificationService.delete_many(1, up_to="bozuk", redis=redis))[1] == 400
+
+    # up_to, cursor'ın gösterdiği kayıt dahil ondan eski olanları seçer
+    up_to = encode_cursor(notes[2].created_at, 0, notes[2].notification_id)
+    result, _ = await NotificationService.mark_many_as_read(1, up_to=up_to, redis=redis)
+    assert result["updated"] == 2
+    assert await UnreadCounter.get(redis, 1) == 1
+    assert not await Notifications.get(notification_id=notes[3].notification_id).values_list("is_read", flat=True)
+
+    # Okunmamış silinince sayaç da düşer
+    up_to = encode_cursor(notes[3].created_at, 0, notes[3].notification_id)
+    result, _ = await NotificationService.delete_many(1, [notes[3].notification_id, notes[1].notification_id], redis=redis)
+    assert result["deleted"] == 2
+    assert await UnreadCounter.get(redis, 1) == 0
+    result, _ = await NotificationService.delete_many(1, up_to=up_to, redis=redis)
+    assert result["deleted"] == 2
+    assert await Notifications.filter(user_id=1).count() == 0
+    assert await Notifications.exists(notification_id=other.notification_id)
+
+
+@pytest.mark.asyncio
+async def test_mail_queue_retries_via_delayed_set_and_recovers_restarted_consumer(monkeypatch, redis):
+    server = await DevSMTPServer(port=0).start()
+    monkeypatch.setenv("SMTP_HOST", server.host)
+    monkeypatch.setenv("SMTP_USER", "")
+    monkeypatch.setenv("SMTP_START_TLS", "false")
+    monkeypatch.setattr(MailQueue, "RETRY_POLL_INTERVAL", 0.02)
+
+    # Aynı süreçte yeniden başlatılan consumer eski processing listesini yetim olarak devralır
+    crashed = MailQueue(workers=1)
+    await redis.lpush(crashed._processing_key, '{"id": "x", "to": "a@campus.hub", "subject": "s", "body": "b", "attempts": 0}')
+    queue = MailQueue(workers=1, max_retries=3, retry_base_delay=0.05)
+    assert queue.consumer_id != crashed.consumer_id
+
+    # SMTP kapalıyken gönderim worker'ı bekletmez, mesaj mail:retry'a düşer
+    monkeypatch.setenv("SMTP_PORT", "1")
+    await queue.start(redis)
+    for _ in range(200):
+        if await redis.zcard(MailQueue.RETRY_KEY) or queue.sent:
+            break
+        await asyncio.sleep(0.01)
+    assert queue.retried >= 1 and await redis.llen(queue._processing_key) == 0
+
+    monkeypatch.setenv("SMTP_PORT", str(server.port))
+    for _ in range(300):
+        if queue.sent == 1:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    await server.stop()
+
+    assert queue.sent == 1 and server.received == 1 and queue.dead == 0
+    assert await redis.zcard(MailQueue.RETRY_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_realtime_subscribe_does_not_leak_on_redis_failure():
+    class FlakyPubSub:
+        subscribed, fail = False, True
+        async def subscribe(self, *channels):
+            await asyncio.sleep(0)
+            if self.fail:
+                raise ConnectionError("redis down")
+        async def unsubscribe(self, *channels): pass
+
+    hub = RealtimeHub(max_connections=1, queue_size=4)
+    hub._pubsub, hub._lock = FlakyPubSub(), asyncio.Lock()
+    with pytest.raises(HubUnavailable):
+        await hub.subscribe(["notifications:user:1"])
+    assert hub._connections == 0 and hub.subscriber_count("notifications:user:1") == 0
+
+    hub._pubsub.fail = False
+    sub = await hub.subscribe(["notifications:user:1"])
+    assert hub.subscriber_count("notifications:user:1") == 1
+    await hub.unsubscribe(sub)
+    # Eşzamanlı abonelikler kanal sınırını birlikte aşamaz
+    channel = CommentService.event_channel(1)
+    hub.max_connections = 10
+    results = await asyncio.gather(*(hub.subscribe([channel], limits={channel: 2}) for _ in range(5)),
+                                   return_exceptions=True)
+    assert sum(isinstance(r, HubFull) for r in results) == 3
+
+
+@pytest.mark.asyncio
+async def test_retention_archives_before_delete_in_batches(db):
+    await make_user(1)
+    old = datetime.now(timezone.utc) - timedelta(days=120)
+    expired = [await Notifications.create(user_id=1, message=f"eski {i}", is_read=True) for i in range(7)]
+    unread = await Notifications.create(user_id=1, message="okunmamış")
+    recent = await Notifications.create(user_id=1, message="yeni", is_read=True)
+    await Notifications.filter(notification_id__in=[n.notification_id for n in expired] + [unread.notification_id]) \
+        .update(created_at=old)
+
+    report = await purge_read_notifications(days=90, batch_size=3, archive=True, throttle=0, max_batches=2)
+    assert (report["batches"], report["purged"], report["archived"]) == (2, 6, 6)
+    # Partiler id sırasıyla ilerler; sınırdaki yedinci kayıt bir sonraki çalışmaya kalır
+    remaining = await Notifications.filter(user_id=1).order_by("notification_id").values_list("notification_id", flat=True)
+    assert remaining == [expired[6].notification_id, unread.notification_id, recent.notification_id]
+    archived = await NotificationArchive.all().order_by("notification_id").values("notification_id", "user_id", "message")
+    assert archived == [{"notification_id": n.notification_id, "user_id": 1, "message": n.message} for n in expired[:6]]
+
+    # Yarım kalmış bir çalışmanın arşivlediği satır tekrar arşivlenmez ama silinir
+    await NotificationArchive.create(notification_id=expired[6].notification_id, user_id=1, message="eski 6", created_at=old)
+    report = await purge_read_notifications(days=90, batch_size=3, archive=True, throttle=0)
+    assert (report["batches"], report["purged"], report["archived"]) == (1, 1, 0)
+    assert await NotificationArchive.all().count() == 7
+    assert await Notifications.filter(user_id=1).count() == 2
+
+
+@pytest.mark.asyncio
+async def test_keyset_and_offset_pagination_helpers(db):
+    # first_name'de eşitlikler var; ikinci anahtar ters yönde (karışık asc/desc)
+    names = ["Ali", "Can", "Ali", "Ece", "Can", "Ali", "Ece"]
+    for user_id, name in enumerate(names, start=1):
+        await make_user(user_id, first_name=name)
+    expected = sorted(range(1, len(names) + 1), key=lambda i: (names[i - 1], -i))
+
+    order = [("first_name", str), ("-user_id", int)]
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, page = await paginate_by_cursor(Users.all(), order, cursor, limit=2)
+        seen += [u.user_id for u in rows]
+        pages += 1
+        if not page["has_more"]:
+            break
+        cursor = page["next_cursor"]
+    assert seen == expected and pages == 4
+
+    # Filtre, ilk anahtar eşitken ikinci anahtarın yönüne göre devam eder
+    after_ali_3 = await Users.filter(keyset_filter(["first_name", "-user_id"], ["Ali", 3])) \
+        .order_by("first_name", "-user_id").values_list("user_id", flat=True)
+    assert after_ali_3 == expected[expected.index(3) + 1:]
+
+    rows, total = await paginate_by_offset(Users.all(), ["first_name", "-user_id"], page=2, limit=3)
+    assert [u.user_id for u in rows] == expected[3:6] and total == 7
+    # Son sayfanın ötesi: pencere toplamı yok, COUNT'a düşülür
+    rows, total = await paginate_by_offset(Users.filter(first_name="Ali"), ["user_id"], page=5, limit=3)
+    assert rows == [] and total == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [True, False])
+async def test_seat_reservation_last_seat_double_join_and_leave(db, redis, use_redis):
+    redis = redis if use_redis else None
+    for user_id in range(1, 6):
+        await make_user(user_id)
+    event = await make_event(quota=2)
+
+    await SeatReservations.join(redis, event, 1)
+    with pytest.raises(AlreadyJoined):
+        await SeatReservations.join(redis, event, 1)
+    # Son koltuk için yarışan isteklerden yalnızca biri kazanır
+    results = await asyncio.gather(*(SeatReservations.join(redis, event, u) for u in (2, 3, 4)),
+                                   return_exceptions=True)
+    assert sum(r is None for r in results) == 1 and sum(isinstance(r, SeatFull) for r in results) == 2
+    assert await EventParticipation.filter(event_id=event.event_id).count() == 2
+    assert (await Events.get(event_id=event.event_id)).participant_count == 2
+
+    # Ayrılan kullanıcının koltuğu boşalır
+    assert await SeatReservations.leave(redis, event.event_id, 1) == 1
+    await SeatReservations.join(redis, event, 5)
+    assert (await Events.get(event_id=event.event_id)).participant_count == 2
+
+
+@pytest.mark.asyncio
+async def test_seat_reservation_reconcile_after_redis_flush(db, redis):
+    for user_id in range(1, 5):
+        await make_user(user_id)
+    event = await make_event(quota=2)
+    await SeatReservations.join(redis, event, 1)
+    await SeatReservations.join(redis, event, 2)
+
+    # Flush sonrası küme yoktur: reconcile dokunmaz, ilk rezervasyon kümeyi veritabanından yükler
+    await redis.flushall()
+    assert await SeatReservations.reconcile(redis, grace=0) == {}
+    with pytest.raises(SeatFull):
+        await SeatReservations.join(redis, event, 3)
+    with pytest.raises(AlreadyJoined):
+        await SeatReservations.join(redis, event, 2)
+
+    # Kümeden düşmüş bir üye (ör. kısmi kayıp) reconcile ile geri yüklenir
+    await redis.srem(SeatReservations.key(event.event_id), 2)
+    assert await SeatReservations.reconcile(redis, grace=0) == {event.event_id: -1}
+    assert await redis.sismember(SeatReservations.key(event.event_id), 2)
+    with pytest.raises(SeatFull):
+        await SeatReservations.join(redis, event, 4)
+
+
+@pytest.mark.asyncio
+async def test_event_detail_cache_overlay_and_club_invalidation(db, redis):
+    for user_id in (1, 2):
+        await make_user(user_id)
+    await make_user(9, role="admin")
+    event = await make_event(quota=10)
+    await SeatReservations.join(redis, event, 1)
+
+    detail, _ = await EventService.get_event_detail(event.event_id, {"sub": 1}, redis)
+    assert detail["event"]["is_joined"] is True
+    # Paylaşılan kısım cache'ten gelir; "katıldım mı" kullanıcıya göre koltuk kümesinden
+    await Events.filter(event_id=event.event_id).update(title="Değişti")
+    detail, _ = await EventService.get_event_detail(event.event_id, {"sub": 2}, redis)
+    assert detail["event"]["title"] == "Etkinlik" and detail["event"]["is_joined"] is False
+    detail, _ = await EventService.get_event_detail(event.event_id, None, redis)
+    assert detail["event"]["is_joined"] is False
+
+    # Kulüp adı detayda gömülü: kulüp güncellenince/silinince detay yeniden üretilir
+    await AdminService.update_club_details(event.club_id, {"name": "Yeni Ad"}, redis)
+    detail, _ = await EventService.get_event_detail(event.event_id, {"sub": 1}, redis)
+    assert detail["event"]["club_name"] == "Yeni Ad" and detail["event"]["title"] == "Değişti"
+    assert detail["event"]["is_joined"] is True
+
+    await EventService.get_event_detail(event.event_id, None, redis)
+    await ClubService.delete_club({"sub": 9, "role": "admin"}, event.club_id, redis)
+    assert not await redis.exists(event_detail_cache.key(event.event_id))
+
+
+@pytest.mark.asyncio
+async def test_event_detail_cache_rejects_stale_write_after_join(db, redis):
+    await make_user(1)
+    event = await make_event(quota=1)
+
+    # Cache'i ıskalayan okuyucu katılımdan önceki satırı okur; katılım invalidate ettikten
+    # sonra yazmaya çalışırsa nesil değiştiği için yazamaz
+    _, _, version = await event_detail_cache.get(redis, event.event_id)
+    stale = EventService._public_detail(await Events.get(event_id=event.event_id).prefetch_related("club"))
+    await EventService.join_event({"sub": 1, "role": "student"}, event.event_id, redis)
+    await event_detail_cache.set(redis, event.event_id, stale, version)
+    assert not await redis.exists(event_detail_cache.key(event.event_id))
+
+    detail, _ = await EventService.get_event_detail(event.event_id, None, redis)
+    assert detail["event"]["participant_count"] == 1 and detail["event"]["is_full"] is True
+
+    # Toplu okuma yolu da aynı nesil kontrolüyle yazar
+    found, versions = await event_detail_cache.get_many(redis, [event.event_id])
+    assert found[event.event_id]["participant_count"] == 1
+    await EventService.leave_event({"sub": 1, "role": "student"}, event.event_id, redis)
+    await event_detail_cache.set_many(redis, found, versions)
+    assert not await redis.exists(event_detail_cache.key(event.event_id))
+    batch, _ = await EventService.get_events_by_ids([event.event_id], redis)
+    assert batch["items"][0]["participant_count"] == 0
+
+
+async def feed_page(user_id: int, redis, limit: int = 20, cursor: str = None):
+    result, status = await TimelineService.get_feed({"sub": user_id, "role": "student"}, redis, limit, cursor)
+    assert status == 200
+    return [e["id"] for e in result["events"]], result["pagination"]["next_cursor"]
+
+async def whole_feed(user_id: int, redis, limit: int):
+    ids, cursor = await feed_page(user_id, redis, limit)
+    while cursor:
+        page, cursor = await feed_page(user_id, redis, limit, cursor)
+        ids += page
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_timeline_fanout_paging_trimming_and_fallback(db, redis, monkeypatch):
+    for user_id in (1, 2):
+        await make_user(user_id)
+    club = await Clubs.create(club_name="Müzik", status="active")
+    await ClubService.follow_club({"sub": 1, "role": "student"}, club.club_id, redis)
+    start = (datetime.now(timezone.utc) + timedelta(days=1)).replace(second=0, microsecond=0)
+    tied = [(await make_event(club=club, event_date=start)).event_id for _ in range(3)]
+    later = (await make_event(club=club, event_date=start + timedelta(hours=2))).event_id
+
+    # Soğuk akış ilk okumada veritabanından kurulur
+    assert await feed_page(1, redis) == (tied + [later], None)
+    assert await redis.exists(TimelineService.user_key(1))
+
+    # Yeni etkinlik takipçinin akışına yazılır; akışı olmayan kullanıcıya yazılmaz
+    new = await make_event(club=club, event_date=start + timedelta(hours=1))
+    assert await TimelineService.publish(redis, new.event_id, club.club_id, new.event_date) == 1
+    assert await redis.zscore(TimelineService.user_key(1), new.event_id) is not None
+    assert not await redis.exists(TimelineService.user_key(2))
+
+    # Aynı skordaki etkinlikler sayfa sınırında kaybolmaz ve tekrarlanmaz
+    expected = tied + [new.event_id, later]
+    assert await whole_feed(1, redis, limit=2) == expected
+    assert await whole_feed(1, None, limit=2) == expected
+
+    # Geçmişe düşen etkinlik okuma anında kırpılır
+    past = await make_event(club=club, event_date=datetime.now(timezone.utc) - timedelta(minutes=5))
+    await redis.zadd(TimelineService.user_key(1), {str(past.event_id): int(past.event_date.timestamp())})
+    assert (await feed_page(1, redis))[0] == expected
+    assert await redis.zscore(TimelineService.user_key(1), past.event_id) is None
+
+    # Redis hata verirse aynı cursor ile veritabanından devam edilir
+    _, cursor = await feed_page(1, redis, limit=2)
+    async def broken_eval(*args, **kwargs):
+        raise ConnectionError("redis down")
+    monkeypatch.setattr(redis, "eval", broken_eval)
+    page = await feed_page(1, redis, limit=2, cursor=cursor)
+    assert page[0] == expected[2:4] and page == await feed_page(1, None, limit=2, cursor=cursor)
+
+
+@pytest.mark.asyncio
+async def test_timeline_follow_big_club_and_club_delete(db, redis, monkeypatch):
+    monkeypatch.setattr("src.services.timeline_service.TIMELINE_FANOUT_LIMIT", 1)
+    for user_id in (1, 2, 3):
+        await make_user(user_id)
+    await make_user(9, role="admin")
+    start = (datetime.now(timezone.utc) + timedelta(days=1)).replace(second=0, microsecond=0)
+    small = await Clubs.create(club_name="Küçük", status="active")
+    big = await Clubs.create(club_name="Büyük", status="active")
+    small_event = (await make_event(club=small, event_date=start)).event_id
+    big_event = (await make_event(club=big, event_date=start + timedelta(hours=1))).event_id
+
+    # Takip, kulübün yaklaşan etkinliklerini var olan akışa birleştirir; bırakınca çıkarır
+    assert await feed_page(1, redis) == ([], None)
+    await ClubService.follow_club({"sub": 1, "role": "student"}, small.club_id, redis)
+    assert (await feed_page(1, redis))[0] == [small_event]
+    await ClubService.leave_club({"sub": 1, "role": "student"}, small.club_id, redis)
+    assert (await feed_page(1, redis))[0] == []
+
+    # Büyük kulübe fan-out yapılmaz, okuma anında kulübün ZSET'i birleştirilir
+    for user_id in (1, 2, 3):
+        await ClubService.follow_club({"sub": user_id, "role": "student"}, big.club_id, redis)
+    assert await redis.sismember(TimelineService.BIG_CLUBS_KEY, big.club_id)
+    new = await make_event(club=big, event_date=start + timedelta(hours=2))
+    assert await TimelineService.publish(redis, new.event_id, big.club_id, new.event_date) == 0
+    assert await redis.zscore(TimelineService.user_key(1), new.event_id) is None
+    assert (await feed_page(1, redis))[0] == [big_event, new.event_id]
+    assert (await feed_page(2, redis))[0] == [big_event, new.event_id]
+    # Okuma script'i yalnızca KEYS'te verilen anahtarlara dokunur (Cluster uyumlu)
+    assert await TimelineService._read_keys(redis, 1, 0) == [
+        TimelineService.user_key(1), TimelineService.club_key(big.club_id)
+    ]
+
+    # Aktifliğini yitiren kulübün etkinlikleri veritabanı yolundaki gibi akışta gösterilmez
+    await Clubs.filter(club_id=big.club_id).update(status="pending")
+    await EventService.invalidate_club_details(redis, big.club_id)
+    assert (await feed_page(2, redis))[0] == [] == (await feed_page(2, None))[0]
+    await Clubs.filter(club_id=big.club_id).update(status="active")
+    await EventService.invalidate_club_details(redis, big.club_id)
+    assert (await feed_page(2, redis))[0] == [big_event, new.event_id]
+
+    # Silinen kulübün etkinlikleri akışlardan ve birleştirme listelerinden çıkar
+    await ClubService.follow_club({"sub": 1, "role": "student"}, small.club_id, redis)
+    admin = {"sub": 9, "role": "admin"}
+    await ClubService.delete_club(admin, big.club_id, redis)
+    await ClubService.delete_club(admin, small.club_id, redis)
+    await TimelineService.drain_background_tasks()
+    assert (await feed_page(1, redis))[0] == [] and (await feed_page(2, redis))[0] == []
+    assert not await redis.sismember(TimelineService.pull_key(2), big.club_id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [True, False])
+async def test_timeline_lists_series_at_next_occurrence(db, redis, use_redis):
+    redis = redis if use_redis else None
+    await make_user(1)
+    club = await Clubs.create(club_name="Koşu", status="active")
+    await ClubService.follow_club({"sub": 1, "role": "student"}, club.club_id, redis)
+    first = (datetime.now(timezone.utc) - timedelta(days=13)).replace(second=0, microsecond=0)
+    series = await make_event(club=club, event_date=first, recurrence=parse_rule({"freq": "weekly"}))
+    ended = await make_event(club=club, event_date=first, recurrence=parse_rule({"freq": "weekly", "count": 2}))
+    single = await make_event(club=club, event_date=first + timedelta(days=15))
+
+    # İlk tarihi geçmiş haftalık seri sıradaki tekrarıyla (yarın) listelenir; biten seri listelenmez
+    result, _ = await TimelineService.get_feed({"sub": 1, "role": "student"}, redis)
+    assert [e["id"] for e in result["events"]] == [series.event_id, single.event_id]
+    assert result["events"][0]["date"] == str(first + timedelta(days=14))
+    assert await whole_feed(1, redis, limit=1) == [series.event_id, single.event_id]
+    if not redis:
+        return
+
+    # Yayınlanan tekrar geçip kırpılınca seri bir sonraki tekrarıyla yeniden yayınlanır
+    passed = int(time.time()) - 60
+    await redis.zadd(TimelineService.SERIES_KEY, {str(series.event_id): passed})
+    await redis.zadd(TimelineService.user_key(1), {str(series.event_id): passed})
+    assert (await feed_page(1, redis))[0] == [series.event_id, single.event_id]
+    assert await redis.zscore(TimelineService.user_key(1), series.event_id) == int((first + timedelta(days=14)).timestamp())
+    assert await redis.zscore(TimelineService.SERIES_KEY, series.event_id) is not None
+
+
+@pytest.mark.asyncio
+async def test_reminders_are_sent_once_and_rearmed_on_reschedule(db, redis):
+    for user_id in (1, 2, 3):
+        await make_user(user_id)
+    await make_user(9, role="admin")
+    now = datetime.now(timezone.utc)
+    event = await make_event(event_date=now + timedelta(minutes=90))
+    await make_event(event_date=now + timedelta(hours=5))  # pencerenin dışında
+    for user_id in (1, 2):
+        await EventParticipation.create(user_id=user_id, event=event, status=ParticipationStatus.GOING)
+    await EventParticipation.create(user_id=3, event=event, status=ParticipationStatus.INTERESTED)
+
+    async def reminders(user_id):
+        return await Notifications.filter(user_id=user_id, event_id=event.event_id).count()
+
+    # Aynı anda tarayan iki worker ve tekrar çalışma: GOING katılımcı başına tek hatırlatma
+    reports = await asyncio.gather(ReminderService.run_once(redis, now, lead_minutes=120),
+                                   ReminderService.run_once(redis, now, lead_minutes=120))
+    assert sum(r["events"] for r in reports) == 1 and sum(r["notifications"] for r in reports) == 2
+    assert (await ReminderService.run_once(redis, now, lead_minutes=120))["events"] == 0
+    assert [await reminders(u) for u in (1, 2, 3)] == [1, 1, 0]
+
+    # Tarih değişince hatırlatma yeni tarih için tekrar kurulur
+    new_date = str(now + timedelta(minutes=100))
+    await EventService.update_event({"sub": 9, "role": "admin"}, event.event_id, {"date": new_date}, redis)
+    await TimelineService.drain_background_tasks()
+    report = await ReminderService.run_once(redis, now + timedelta(minutes=5), lead_minutes=120)
+    assert (report["events"], report["notifications"]) == (1, 2)
+    assert [await reminders(u) for u in (1, 2, 3)] == [2, 2, 0]
+
+
+@pytest.mark.asyncio
+async def test_joining_a_series_defaults_to_next_occurrence(db, redis):
+    await make_user(1)
+    now = datetime.now(timezone.utc)
+    first = (now - timedelta(days=13)).replace(microsecond=0)
+    series = await make_event(quota=5, event_date=first, recurrence=parse_rule("FREQ=WEEKLY;INTERVAL=1"))
+
+    result, status = await EventService.join_event({"sub": 1, "role": "student"}, series.event_id, redis)
+    assert status == 200 and result["event_id"] != series.event_id
+    child = await Events.get(event_id=result["event_id"])
+    assert child.series_id == series.event_id and child.event_date == first + timedelta(days=14)
+
+    # İlk tarihi geçmiş seri takvim penceresinde tekrarlarıyla görünür, katılınan tekrar işaretli
+    window, _ = await EventService.get_events_in_window(redis, now.date().isoformat(),
+                                                          (now + timedelta(days=15)).date().isoformat())
+    assert [e["occurrence_id"] for e in window["events"]][:1] == [child.event_id]
+    assert all(e["series_id"] == series.event_id for e in window["events"]) and len(window["events"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_event_list_expands_series_between_single_events(db, redis):
+    await make_user(1)
+    now = datetime.now(timezone.utc)
+    first = (now - timedelta(days=13)).replace(microsecond=0)
+    club = await Clubs.create(club_name="Yüzme", status="active")
+    series = await make_event(club=club, event_date=first,
+                              recurrence=parse_rule({"freq": "weekly", "count": 4}))
+    past = await make_event(club=club, event_date=first - timedelta(days=1))
+    between = await make_event(club=club, event_date=first + timedelta(days=3))
+    far = await make_event(club=club, event_date=now + timedelta(days=200))
+    result, _ = await EventService.join_event({"sub": 1, "role": "student"}, series.event_id, redis)
+    child = result["event_id"]
+
+    # Tarihsiz liste geçmiş ve pencerenin çok ötesindeki etkinlikleri de, seriyi her tekrarıyla da gösterir
+    expected = [(past.event_id, None), (series.event_id, None), (between.event_id, None),
+                (series.event_id, None), (series.event_id, child), (series.event_id, None), (far.event_id, None)]
+    pages = []
+    for page in (1, 2, 3):
+        result, status = await EventService.get_events(redis, page, 3)
+        assert status == 200 and result["pagination"]["total"] == 7
+        pages += [(e["id"], e["occurrence_id"]) for e in result["events"]]
+    assert pages == expected
+
+    # Keyset sayfalama aynı sırayı verir
+    listed, cursor = [], ""
+    while cursor is not None:
+        result, _ = await EventService.get_events(None, limit=2, cursor=cursor)
+        listed += [e["id"] for e in result["events"]]
+        cursor = result["pagination"]["next_cursor"]
+    assert listed == [event_id for event_id, _ in expected]
+
+    # ?date= ilk tarihi filtreden önce olan serinin sonraki tekrarlarını da listeler
+    result, _ = await EventService.get_events(redis, 1, 10, date_filter=str(first + timedelta(days=2)))
+    assert [e["id"] for e in result["events"]] == [between.event_id] + [series.event_id] * 3 + [far.event_id]
+    assert result["events"][1]["date"] == str(first + timedelta(days=7))
+
+
+@pytest.mark.asyncio
+async def test_calendar_token_rotation_and_ban(db, redis):
+    await make_user(1)
+    assert await CalendarService.token_version(redis, 1) == 0
+    assert await CalendarService.token_version(redis, 99) is None
+
+    # Yenileme eski sürümü hemen geçersiz kılar (cache'teki sürüm de düşer)
+    assert await CalendarService.rotate_token(redis, 1) == 1
+    assert await CalendarService.token_version(redis, 1) == 1
+
+    # Ban kararı cache TTL'ini beklemeden akışı keser, ban kaldırılınca sürüm geri gelir
+    await AdminService.toggle_user_ban(1, redis)
+    assert await CalendarService.token_version(redis, 1) is None
+    await AdminService.toggle_user_ban(1, redis)
+    assert await CalendarService.token_version(redis, 1) == 1
+    assert await CalendarService.token_version(None, 1) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [True, False])
+async def test_comment_paging_since_and_counter(db, redis, use_redis):
+    redis = redis if use_redis else None
+    await make_user(1)
+    event = await make_event()
+    ids = [(await CommentService.add_comment({"sub": 1}, event.event_id, f"yorum {i}", redis))[0]["comment"]["id"]
+           for i in range(5)]
+
+    # İlk sayfa + before cursor'ı ile tüm dizi tekrarsız, en yeniden eskiye gezilir
+    first, _ = await CommentService.get_comments(event.event_id, limit=2, redis=redis)
+    assert [c["id"] for c in first["comments"]] == [ids[4], ids[3]] and first["count"] == 5
+    assert first["latest_id"] == ids[-1] and first["pagination"]["has_more"]
+    seen, cursor = [c["id"] for c in first["comments"]], first["pagination"]["next_cursor"]
+    while cursor:
+        page, status = await CommentService.get_comments(event.event_id, limit=2, before=cursor, redis=redis)
+        assert status == 200
+        seen += [c["id"] for c in page["comments"]]
+        cursor = page["pagination"]["next_cursor"]
+    assert seen == ids[::-1]
+    assert (await CommentService.get_comments(event.event_id, before="bozuk", redis=redis))[1] == 400
+
+    # since: sadece verilen id'den yeniler; limit'i aşan birikmede has_more
+    newer, _ = await CommentService.get_comments(event.event_id, limit=5, since=ids[2], redis=redis)
+    assert [c["id"] for c in newer["comments"]] == [ids[4], ids[3]] and not newer["has_more"]
+    assert newer["latest_id"] == ids[4] and newer["count"] == 5
+    behind, _ = await CommentService.get_comments(event.event_id, limit=2, since=ids[0], redis=redis)
+    assert [c["id"] for c in behind["comments"]] == [ids[4], ids[3]] and behind["has_more"]
+    idle, _ = await CommentService.get_comments(event.event_id, since=ids[4], redis=redis)
+    assert idle["comments"] == [] and idle["latest_id"] == ids[4]
+
+
+@pytest.mark.asyncio
+async def test_comment_counter_fills_once_and_adjusts_existing_key(db, redis):
+    await make_user(1)
+    event = await make_event()
+    key = CommentCounter.key(event.event_id)
+
+    # Anahtar yokken adjust bir şey yazmaz (yanlış başlangıç değeri oluşmaz)
+    await CommentCounter.adjust(redis, event.event_id, 1)
+    assert await redis.get(key) is None
+
+    await EventComments.create(event=event, user_id=1, content="a")
+    await EventComments.create(event=event, user_id=1, content="b")
+    assert await CommentCounter.get(redis, event.event_id) == 2
+    assert await redis.ttl(key) > 0
+
+    # Sonraki okumalar COUNT(*) yerine sayaçtan; adjust sadece var olan anahtarı değiştirir
+    await EventComments.create(event=event, user_id=1, content="c")
+    assert await CommentCounter.get(redis, event.event_id) == 2
+    await CommentCounter.adjust(redis, event.event_id, 1)
+    assert await CommentCounter.get(redis, event.event_id) == 3
+
+    # Sapma negatife düşürmez, TTL korunur
+    await CommentCounter.adjust(redis, event.event_id, -10)
+    assert await CommentCounter.get(redis, event.event_id) == 0 and await redis.ttl(key) > 0
+    assert await CommentCounter.get(None, event.event_id) == 3
+
+
+@pytest.mark.asyncio
+async def test_comment_thread_fill_loses_race_against_append(redis):
+    # Soğuk doldurma nesli okur, arada yorum eklenir: eski nesille doldurma listeyi yazmamalı
+    version = await CommentThreadCache.version(redis, 1)
+    await CommentThreadCache.append(redis, 1, {"id": 3})
+    assert not await redis.exists(CommentThreadCache.key(1))
+    await CommentThreadCache.fill(redis, 1, version, [{"id": 2}, {"id": 1}], complete=True)
+    assert await CommentThreadCache.read(redis, 1, 10) is None
+
+    # Güncel nesille doldurulur; sonraki ekleme sıcak listenin başına girer
+    await CommentThreadCache.fill(redis, 1, await CommentThreadCache.version(redis, 1),
+                                  [{"id": 3}, {"id": 2}, {"id": 1}], complete=True)
+    await CommentThreadCache.append(redis, 1, {"id": 4})
+    comments, has_more = await CommentThreadCache.read(redis, 1, 10)
+    assert [c["id"] for c in comments] == [4, 3, 2, 1] and not has_more
+
+    # Silme/profil değişikliği listeyi düşürür ve nesli artırır
+    version = await CommentThreadCache.version(redis, 1)
+    await CommentThreadCache.invalidate(redis, [1])
+    await CommentThreadCache.fill(redis, 1, version, [{"id": 4}], complete=True)
+    assert await CommentThreadCache.read(redis, 1, 10) is None
+
+
+@pytest.mark.asyncio
+async def test_comment_thread_read_edges(redis):
+    async def fill(event_id, ids, complete):
+        version = await CommentThreadCache.version(redis, event_id)
+        await CommentThreadCache.fill(redis, event_id, version, [{"id": i} for i in ids], complete)
+
+    def page(result):
+        return [c["id"] for c in result[0]], result[1]
+
+    # END işareti: dizi limit'ten kısaysa tamamı, daha eskisi yok
+    await fill(1, [3, 2, 1], complete=True)
+    assert page(await CommentThreadCache.read(redis, 1, 3)) == ([3, 2, 1], False)
+    assert page(await CommentThreadCache.read(redis, 1, 2)) == ([3, 2], True)
+
+    # END yoksa ve liste sayfayı doldurmaya yetmiyorsa veritabanına düşülür
+    await fill(2, [5, 4, 3], complete=False)
+    assert await CommentThreadCache.read(redis, 2, 3) is None
+    assert page(await CommentThreadCache.read(redis, 2, 2)) == ([5, 4], True)
+
+    # since sınırı: eşit id dahil edilmez; sınıra limit içinde ulaşılırsa has_more false
+    assert page(await CommentThreadCache.read(redis, 2, 5, since=3)) == ([5, 4], False)
+    assert page(await CommentThreadCache.read(redis, 2, 5, since=5)) == ([], False)
+    assert page(await CommentThreadCache.read(redis, 2, 1, since=3)) == ([5], True)
+    assert await CommentThreadCache.read(redis, 2, 5, since=1) is None
+    assert await CommentThreadCache.read(redis, 3, 5) is None
+    assert await CommentThreadCache.read(None, 1, 5) is None
+
+
+@pytest.mark.asyncio
+async def test_admin_profile_edit_drops_comment_threads(db, redis):
+    await make_user(1)
+    event = await make_event()
+    await CommentService.add_comment({"sub": 1}, event.event_id, "merhaba", redis)
+    await CommentService.get_comments(event.event_id, redis=redis)
+    assert await redis.exists(CommentThreadCache.key(event.event_id))
+
+    await AdminService.update_user_profile_as_admin(1, {"bio": "sadece bio"}, redis)
+    assert await redis.exists(CommentThreadCache.key(event.event_id))
+
+    await AdminService.update_user_profile_as_admin(1, {"full_name": "Yeni İsim"}, redis)
+    assert not await redis.exists(CommentThreadCache.key(event.event_id))
+    result, _ = await CommentService.get_comments(event.event_id, redis=redis)
+    assert result["comments"][0]["user_name"] == "Yeni İsim"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [True, False])
+async def test_password_reset_token_survives_hash_pool_saturation(db, redis, monkeypatch, use_redis):
+    redis = redis if use_redis else None
+    await make_user(1)
+    store = AuthService._reset_token_store(redis)
+    await store.save("reset-tok", "1", AuthService.RESET_TOKEN_TTL)
+
+    # Havuz doluyken 503 döner ama tek kullanımlık token yanmaz
+    monkeypatch.setattr(password_pool, "max_pending", 0)
+    assert (await AuthService.complete_password_reset("reset-tok", "yeni_sifre1", redis))[1] == 503
+    assert await store.get("reset-tok") == "1"
+
+    monkeypatch.undo()
+    assert (await AuthService.complete_password_reset("reset-tok", "yeni_sifre1", redis))[1] == 200
+    assert verify_password("yeni_sifre1", (await Users.get(user_id=1)).password)
+    assert (await AuthService.complete_password_reset("reset-tok", "baska_sifre", redis))[1] == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [True, False])
+async def test_notification_stream_ticket_is_single_use(redis, use_redis):
+    redis = redis if use_redis else None
+    result, status = await NotificationService.issue_stream_ticket(7, redis)
+    assert status == 201 and result["expires_in"] > 0
+    assert await NotificationService.redeem_stream_ticket(result["ticket"], redis) == 7
+    assert await NotificationService.redeem_stream_ticket(result["ticket"], redis) is None
+    assert await NotificationService.redeem_stream_ticket(None, redis) is None
+
+    response = unavailable(HubUnavailable("redis down"))
+    assert response.status == 503 and int(response.headers["Retry-After"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_failed_column_backfill_is_retried_on_next_start(db):
+    calls = []
+
+    async def flaky_backfill():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("backfill interrupted")
+
+    migration = AddColumn("clubs", "legacy_flag", "INT NULL", backfill=flaky_backfill)
+    with pytest.raises(RuntimeError):
+        await run_migrations(migrations=[migration])
+    # Kolon eklendi ama backfill işaretlenmedi: sonraki açılış tekrar dener
+    assert await run_migrations(migrations=[migration]) == 1
+    assert await run_migrations(migrations=[migration]) == 0 and len(calls) == 2
+
+    # Gerçek yama listesi de ilk çalıştırmada backfill'leri işaretler, sonra boşta kalır
+    await run_migrations()
+    assert await run_migrations() == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [True, False])
+async def test_denormalized_counters_follow_join_and_leave(db, redis, use_redis):
+    """Katılım/takip sayaçları servislerle güncellenir, etkinlik düzenleme onları ezmez."""
+    redis = redis if use_redis else None
+    await make_user(1)
+    event = await make_event(quota=10)
+    club = await Clubs.get(club_id=event.club_id)
+    stale_event = await Events.get(event_id=event.event_id)
+    stale_club = await Clubs.get(club_id=club.club_id)
+
+    ctx = {"sub": 1, "role": "student"}
+    assert (await EventService.join_event(ctx, event.event_id, redis))[1] == 200
+    assert (await ClubService.follow_club(ctx, club.club_id, redis))[1] == 200
+
+    # Sayaçlar okunmadan önce alınmış nesnelerin tam save()'i sayaçları geri yazmaz
+    stale_event.title = "Etkinlik (güncel)"
+    await stale_event.save()
+    stale_club.description = "yeni açıklama"
+    await stale_club.save()
+    detail, _ = await EventService.get_event_detail(event.event_id, redis=redis)
+    assert detail["event"]["participant_count"] == 1 and detail["event"]["title"] == "Etkinlik (güncel)"
+    assert (await ClubService.get_club_details(club.club_id))[0]["club"]["follower_count"] == 1
+
+    await EventService.leave_event(ctx, event.event_id, redis)
+    await ClubService.leave_club(ctx, club.club_id, redis)
+    await event.refresh_from_db()
+    await club.refresh_from_db()
+    assert event.participant_count == 0 and club.follower_count == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_counters_repairs_drift(db, redis):
+    for user_id in (1, 2, 3):
+        await make_user(user_id)
+    events = [await make_event(quota=10) for _ in range(3)]
+    for user_id in (1, 2):
+        await EventService.join_event({"sub": user_id, "role": "student"}, events[0].event_id, redis)
+        await ClubService.follow_club({"sub": user_id, "role": "student"}, events[0].club_id, redis)
+    await EventParticipation.create(user_id=3, event=events[1], status=ParticipationStatus.INTERESTED)
+
+    # Elle müdahale / eski sürüm kaynaklı sapma
+    await Events.filter(event_id=events[0].event_id).update(participant_count=7)
+    await Events.filter(event_id=events[1].event_id).update(participant_count=1)
+    await Clubs.filter(club_id=events[0].club_id).update(follower_count=0)
+    await redis.flushall()
+
+    report = await reconcile_counters(batch_size=2, redis=redis)
+    assert report["events.participant_count"] == 2 and report["clubs.follower_count"] == 1
+    assert "seat_sets_reloaded" in report
+    counts = {e.event_id: e.participant_count for e in await Events.all()}
+    assert [counts[e.event_id] for e in events] == [2, 0, 0]
+    assert (await Clubs.get(club_id=events[0].club_id)).follower_count == 2
+
+    # Sapma yoksa hiçbir satır yazılmaz
+    report = await reconcile_counters(batch_size=2)
+    assert report["events.participant_count"] == 0 and report["clubs.follower_count"] == 0
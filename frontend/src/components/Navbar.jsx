@@ -26,13 +26,49 @@ export default function Navbar() {
     }
   }, [user]);
 
+  // Yeni bildirimler SSE ile anlık gelir; periyodik sayaç isteği sadece yedek olarak kalır.
+  // JWT URL'ye konmaz: her bağlanmada tek kullanımlık kısa ömürlü bilet alınır.
+  useEffect(() => {
+    if (!user || typeof EventSource === 'undefined') return;
+    let source = null;
+    let retryTimer = null;
+    let stopped = false;
+
+    const reconnect = (delay) => {
+      if (source) source.close();
+      if (!stopped) retryTimer = setTimeout(connect, delay);
+    };
+
+    const connect = async () => {
+      try {
+        const { data } = await api.post('/notifications/stream-ticket');
+        if (stopped) return;
+        source = new EventSource(
+          `${api.defaults.baseURL}/notifications/stream?ticket=${encodeURIComponent(data.ticket)}`
+        );
+        source.addEventListener('notification', () => setUnreadCount(count => count + 1));
+        // Kullanılmış bilet tarayıcının kendi yeniden denemesinde geçmez; yeni biletle bağlanılır
+        source.onerror = () => reconnect(5000);
+      } catch (err) {
+        if (err.response?.status !== 401) reconnect(30000);
+      }
+    };
+
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [user]);
+
   const fetchUnreadCount = async () => {
     if (!user) return;
     try {
-      const { data } = await api.get('/notifications/');
-      if (data && data.notifications) {
-        const count = data.notifications.filter(n => !n.is_read).length;
-        setUnreadCount(count);
+      // Hafif sayaç endpoint'i: bildirim listesini çekmeden sadece sayıyı döner
+      const { data } = await api.get('/notifications/unread-count');
+      if (data && typeof data.unread_count === 'number') {
+        setUnreadCount(data.unread_count);
       }
     } catch (err) {
       if (err.response?.status !== 401) {
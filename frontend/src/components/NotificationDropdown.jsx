@@ -7,6 +7,7 @@ export default function NotificationDropdown({ isOpen, onClose }) {
   const { t } = useTranslation();
   const [notifications, setNotifications] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [headCursor, setHeadCursor] = useState(null);
 
   useEffect(() => {
     if (isOpen) {
@@ -20,6 +21,7 @@ export default function NotificationDropdown({ isOpen, onClose }) {
       const { data } = await api.get('/notifications/');
       // Backend'den gelen verinin yapısına göre (notifications veya direkt liste)
       setNotifications(data.notifications || data || []);
+      setHeadCursor(data.pagination?.head_cursor || null);
     } catch (err) {
       console.error('Bildirimler yüklenemedi:', err);
     } finally {
@@ -27,7 +29,8 @@ export default function NotificationDropdown({ isOpen, onClose }) {
     }
   };
 
-  const handleMarkAsRead = async (notifId) => {
+  const handleMarkAsRead = async (notif) => {
+    const notifId = notif.id || notif.notification_id;
     // undefined/read hatasını önlemek için kontrol
     if (!notifId) {
       console.warn("Geçersiz bildirim ID'si.");
@@ -35,7 +38,11 @@ export default function NotificationDropdown({ isOpen, onClose }) {
     }
 
     try {
-      await api.post(`/notifications/${notifId}/read`);
+      // Duyurular kullanıcı bazlı okuma imleci ile işaretlenir
+      const url = notif.type === 'broadcast'
+        ? `/notifications/broadcasts/${notif.broadcast_id}/read`
+        : `/notifications/${notifId}/read`;
+      await api.post(url);
       // Lokal state'i güncelle
       setNotifications(prev =>
         prev.map(n => {
@@ -50,18 +57,13 @@ export default function NotificationDropdown({ isOpen, onClose }) {
 
   const handleClearAll = async () => {
     const unreadNotifications = notifications.filter(n => !n.is_read);
-    if (unreadNotifications.length === 0) return;
-
-    if (unreadNotifications.length === 0) return;
+    if (unreadNotifications.length === 0 || !headCursor) return;
 
     if (window.confirm(t('notification_dropdown.confirm_read_all'))) {
       try {
-        // Backend'de toplu okuma endpoint'i varsa burayı api.post('/notifications/read-all') yapabilirsiniz
-        // Yoksa mevcut döngü mantığını daha güvenli çalıştıralım
-        const promises = unreadNotifications.map(n =>
-          handleMarkAsRead(n.id || n.notification_id)
-        );
-        await Promise.all(promises);
+        // Tek istek: listedeki en yeni kayda kadar her şey (duyurular dahil) okundu yapılır
+        await api.post('/notifications/read', { up_to: headCursor });
+        setNotifications(prev => prev.map(n => ({ ...n, is_read: true })));
       } catch (err) {
         console.error('Toplu işaretleme başarısız');
       }
@@ -156,7 +158,7 @@ export default function NotificationDropdown({ isOpen, onClose }) {
 
                       {!notif.is_read && (
                         <button
-                          onClick={() => handleMarkAsRead(currentId)}
+                          onClick={() => handleMarkAsRead(notif)}
                           className="p-1.5 text-indigo-600 hover:bg-indigo-100 rounded-lg transition-colors"
                           title={t('notification_dropdown.title_mark_read')}
                         >
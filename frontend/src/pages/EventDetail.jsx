@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useParams, useNavigate, useLocation } from 'react-router-dom';
 import api from '../api/axios';
 import { useAuth } from '../context/AuthContext';
@@ -15,11 +15,16 @@ export default function EventDetail() {
   const { id } = useParams();
   const navigate = useNavigate();
   const location = useLocation();
+  // Tekrarlayan seride listeden seçilen tekrar (?occurrence=); yoksa katılım sıradaki tekrara yazılır
+  const occurrence = new URLSearchParams(location.search).get('occurrence');
   const { user, loading: authLoading } = useAuth();
   const { showToast } = useToast();
   
   const [event, setEvent] = useState(null);
   const [comments, setComments] = useState([]);
+  const [commentCount, setCommentCount] = useState(0);
+  const [commentsCursor, setCommentsCursor] = useState(null);
+  const seenCommentIds = useRef(new Set());
   const [newComment, setNewComment] = useState("");
   const [loading, setLoading] = useState(true);
   const [isJoining, setIsJoining] = useState(false);
@@ -33,6 +38,48 @@ export default function EventDetail() {
     }
   }, [id, authLoading]);
 
+  // Sayfa açıkken yeni/silinen yorumlar SSE ile gelir (sadece değişiklikler)
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return;
+    let connected = false;
+    let source = null;
+    let retryTimer = null;
+
+    const connect = () => {
+      source = new EventSource(`${api.defaults.baseURL}/events/${id}/comments/stream`);
+      source.addEventListener('ready', () => {
+        // Yeniden bağlanınca arada kaçanlar için ilk sayfa tazelenir
+        if (connected) fetchComments();
+        connected = true;
+      });
+      source.addEventListener('comment', (e) => prependComment(JSON.parse(e.data)));
+      source.addEventListener('comment_deleted', (e) => {
+        const { id: deletedId } = JSON.parse(e.data);
+        if (!seenCommentIds.current.delete(deletedId)) return;
+        setComments(prev => prev.filter(c => c.id !== deletedId));
+        setCommentCount(count => Math.max(0, count - 1));
+      });
+      // 503 (dolu/Redis yok) yanıtında tarayıcı denemeyi bırakır; biraz sonra yeniden bağlanılır
+      source.onerror = () => {
+        if (source.readyState !== EventSource.CLOSED) return;
+        retryTimer = setTimeout(connect, 5000);
+      };
+    };
+
+    connect();
+    return () => {
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [id]);
+
+  const prependComment = (comment) => {
+    if (seenCommentIds.current.has(comment.id)) return;
+    seenCommentIds.current.add(comment.id);
+    setComments(prev => [comment, ...prev]);
+    setCommentCount(count => count + 1);
+  };
+
   const fetchEventDetails = async () => {
     setLoading(true);
     try {
@@ -46,10 +93,15 @@ export default function EventDetail() {
     }
   };
 
-  const fetchComments = async () => {
+  // Yorumlar sayfalı gelir: ilk sayfa + toplam sayı, sonrası ?before=<next_cursor> ile eklenir
+  const fetchComments = async (before = null) => {
     try {
-      const { data } = await api.get(`/events/${id}/comments`);
-      setComments(data.comments || []);
+      const { data } = await api.get(`/events/${id}/comments`, { params: before ? { before } : {} });
+      if (!before) seenCommentIds.current = new Set();
+      (data.comments || []).forEach(c => seenCommentIds.current.add(c.id));
+      setComments(prev => before ? [...prev, ...(data.comments || [])] : (data.comments || []));
+      if (!before) setCommentCount(data.count ?? (data.comments || []).length);
+      setCommentsCursor(data.pagination?.next_cursor || null);
     } catch (err) {
       console.error('Yorumlar yüklenemedi');
     }
@@ -72,10 +124,15 @@ export default function EventDetail() {
     if (hasJoined) return;
     setIsJoining(true);
     try {
-      await api.post(`/events/${id}/join`);
+      const { data } = await api.post(`/events/${id}/join`, occurrence ? { occurrence } : {});
+      showToast(t('event_detail.join_success'), 'success');
+      if (data.event_id && String(data.event_id) !== String(id)) {
+        // Seride katılım tekrarın kendi satırına yazılır; ayrılma ve sayaç o sayfadadır
+        navigate(`/events/${data.event_id}`, { replace: true });
+        return;
+      }
       setHasJoined(true);
       setEvent(prev => ({ ...prev, participant_count: (prev.participant_count || 0) + 1 }));
-      showToast(t('event_detail.join_success'), 'success');
     } catch (err) {
       showToast(t('event_detail.join_error'), 'error');
     } finally {
@@ -101,7 +158,7 @@ export default function EventDetail() {
       const { data } = await api.post(`/events/${id}/comments`, { content: newComment });
       
       if (data && data.comment) {
-        setComments(prevComments => [data.comment, ...prevComments]);
+        prependComment(data.comment);
         setNewComment(""); 
         showToast(t('event_detail.comment_success'), "success");
       } else {
@@ -141,7 +198,7 @@ export default function EventDetail() {
             <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-8">
                <div className="flex items-center p-4 bg-indigo-50 rounded-2xl border border-indigo-100">
                  <Calendar className="text-indigo-600 mr-3" size={24} />
-                 <div><p className="text-[9px] font-black text-indigo-400 uppercase">{t('event_detail.date')}</p><p className="font-bold text-gray-800 text-sm">{event.date}</p></div>
+                 <div><p className="text-[9px] font-black text-indigo-400 uppercase">{t('event_detail.date')}</p><p className="font-bold text-gray-800 text-sm">{occurrence || event.date}</p></div>
                </div>
                <div className="flex items-center p-4 bg-rose-50 rounded-2xl border border-rose-100">
                  <MapPin className="text-rose-600 mr-3" size={24} />
@@ -189,7 +246,7 @@ export default function EventDetail() {
         {/* YORUMLAR / TARTIŞMALAR BÖLÜMÜ */}
         <div className="bg-white rounded-3xl p-8 shadow-xl border border-gray-100 text-left">
           <h2 className="text-xl font-black mb-6 flex items-center tracking-tight uppercase italic">
-            <MessageSquare className="mr-3 text-indigo-600" /> {t('event_detail.discussion_title')} ({comments.length})
+            <MessageSquare className="mr-3 text-indigo-600" /> {t('event_detail.discussion_title')} ({commentCount})
           </h2>
           
           <form onSubmit={handleAddComment} className="mb-8 relative">
@@ -264,6 +321,14 @@ export default function EventDetail() {
                 {t('event_detail.no_comments')}
               </div>
             )}
+            {commentsCursor && (
+              <button
+                onClick={() => fetchComments(commentsCursor)}
+                className="w-full py-3 text-xs font-black uppercase tracking-widest text-indigo-600 hover:bg-indigo-50 rounded-2xl transition"
+              >
+                {t('event_detail.load_more_comments')}
+              </button>
+            )}
           </div>
         </div>
       </div>
@@ -201,8 +201,12 @@ export default function Home() {
             <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-8">
               {events.map(event => (
                 <Link 
-                  to={`/events/${event.id}`} 
-                  key={event.id}
+                  to={event.series_id
+                    ? (event.occurrence_id
+                        ? `/events/${event.occurrence_id}`
+                        : `/events/${event.id}?occurrence=${encodeURIComponent(event.date)}`)
+                    : `/events/${event.id}`} 
+                  key={`${event.id}-${event.date}`}
                   className="group bg-white rounded-3xl border-2 border-gray-100 overflow-hidden hover:shadow-2xl hover:border-blue-200 transition-all duration-300 transform hover:-translate-y-2"
                 >
                   <div className="relative h-52 overflow-hidden">